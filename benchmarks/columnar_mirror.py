@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Columnar Mirror Benchmark
+Times the aggregate endpoint group-bys over raw trade_flows on SQLite, on
+MySQL (optional, against the already loaded database configured through the
+MYSQL_* variables) and on the DuckDB/Parquet mirror.
+
+Usage:
+    python -m benchmarks.columnar_mirror [--rows 10000000] [--repeat 3] [--mysql]
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic_data import create_synthetic_sqlite
+from config.query_builder import get_dialect
+
+
+def aggregate_queries(db_type: str):
+    """The /v2/anomalies and /v2/stats aggregates over raw trade_flows, per dialect"""
+    route = get_dialect('sqlite' if db_type == 'duckdb' else db_type).concat("c1.name", "' → '", "c2.name")
+    return {
+        "anomaly group-by": f"""
+            SELECT tf.period, hs.description AS commodity, {route} AS trade_route,
+                   SUM(tf.value_usd) AS total_value
+            FROM trade_flows tf
+            JOIN countries c1 ON tf.reporter_iso = c1.iso3
+            JOIN countries c2 ON tf.partner_iso = c2.iso3
+            JOIN hs_codes hs ON tf.hs6 = hs.hs6
+            GROUP BY tf.period, hs.description, trade_route
+            HAVING SUM(tf.value_usd) > 0
+        """,
+        "stats totals": """
+            SELECT COUNT(*), SUM(value_usd), COUNT(DISTINCT hs6), MAX(period) FROM trade_flows
+        """,
+        "top commodities": """
+            SELECT hs.description, SUM(tf.value_usd) AS total_value
+            FROM trade_flows tf JOIN hs_codes hs ON tf.hs6 = hs.hs6
+            GROUP BY hs.description ORDER BY total_value DESC LIMIT 5
+        """,
+    }
+
+
+def time_query(run, sql: str, repeat: int) -> float:
+    """Median wall time in ms of run(sql)"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run(sql)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mysql", action="store_true", help="Also time the configured MySQL database")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "columnar.db")
+        mirror_dir = os.path.join(tmpdir, "mirror")
+
+        started = time.perf_counter()
+        print(f"Building {args.rows:,} row SQLite database...")
+        create_synthetic_sqlite(db_path, args.rows)
+        print(f"  built in {time.perf_counter() - started:.0f}s")
+
+        os.environ["DB_TYPE"] = "sqlite"
+        os.environ["SQLITE_DATABASE"] = db_path
+        from config.database import DatabaseConfig
+        from src.analytics.columnar_mirror import ColumnarMirror
+
+        mirror = ColumnarMirror(DatabaseConfig(), mirror_dir)
+        result = mirror.refresh()
+        print(f"  mirror exported in {result['seconds']:.0f}s ({result['periods']} period partitions)")
+
+        engines = {}
+        sqlite_conn = sqlite3.connect(db_path)
+        engines["sqlite"] = lambda sql: sqlite_conn.execute(sql).fetchall()
+        engines["duckdb"] = mirror.query
+
+        if args.mysql:
+            mysql_db = DatabaseConfig()
+            mysql_db.db_type = 'mysql'
+            count = mysql_db.execute_query("SELECT COUNT(*) AS n FROM trade_flows", fetch='one')['n']
+            print(f"  MySQL trade_flows holds {count:,} rows")
+            engines["mysql"] = lambda sql: mysql_db.execute_query(sql)
+
+        print("-" * 70)
+        print(f"{'query':<20}" + "".join(f"{name:>16}" for name in engines))
+        for label in aggregate_queries('sqlite'):
+            cells = []
+            for name, run in engines.items():
+                sql = aggregate_queries(name)[label]
+                cells.append(f"{time_query(run, sql, args.repeat):>14.1f}ms")
+            print(f"{label:<20}" + "".join(cells))
+        sqlite_conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Database Concurrency Benchmark
+Measures request latency for N concurrent async clients issuing the
+/v2/series query, comparing blocking calls on the event loop with the
+thread-pool offload in DatabaseConfig.
+
+Usage:
+    python -m benchmarks.db_concurrency [--clients 50] [--requests 20] [--rows 200000]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.synthetic_data import create_synthetic_sqlite
+
+SERIES_QUERY = """
+    SELECT tf.period, c1.name as reporter, c2.name as partner,
+           hs.description as commodity, tf.hs6, tf.value_usd, tf.quantity, tf.unit
+    FROM trade_flows tf
+    JOIN countries c1 ON tf.reporter_iso = c1.iso3
+    JOIN countries c2 ON tf.partner_iso = c2.iso3
+    JOIN hs_codes hs ON tf.hs6 = hs.hs6
+    WHERE hs.description LIKE ?
+    ORDER BY tf.period DESC, tf.value_usd DESC LIMIT 100
+"""
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run_clients(db, clients: int, requests_per_client: int, offload: bool) -> Dict[str, float]:
+    """Run concurrent clients and collect per-request latency in milliseconds"""
+    latencies: List[float] = []
+
+    async def client():
+        for _ in range(requests_per_client):
+            started = time.perf_counter()
+            if offload:
+                await db.execute_query_async(SERIES_QUERY, ("%Memory%",))
+            else:
+                db.execute_query(SERIES_QUERY, ("%Memory%",))
+                await asyncio.sleep(0)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    # Heartbeat task: how late does the loop wake a 10ms sleeper?
+    stalls: List[float] = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        while not done.is_set():
+            tick = time.perf_counter()
+            await asyncio.sleep(0.01)
+            stalls.append((time.perf_counter() - tick - 0.01) * 1000)
+
+    beat = asyncio.create_task(heartbeat())
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await beat
+
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies),
+        "throughput_rps": len(latencies) / elapsed,
+        "loop_stall_p99_ms": percentile(stalls, 99) if stalls else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client")
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "bench.db")
+        print(f"Creating synthetic database with {args.rows:,} rows...")
+        create_synthetic_sqlite(db_path, args.rows)
+
+        os.environ["DB_TYPE"] = "sqlite"
+        os.environ["SQLITE_DATABASE"] = db_path
+        from config.database import DatabaseConfig
+        db = DatabaseConfig()
+
+        print(f"{args.clients} concurrent clients x {args.requests} requests")
+        print("-" * 70)
+        for label, offload in (("blocking (sync on loop)", False), ("async offload", True)):
+            result = asyncio.run(run_clients(db, args.clients, args.requests, offload))
+            print(f"{label:<26} p50={result['p50_ms']:8.1f}ms  p99={result['p99_ms']:8.1f}ms  "
+                  f"{result['throughput_rps']:7.1f} req/s  loop stall p99={result['loop_stall_p99_ms']:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Export Memory Benchmark
+Peak Python memory and throughput of the /v2/export encoders (NDJSON, CSV,
+Arrow) streaming the full trade_flows join at growing row counts, against
+fetching the whole result and encoding it as one JSON document. Streamed
+peak should stay flat.
+
+Usage:
+    python -m benchmarks.export_memory [--sizes 50000 200000 800000] [--batch-size 10000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic_data import create_synthetic_sqlite
+from config.queries import TRADE_EXPORT_QUERY
+from src.api.export import EXPORT_FORMATS, format_available
+
+
+def measure(func):
+    """Run func() and return (result, peak traced MiB, seconds)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak / (1024 * 1024), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50_000, 200_000, 800_000])
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    from config.database import DatabaseConfig
+
+    formats = [name for name in EXPORT_FORMATS if format_available(name)]
+    header = f"{'rows':>10} {'fetch all + json':>20}" + "".join(f" {name:>20}" for name in formats)
+    print(header)
+    print("-" * len(header))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size in args.sizes:
+            db_path = os.path.join(tmpdir, f"export_{size}.db")
+            create_synthetic_sqlite(db_path, size)
+            os.environ["DB_TYPE"] = "sqlite"
+            os.environ["SQLITE_DATABASE"] = db_path
+            db = DatabaseConfig()
+            sql, params = TRADE_EXPORT_QUERY.build('sqlite')
+            db.execute_query("SELECT 1")  # Open the pool outside the measurement
+
+            def fetch_all():
+                rows = db.execute_query(sql, params)
+                return len(json.dumps([row.as_dict() for row in rows]).encode())
+
+            def exporter(name):
+                encode = EXPORT_FORMATS[name][0]
+
+                def run():
+                    async def consume():
+                        total = 0
+                        async for chunk in encode(db.stream_batches_async(sql, params, args.batch_size)):
+                            total += len(chunk)
+                        return total
+                    return asyncio.run(consume())
+                return run
+
+            cells = []
+            for func in [fetch_all] + [exporter(name) for name in formats]:
+                nbytes, peak_mib, seconds = measure(func)
+                cells.append(f"{peak_mib:6.1f}MiB {size / seconds / 1000:5.0f}k/s")
+            print(f"{size:>10,} {cells[0]:>20}" + "".join(f" {cell:>20}" for cell in cells[1:]))
+            db._sqlite_pool.close()
+            if db._executor is not None:
+                db._executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Globe Binary Format Benchmark
+Payload size (raw and gzip) and encode/parse time of /v2/globe/trade-flows
+as JSON, format=binary and format=arrow for synthetic globe results of
+growing flow counts. Parsing JSON means json.loads of the whole document;
+parsing binary means reading the header and wrapping each column in a view
+(what the globe does with typed arrays).
+
+Usage:
+    python -m benchmarks.globe_binary [--sizes 50 1000 10000 100000] [--repeat 5]
+"""
+
+import argparse
+import gc
+import gzip
+import json
+import random
+import time
+
+from src.api.globe_binary import ARROW_AVAILABLE, decode_binary, encode_arrow, encode_binary
+from src.api.trade_visualization_client import visualization_client
+
+COMMODITIES = [
+    ("Processors and controllers", "854231"), ("Memories", "854232"),
+    ("Amplifiers", "854233"), ("Other integrated circuits", "854239"),
+    ("Machines for semiconductor manufacturing", "848620"),
+]
+
+
+def globe_result(size: int, seed: int = 7):
+    """A get_trade_flows_for_globe-shaped result with `size` flows"""
+    rng = random.Random(seed)
+    coords = visualization_client.country_coords
+    countries = list(coords)
+    flows, country_stats = [], {}
+    for _ in range(size):
+        reporter, partner = rng.sample(countries, 2)
+        commodity, hs_code = rng.choice(COMMODITIES)
+        value = rng.uniform(1e8, 5e10)
+        flows.append({
+            "from": {"country": reporter, "coordinates": [coords[reporter]["lng"], coords[reporter]["lat"]]},
+            "to": {"country": partner, "coordinates": [coords[partner]["lng"], coords[partner]["lat"]]},
+            "value": value,
+            "commodity": commodity,
+            "hs_code": hs_code,
+            "period": rng.choice(["2022", "2023", "2024"]),
+            "intensity": min(value / 1e9, 1.0),
+        })
+        for country in (reporter, partner):
+            stats = country_stats.setdefault(country, {
+                "total_trade": 0, "export_value": 0, "import_value": 0, "coordinates": coords[country]
+            })
+            stats["total_trade"] += value
+            stats["export_value" if country == reporter else "import_value"] += value
+    return {
+        "trade_flows": flows,
+        "country_stats": country_stats,
+        "metadata": {"total_flows": size, "countries": len(country_stats), "min_value_filter": 1e8},
+    }
+
+
+def best_ms(func, repeat):
+    """Best of `repeat` runs in milliseconds, plus the last result"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = func()
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 1000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    formats = [
+        ("json", lambda result: json.dumps(result, separators=(",", ":")).encode(), json.loads),
+        ("binary", encode_binary, decode_binary),
+    ]
+    if ARROW_AVAILABLE:
+        import pyarrow as pa
+        formats.append(("arrow", encode_arrow, lambda body: pa.ipc.open_stream(body).read_all()))
+    else:
+        print("pyarrow is not installed; skipping format=arrow")
+
+    print(f"{'flows':>8} {'format':<8} {'bytes':>12} {'gzip':>12} {'encode ms':>10} {'parse ms':>10}")
+    print("-" * 65)
+    for size in args.sizes:
+        result = globe_result(size)
+        baseline = None
+        for name, encode, parse in formats:
+            encode_ms, body = best_ms(lambda: encode(result), args.repeat)
+            parse_ms, _ = best_ms(lambda: parse(body), args.repeat)
+            compressed = len(gzip.compress(body, 6))
+            print(f"{size:>8,} {name:<8} {len(body):>12,} {compressed:>12,} {encode_ms:>10.2f} {parse_ms:>10.3f}")
+            if baseline is None:
+                baseline = (len(body), parse_ms)
+            else:
+                print(f"{'':>8} {'':<8} {baseline[0] / len(body):>11.1f}x {'':>12} {'':>10} "
+                      f"{baseline[1] / max(parse_ms, 1e-6):>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+JSON Serialization Benchmark
+Time to turn decoded /v2/series rows into response bytes for 1,000-row and
+100,000-row responses, comparing the response-model path (a
+TradeFlowResponse per row, re-validated against response_model and encoded
+with the json module, as FastAPI does) with the API_FAST_JSON path (dicts
+projected from the rows, encoded with orjson). /v1/series is measured the
+same way (models, model_dump(), jsonable_encoder).
+
+Usage:
+    python -m benchmarks.json_serialization [--sizes 1000 100000] [--repeat 5]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from benchmarks.synthetic_data import create_synthetic_sqlite
+from config.queries import TRADE_SERIES_QUERY
+from config.rows import RowDecoder
+from src.api.fast_json import ORJSON_AVAILABLE, FastJSONResponse, model_fields, rows_as_dicts
+
+
+def json_dumps(content) -> bytes:
+    """starlette.responses.JSONResponse.render"""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def best_ms(func, repeat):
+    """Best of `repeat` runs in milliseconds, plus the last result"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = func()
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if not ORJSON_AVAILABLE:
+        print("orjson is not installed; the fast path is unavailable")
+        return
+
+    from src.api.fastapi_server import TradeFlowResponse
+    adapter = TypeAdapter(List[TradeFlowResponse])
+    fields = model_fields(TradeFlowResponse)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "json.db")
+        create_synthetic_sqlite(db_path, max(args.sizes))
+        conn = sqlite3.connect(db_path)
+
+        print(f"{'rows':>8} {'path':<28} {'ms':>10} {'bytes':>12}")
+        print("-" * 62)
+        for size in args.sizes:
+            sql, params = TRADE_SERIES_QUERY.build('sqlite', limit=size)
+            cursor = conn.execute(sql, params)
+            rows = RowDecoder(cursor.description).decode(cursor.fetchall())
+
+            def v2_models():
+                models = [TradeFlowResponse.model_validate(row.as_dict()) for row in rows]
+                return json_dumps(adapter.dump_python(adapter.validate_python(models), mode="json"))
+
+            def v1_models():
+                models = [TradeFlowResponse.model_validate(row.as_dict()) for row in rows]
+                return json_dumps(jsonable_encoder({"success": True, "data": [m.model_dump() for m in models]}))
+
+            def fast():
+                return FastJSONResponse(rows_as_dicts(rows, fields)).body
+
+            results = {}
+            for label, func in [("/v2 response models", v2_models), ("/v1 models + model_dump()", v1_models),
+                                ("API_FAST_JSON (orjson)", fast)]:
+                elapsed, body = best_ms(func, args.repeat)
+                results[label] = elapsed
+                print(f"{len(rows):>8,} {label:<28} {elapsed:>10.1f} {len(body):>12,}")
+            speedup = results["/v2 response models"] / results["API_FAST_JSON (orjson)"]
+            print(f"{'':>8} {'speedup vs /v2 models':<28} {speedup:>9.1f}x")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
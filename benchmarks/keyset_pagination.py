@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Keyset Pagination Benchmark
+Compares the cost of fetching a /v2/series page at increasing depth with
+LIMIT/OFFSET against the keyset predicate used by cursor tokens.
+
+Usage:
+    python -m benchmarks.keyset_pagination [--rows 1000000] [--page-size 1000]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.synthetic_data import create_synthetic_sqlite
+from config.queries import TRADE_SERIES_QUERY
+
+
+def timed(conn, sql, params, repeat=3):
+    """Best of `repeat` runs in milliseconds, plus the rows of the last run"""
+    best = float("inf")
+    rows = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = conn.execute(sql, params).fetchall()
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "keyset.db")
+        print(f"Building {args.rows:,} row database...")
+        create_synthetic_sqlite(db_path, args.rows)
+        conn = sqlite3.connect(db_path)
+
+        first_sql, first_params = TRADE_SERIES_QUERY.build('sqlite', limit=args.page_size)
+        offset_sql = first_sql.replace("LIMIT ?", "LIMIT ? OFFSET ?")
+
+        print(f"{'depth (rows)':>14} {'OFFSET':>12} {'keyset':>12}")
+        print("-" * 40)
+        depth = args.page_size
+        while depth < args.rows:
+            # Sort key of the row just before this page, as a cursor would carry it
+            period, value_usd, row_id = conn.execute(
+                "SELECT period, value_usd, id FROM trade_flows "
+                "ORDER BY period DESC, value_usd DESC, id DESC LIMIT 1 OFFSET ?", (depth - 1,)
+            ).fetchone()
+            keyset_sql, keyset_params = TRADE_SERIES_QUERY.build(
+                'sqlite', after=(period, value_usd, row_id), after_period=period, limit=args.page_size
+            )
+
+            offset_ms, offset_rows = timed(conn, offset_sql, (args.page_size, depth))
+            keyset_ms, keyset_rows = timed(conn, keyset_sql, keyset_params)
+            assert offset_rows == keyset_rows, f"pages differ at depth {depth}"
+            print(f"{depth:>14,} {offset_ms:>10.1f}ms {keyset_ms:>10.1f}ms")
+            depth *= 4
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Request Coalescing Benchmark
+Wall time and database queries for N concurrent identical /v2/anomalies
+and /v2/stats calls (a burst of dashboard tabs missing the response cache
+together), with single-flight coalescing and without it (the undecorated
+endpoint functions).
+
+Usage:
+    python -m benchmarks.request_coalescing [--rows 50000] [--concurrency 1 10 50]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "coalescing.db")
+        os.environ["DB_TYPE"] = "sqlite"
+        os.environ["SQLITE_DATABASE"] = db_path
+
+        # Imported after the environment points at the synthetic database,
+        # since the endpoints use the global db_config
+        from benchmarks.synthetic_data import create_synthetic_sqlite
+        from config.database import db_config
+        create_synthetic_sqlite(db_path, args.rows)
+        from src.api.fastapi_server import get_anomalies, get_summary_stats
+        from src.api.single_flight import single_flight
+
+        endpoints = [
+            ("/v2/anomalies", get_anomalies, {"threshold": 20.0, "severity": None}),
+            ("/v2/stats", get_summary_stats, {}),
+        ]
+
+        async def burst(func, kwargs, concurrency):
+            db_config.query_stats.reset()
+            started = time.perf_counter()
+            results = await asyncio.gather(*[func(**kwargs) for _ in range(concurrency)], return_exceptions=True)
+            elapsed = (time.perf_counter() - started) * 1000
+            queries = db_config.query_stats.snapshot(1)['queries_recorded']
+            failed = sum(isinstance(result, Exception) for result in results)
+            return elapsed, queries, failed
+
+        async def run():
+            print(f"{'endpoint':<15} {'clients':>8} {'plain ms':>10} {'queries':>8} {'failed':>7} "
+                  f"{'coalesced ms':>13} {'queries':>8} {'failed':>7}")
+            print("-" * 83)
+            for path, func, kwargs in endpoints:
+                await func(**kwargs)  # Warm the pool and page cache
+                for concurrency in args.concurrency:
+                    plain = await burst(func.__wrapped__, kwargs, concurrency)
+                    coalesced = await burst(func, kwargs, concurrency)
+                    print(f"{path:<15} {concurrency:>8} {plain[0]:>10.1f} {plain[1]:>8} {plain[2]:>7} "
+                          f"{coalesced[0]:>13.1f} {coalesced[1]:>8} {coalesced[2]:>7}")
+            print(single_flight.stats())
+
+        # Slow-query and pool-wait warnings would drown the table
+        logging.getLogger("config.database").setLevel(logging.CRITICAL)
+        logging.getLogger("src.api.fastapi_server").setLevel(logging.CRITICAL)
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Rollup Benchmark
+Times the /v2/anomalies and /v2/stats queries against the rollup tables and
+against the equivalent full GROUP BY over trade_flows, at growing table sizes.
+
+Usage:
+    python -m benchmarks.rollups [--sizes 50000 200000 800000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic_data import create_synthetic_sqlite
+from config.queries import anomaly_totals_query, STATS_SNAPSHOT_QUERY
+from src.analytics.summary_stats import summarize_stats
+
+RAW_ANOMALY_QUERY = """
+    SELECT tf.period, hs.description as commodity, c1.name || ' → ' || c2.name as trade_route,
+           SUM(tf.value_usd) as total_value
+    FROM trade_flows tf
+    JOIN countries c1 ON tf.reporter_iso = c1.iso3
+    JOIN countries c2 ON tf.partner_iso = c2.iso3
+    JOIN hs_codes hs ON tf.hs6 = hs.hs6
+    GROUP BY tf.period, hs.description, trade_route
+    HAVING SUM(tf.value_usd) > 0
+    ORDER BY tf.period, total_value DESC
+"""
+
+RAW_STATS_QUERIES = [
+    "SELECT COUNT(*) FROM trade_flows",
+    "SELECT SUM(value_usd) FROM trade_flows",
+    "SELECT COUNT(DISTINCT hs6) FROM trade_flows",
+    "SELECT MAX(period) FROM trade_flows",
+    """
+    SELECT hs.description, SUM(tf.value_usd) as total_value
+    FROM trade_flows tf JOIN hs_codes hs ON tf.hs6 = hs.hs6
+    GROUP BY hs.description ORDER BY total_value DESC LIMIT 5
+    """,
+]
+
+
+def time_queries(conn, queries, repeat):
+    """Median wall time in ms to run every query in `queries` once; also the row count of the last"""
+    samples = []
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for sql in queries:
+            rows = len(conn.execute(sql).fetchall())
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), rows
+
+
+def time_stats_snapshot(conn, repeat):
+    """Median wall time in ms to read the stats rollup and summarize it, as /v2/stats does"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        summarize_stats(conn.execute(STATS_SNAPSHOT_QUERY).fetchall())
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50_000, 200_000, 800_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'anomaly groups':>15} {'anomalies raw':>14} {'rollup':>9} "
+          f"{'stats raw':>10} {'rollup':>9}")
+    print("-" * 72)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size in args.sizes:
+            db_path = os.path.join(tmpdir, f"rollups_{size}.db")
+            create_synthetic_sqlite(db_path, size)
+            conn = sqlite3.connect(db_path)
+
+            raw_anomalies, groups = time_queries(conn, [RAW_ANOMALY_QUERY], args.repeat)
+            rollup_anomalies, _ = time_queries(conn, [anomaly_totals_query('sqlite')], args.repeat)
+            raw_stats, _ = time_queries(conn, RAW_STATS_QUERIES, args.repeat)
+            rollup_stats = time_stats_snapshot(conn, args.repeat)
+            conn.close()
+
+            print(f"{size:>10,} {groups:>15,} {raw_anomalies:>12.1f}ms {rollup_anomalies:>7.1f}ms "
+                  f"{raw_stats:>8.1f}ms {rollup_stats:>7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
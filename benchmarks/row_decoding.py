@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Row Decoding Benchmark
+Rows/second for turning a full /v2/series result into rows and then into
+TradeFlowResponse models, comparing the old per-driver paths (sqlite3.Row /
+MySQL dict rows with per-field isinstance branches and float() calls) with
+config.rows decoding, with and without the GC pause on large results.
+MySQL results are emulated from the SQLite result with DECIMAL columns as
+Decimal, the way mysql-connector returns them.
+
+Usage:
+    python -m benchmarks.row_decoding [--rows 1000000]
+"""
+
+import argparse
+import gc
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+from mysql.connector.constants import FieldType
+
+from benchmarks.synthetic_data import create_synthetic_sqlite
+from config.queries import TRADE_SERIES_QUERY
+from config import rows as config_rows
+from config.rows import RowDecoder
+
+
+def legacy_models(rows, model):
+    """The endpoint code before: branch per row, convert per field"""
+    trade_flows = []
+    for row in rows:
+        if isinstance(row, dict):
+            trade_flows.append(model(
+                period=row['period'], reporter=row['reporter'], partner=row['partner'],
+                commodity=row['commodity'], hs6=row['hs6'],
+                value_usd=float(row['value_usd']) if row['value_usd'] else 0.0,
+                quantity=float(row['quantity']) if row['quantity'] else None,
+                unit=row['unit']
+            ))
+        else:
+            trade_flows.append(model(
+                period=row[0], reporter=row[1], partner=row[2], commodity=row[3], hs6=row[4],
+                value_usd=float(row[5]) if row[5] else 0.0,
+                quantity=float(row[6]) if row[6] else None,
+                unit=row[7]
+            ))
+    return trade_flows
+
+
+def typed_models(rows, model):
+    return [model.model_validate(row.as_dict()) for row in rows]
+
+
+def without_gc_pause(decode):
+    """decode() with the cyclic GC left running however large the result"""
+    def run():
+        threshold = config_rows.GC_PAUSE_MIN_ROWS
+        config_rows.GC_PAUSE_MIN_ROWS = sys.maxsize
+        try:
+            return decode()
+        finally:
+            config_rows.GC_PAUSE_MIN_ROWS = threshold
+    return run
+
+
+def rate(count, func):
+    """(result, rows per second) of func()"""
+    gc.collect()
+    started = time.perf_counter()
+    result = func()
+    return result, count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    from src.api.fastapi_server import TradeFlowResponse
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "rows.db")
+        print(f"Building {args.rows:,} row database...")
+        create_synthetic_sqlite(db_path, args.rows)
+        sql, params = TRADE_SERIES_QUERY.build('sqlite', limit=args.rows)
+
+        conn = sqlite3.connect(db_path)
+        cursor = conn.execute(sql, params)
+        raw = cursor.fetchall()
+        description = cursor.description
+        names = [column[0] for column in description]
+        count = len(raw)
+
+        # mysql-connector shapes: Decimal for DECIMAL(20, 2) columns
+        mysql_raw = [
+            row[:5] + (Decimal(f"{row[5]:.2f}"), None if row[6] is None else Decimal(f"{row[6]:.2f}")) + row[7:]
+            for row in raw
+        ]
+        mysql_description = [
+            (name, FieldType.NEWDECIMAL if name in ("value_usd", "quantity") else FieldType.VAR_STRING)
+            for name in names
+        ]
+
+        def sqlite_rows():
+            conn.row_factory = sqlite3.Row
+            try:
+                return conn.execute(sql, params).fetchall()
+            finally:
+                conn.row_factory = None
+
+        def typed_sqlite_rows():
+            cursor = conn.execute(sql, params)
+            return RowDecoder(cursor.description).decode(cursor.fetchall())
+
+        cases = [
+            ("SQLite  sqlite3.Row (before)", sqlite_rows),
+            ("SQLite  Row decoder", typed_sqlite_rows),
+            ("MySQL   dict rows (before)", lambda: [dict(zip(names, row)) for row in mysql_raw]),
+            ("MySQL   Row decoder", lambda: RowDecoder(mysql_description).decode(mysql_raw)),
+            ("MySQL   Row decoder, GC running",
+             without_gc_pause(lambda: RowDecoder(mysql_description).decode(mysql_raw))),
+        ]
+
+        print(f"{count:,} rows; rows/s (higher is better)")
+        print(f"{'path':<32} {'decode':>12} {'+ models':>12}")
+        print("-" * 58)
+        for label, decode in cases:
+            _, decode_rate = rate(count, decode)
+            build = typed_models if "decoder" in label else legacy_models
+            _, total_rate = rate(count, lambda: build(decode(), TradeFlowResponse))
+            print(f"{label:<32} {decode_rate:>12,.0f} {total_rate:>12,.0f}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
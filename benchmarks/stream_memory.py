@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Streaming Query Memory Benchmark
+Compares peak Python memory of execute_query(fetch='all') with
+stream_query / stream_query_async when reading the full /v2/series result
+at growing row counts. Streamed peak should stay flat.
+
+Usage:
+    python -m benchmarks.stream_memory [--sizes 20000 100000 400000] [--batch-size 1000]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic_data import create_synthetic_sqlite
+from config.queries import TRADE_SERIES_QUERY
+
+
+def measure(func):
+    """Run func() and return (result, peak traced MiB, seconds)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak / (1024 * 1024), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20_000, 100_000, 400_000])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    from config.database import DatabaseConfig
+
+    print(f"{'rows':>10} {'fetch all':>16} {'stream_query':>16} {'stream_query_async':>20}")
+    print("-" * 66)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size in args.sizes:
+            db_path = os.path.join(tmpdir, f"stream_{size}.db")
+            create_synthetic_sqlite(db_path, size)
+            os.environ["DB_TYPE"] = "sqlite"
+            os.environ["SQLITE_DATABASE"] = db_path
+            db = DatabaseConfig()
+            sql, params = TRADE_SERIES_QUERY.build('sqlite', limit=size)
+            db.execute_query("SELECT 1")  # Open the pool outside the measurement
+
+            def fetch_all():
+                return sum(1 for _ in db.execute_query(sql, params))
+
+            def stream():
+                return sum(1 for _ in db.stream_query(sql, params, args.batch_size))
+
+            def stream_async():
+                async def consume():
+                    count = 0
+                    async for _ in db.stream_query_async(sql, params, args.batch_size):
+                        count += 1
+                    return count
+                return asyncio.run(consume())
+
+            cells = []
+            for func in (fetch_all, stream, stream_async):
+                count, peak_mib, seconds = measure(func)
+                assert count == size, f"{func.__name__} returned {count} rows"
+                cells.append(f"{peak_mib:7.1f}MiB {seconds:5.2f}s")
+            print(f"{size:>10,} {cells[0]:>16} {cells[1]:>16} {cells[2]:>20}")
+            db._sqlite_pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Synthetic trade data for benchmarks
+Builds a throwaway SQLite database shaped like the production schema
+"""
+
+import random
+import sqlite3
+from typing import Iterator, List, Tuple
+
+from config.migrations import migrate_connection
+from src.ingest.rollups import REBUILD_STATEMENTS
+
+COUNTRIES = [
+    ("KOR", "South Korea"), ("TWN", "Taiwan"), ("USA", "USA"), ("CHN", "China"),
+    ("JPN", "Japan"), ("NLD", "Netherlands"), ("DEU", "Germany"), ("SGP", "Singapore"),
+    ("MYS", "Malaysia"), ("THA", "Thailand"),
+] + [(f"X{i:02d}", f"Synthetic Country {i:02d}") for i in range(1, 51)]
+
+HS_CODES = [
+    ("854231", "Electronic integrated circuits: Processors and controllers"),
+    ("854232", "Electronic integrated circuits: Memory (DRAM, flash, HBM)"),
+    ("854233", "Electronic integrated circuits: Amplifiers"),
+    ("854239", "Electronic integrated circuits: Other"),
+    ("848620", "Semiconductor manufacturing equipment"),
+]
+
+FLOWS = ("X", "M")
+
+# Monthly periods, newest last
+PERIODS = [f"{year}-{month:02d}" for year in range(2000, 2025) for month in range(1, 13)]
+
+ROUTES = [(r, p) for r, _ in COUNTRIES for p, _ in COUNTRIES if r != p]
+
+# Distinct (period, reporter, partner, hs6, flow) keys available
+MAX_ROWS = len(PERIODS) * len(ROUTES) * len(HS_CODES) * len(FLOWS)
+
+
+def generate_trade_rows(count: int, seed: int = 42) -> Iterator[Tuple]:
+    """
+    Yield (period, reporter_iso, partner_iso, hs6, flow, value_usd, quantity, unit) rows
+
+    Every row has a distinct natural key, filling the most recent periods first.
+    """
+    if count > MAX_ROWS:
+        raise ValueError(f"At most {MAX_ROWS:,} distinct synthetic rows are available")
+
+    rng = random.Random(seed)
+    per_period = len(ROUTES) * len(HS_CODES) * len(FLOWS)
+    for i in range(count):
+        period = PERIODS[-1 - i // per_period]
+        rest = i % per_period
+        reporter, partner = ROUTES[rest // (len(HS_CODES) * len(FLOWS))]
+        hs6 = HS_CODES[(rest // len(FLOWS)) % len(HS_CODES)][0]
+        yield (
+            period,
+            reporter,
+            partner,
+            hs6,
+            FLOWS[rest % len(FLOWS)],
+            round(rng.uniform(1e6, 5e10), 2),
+            float(rng.randint(1, 10_000_000)),
+            "u",
+        )
+
+
+def generate_trade_records(count: int, seed: int = 42) -> List[dict]:
+    """Synthetic rows as dicts in the shape BulkLoader.upsert_trade_flows expects"""
+    columns = ("period", "reporter_iso", "partner_iso", "hs6", "flow", "value_usd", "quantity", "unit")
+    return [dict(zip(columns, row)) for row in generate_trade_rows(count, seed)]
+
+
+def create_synthetic_sqlite(path: str, rows: int = 100_000, seed: int = 42) -> None:
+    """Create a migrated SQLite database at `path` with `rows` synthetic trade flows"""
+    conn = sqlite3.connect(path)
+    try:
+        migrate_connection(conn, 'sqlite')
+        conn.executemany("INSERT INTO countries (iso3, name) VALUES (?, ?)", COUNTRIES)
+        conn.executemany("INSERT INTO hs_codes (hs6, description) VALUES (?, ?)", HS_CODES)
+        conn.executemany(
+            "INSERT INTO trade_flows (period, reporter_iso, partner_iso, hs6, flow, value_usd, quantity, unit) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            generate_trade_rows(rows, seed)
+        )
+        for statement in REBUILD_STATEMENTS:
+            conn.execute(statement)
+        conn.commit()
+    finally:
+        conn.close()
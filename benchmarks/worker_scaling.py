@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Worker Scaling Benchmark
+Requests per second served by `uvicorn --workers N` for N = 1, 2, 4, 8 on a
+synthetic SQLite database, with the shared-state store the deployment
+would use (SHARED_STATE_BACKEND, default sqlite). Load comes from
+keep-alive HTTP clients spread over several processes. The response cache
+is off by default so every request runs its endpoint (--cache to keep it).
+
+A second table checks the shared rate limiter: N processes each draw on a
+limiter like the upstream clients' for a few seconds, and the busiest
+second across all of them is reported. Per-process state lets N times
+the budget through; the shared store holds the total to the budget.
+
+Throughput can only scale up to the machine's core count (the load
+generator competes for the same cores).
+
+Usage:
+    python -m benchmarks.worker_scaling [--workers 1 2 4 8] [--seconds 10] [--concurrency 32]
+        [--paths /v2/stats "/v2/series?limit=100"] [--backend sqlite] [--cache]
+"""
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import List
+
+from benchmarks.synthetic_data import create_synthetic_sqlite
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(port: int, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError("Server did not start")
+
+
+def client_process(port: int, paths: List[str], threads: int, seconds: float, results):
+    """Keep-alive clients issuing GETs round-robin over paths until the deadline"""
+    counts = [0] * threads
+    errors = [0] * threads
+    deadline = time.monotonic() + seconds
+
+    def run(index: int):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        request = index
+        while time.monotonic() < deadline:
+            try:
+                connection.request("GET", paths[request % len(paths)])
+                response = connection.getresponse()
+                response.read()
+                if response.status == 200:
+                    counts[index] += 1
+                else:
+                    errors[index] += 1
+            except (OSError, http.client.HTTPException):
+                errors[index] += 1
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            request += 1
+        connection.close()
+
+    workers = [threading.Thread(target=run, args=(index,)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put((sum(counts), sum(errors)))
+
+
+def measure_throughput(env, workers: int, paths: List[str], seconds: float,
+                       concurrency: int, client_processes: int):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.fastapi_server:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=env
+    )
+    try:
+        wait_until_ready(port)
+        # Warm every worker's pools and indexes
+        client_process(port, paths, concurrency, 1.0, multiprocessing.Queue())
+        results = multiprocessing.Queue()
+        threads = max(1, concurrency // client_processes)
+        clients = [multiprocessing.Process(target=client_process, args=(port, paths, threads, seconds, results))
+                   for _ in range(client_processes)]
+        for client in clients:
+            client.start()
+        totals = [results.get() for _ in clients]
+        for client in clients:
+            client.join()
+        return sum(ok for ok, _ in totals) / seconds, sum(errors for _, errors in totals)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def limiter_process(name: str, limit: int, window: float, seconds: float, results):
+    from src.api.rate_limit import SlidingWindowLimiter
+    limiter = SlidingWindowLimiter(limit, window, name=name)
+    starts = []
+    deadline = time.monotonic() + seconds
+    while True:
+        delay = limiter.reserve()
+        if time.monotonic() + delay >= deadline:
+            break
+        # The granted start time (sleep overshoot is the scheduler's, not the limiter's)
+        starts.append(time.time() + delay)
+        time.sleep(delay)
+    results.put(starts)
+
+
+def measure_rate_limit(name: str, workers: int, limit: int, seconds: float) -> int:
+    """Most upstream request starts in any one second across `workers` processes"""
+    # Spawned, so each process builds its shared state from SHARED_STATE_* as a worker would
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [context.Process(target=limiter_process, args=(name, limit, 1.0, seconds, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    starts = sorted(start for _ in processes for start in results.get())
+    for process in processes:
+        process.join()
+    busiest, first = 0, 0
+    for last, start in enumerate(starts):
+        # 50 ms of slack: a process can be descheduled between reserve() and reading the clock
+        while start - starts[first] >= 0.95:
+            first += 1
+        busiest = max(busiest, last - first + 1)
+    return busiest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent keep-alive connections")
+    parser.add_argument("--client-processes", type=int, default=4)
+    parser.add_argument("--paths", nargs="+", default=["/v2/stats", "/v2/series?limit=100"])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--backend", default="sqlite", choices=["local", "sqlite", "redis"])
+    parser.add_argument("--cache", action="store_true", help="Keep the response cache on")
+    parser.add_argument("--rate-limit", type=int, default=20, help="Budget (starts per second) for the limiter check")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, SHARED_STATE_BACKEND={args.backend}, "
+          f"response cache {'on' if args.cache else 'off'}, paths {' '.join(args.paths)}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "workers.db")
+        create_synthetic_sqlite(db_path, args.rows)
+        env = {
+            **os.environ,
+            "DB_TYPE": "sqlite",
+            "SQLITE_DATABASE": db_path,
+            "SHARED_STATE_BACKEND": args.backend,
+            "SHARED_STATE_PATH": os.path.join(tmpdir, "shared_state.db"),
+            "RESPONSE_CACHE_ENABLED": "true" if args.cache else "false",
+        }
+
+        print(f"\n{'workers':>8} {'req/s':>10} {'speedup':>8} {'errors':>8}")
+        print("-" * 38)
+        baseline = None
+        for workers in args.workers:
+            rate, errors = measure_throughput(env, workers, args.paths, args.seconds,
+                                              args.concurrency, args.client_processes)
+            baseline = baseline or rate
+            print(f"{workers:>8} {rate:>10.0f} {rate / baseline:>7.2f}x {errors:>8}")
+
+        print(f"\nRate limiter, budget {args.rate_limit} starts/s; most starts in any second:")
+        print(f"{'workers':>8} {'local':>10} {args.backend:>10}")
+        print("-" * 30)
+        for workers in args.workers:
+            rates = []
+            for backend in ("local", args.backend):
+                os.environ.update({**env, "SHARED_STATE_BACKEND": backend})
+                rates.append(measure_rate_limit(f"benchmark-{backend}-{workers}", workers,
+                                                args.rate_limit, min(args.seconds, 3.0)))
+            print(f"{workers:>8} {rates[0]:>10} {rates[1]:>10}")
+
+
+if __name__ == "__main__":
+    main()
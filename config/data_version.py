@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Data version counter for cache invalidation
+Every write path that changes what the read endpoints return (BulkLoader
+batches, rollup rebuilds, columnar mirror refreshes) bumps a counter in the
+data_versions table, in the same transaction as the write. Caches tag
+their entries with the version they were computed at and drop them once
+it moves, so they work across processes: an ingest CLI run invalidates the
+API's cache.
+
+With SHARED_STATE_BACKEND set (config/shared_state.py), the reading is
+published to the shared store for check_seconds, so all workers together
+query the database once per interval instead of once each.
+"""
+
+import os
+import threading
+import time
+from typing import Optional, Tuple
+
+from config.database import db_config, DatabaseConfig
+from config.shared_state import shared_state
+
+TRADE_DATA = 'trade_data'
+
+def bump_data_version(cursor, db_type: str, name: str = TRADE_DATA):
+    """Increment a data version inside the caller's transaction"""
+    placeholder = '%s' if db_type == 'mysql' else '?'
+    cursor.execute(
+        f"UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP "
+        f"WHERE name = {placeholder}",
+        (name,)
+    )
+
+class DataVersion:
+    """
+    Reads a data version, re-checking the database at most every
+    check_seconds (DATA_VERSION_CHECK_SECONDS, default 1) so a busy API
+    does not pay a query per request
+    """
+
+    def __init__(self, db: DatabaseConfig = db_config, name: str = TRADE_DATA,
+                 check_seconds: Optional[float] = None):
+        self.db = db
+        self.name = name
+        self.check_seconds = check_seconds if check_seconds is not None else float(
+            os.getenv('DATA_VERSION_CHECK_SECONDS', '1')
+        )
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.shared = shared_state
+        self._shared_key = f"data_version:{name}"
+
+    def expire(self):
+        """Re-read on next use (for writes made by this process)"""
+        self._checked_at = 0.0
+        if self.shared is not None:
+            try:
+                self.shared.delete(self._shared_key)
+            except Exception as err:
+                self.db.logger.warning(f"Could not expire shared data version {self.name}: {err}")
+
+    def _read_shared(self) -> Optional[Tuple[int, float]]:
+        """(version, seconds since it was read) published by a worker within check_seconds"""
+        try:
+            value = self.shared.get(self._shared_key)
+            if value is None:
+                return None
+            version, read_at = value.decode().split(":")
+            return int(version), max(time.time() - float(read_at), 0.0)
+        except Exception as err:
+            self.db.logger.warning(f"Could not read shared data version {self.name}: {err}")
+            return None
+
+    def _publish(self, version: int):
+        try:
+            self.shared.set(self._shared_key, f"{version}:{time.time()}".encode(), self.check_seconds)
+        except Exception as err:
+            self.db.logger.warning(f"Could not publish data version {self.name}: {err}")
+
+    def _select_sql(self) -> str:
+        placeholder = '%s' if self.db.db_type == 'mysql' else '?'
+        return f"SELECT version FROM data_versions WHERE name = {placeholder}"
+
+    def current(self) -> Optional[int]:
+        """The version, or None when it cannot be read (e.g. schema not migrated)"""
+        if time.monotonic() - self._checked_at < self.check_seconds:
+            return self._version
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.check_seconds:
+                return self._version
+            if self.shared is not None and self.check_seconds > 0:
+                reading = self._read_shared()
+                if reading is not None:
+                    # Counts as checked when that worker checked
+                    self._version, age = reading
+                    self._checked_at = time.monotonic() - age
+                    return self._version
+            try:
+                # Routed like the endpoint reads: a replica's version and its
+                # data were replicated in the same transaction
+                row = self.db.execute_query(self._select_sql(), (self.name,), fetch='one')
+                self._version = row.version if row else None
+                if self._version is not None and self.shared is not None and self.check_seconds > 0:
+                    self._publish(self._version)
+            except Exception as err:
+                self.db.logger.warning(f"Could not read data version {self.name}: {err}")
+                self._version = None
+            self._checked_at = time.monotonic()
+            return self._version
+
+    async def current_async(self) -> Optional[int]:
+        if time.monotonic() - self._checked_at < self.check_seconds:
+            return self._version
+        return await self.db.run_async(self.current)
+
+# Global instance shared by the API caches
+data_version = DataVersion()
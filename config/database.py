@@ -5,12 +5,162 @@ Supports both SQLite (development) and MySQL (production)
 """
 
 import os
+import asyncio
 import mysql.connector
 from mysql.connector import pooling
 import sqlite3
-from typing import Optional, Dict, Any
+import queue
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, Iterator, AsyncIterator, List, Tuple
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import logging
+import weakref
+import contextvars
+import itertools
+from contextlib import ExitStack
+
+from config.query_stats import QueryStats
+from config.rows import RowDecoder
+
+# Statements that only read; anything else is routed to the writer connection
+READ_STATEMENT_PREFIXES = ('SELECT', 'WITH', 'EXPLAIN', 'PRAGMA', 'SHOW', 'DESCRIBE')
+
+def is_read_query(query: str) -> bool:
+    """Return True if the statement is a read-only query"""
+    return query.lstrip().upper().startswith(READ_STATEMENT_PREFIXES)
+
+# Set by DatabaseConfig.read_from_primary(): reads in this context skip the replicas
+_read_from_primary = contextvars.ContextVar('read_from_primary', default=False)
+
+class SQLiteConnectionPool:
+    """Pool of persistent SQLite connections with per-connection pragmas applied once"""
+    
+    def __init__(self, sqlite_config: Dict[str, Any], pool_size: int, pragmas: Dict[str, Any], logger):
+        self.sqlite_config = sqlite_config
+        self.pool_size = pool_size
+        self.pragmas = pragmas
+        self.logger = logger
+        
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+        self._created = 0
+        self._lock = threading.Lock()
+        
+        # Single writer connection: WAL lets readers proceed while it writes
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        
+        # Checkout statistics
+        self._checkouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._writer_checkouts = 0
+        self._writer_total_wait = 0.0
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection and apply the tuning pragmas"""
+        connection = sqlite3.connect(**self.sqlite_config)  # Plain tuples; see config.rows
+        for pragma, value in self.pragmas.items():
+            connection.execute(f"PRAGMA {pragma}={value}")
+        return connection
+    
+    def _acquire_reader(self, timeout: float) -> sqlite3.Connection:
+        """Take an idle connection, opening a new one while under pool_size"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"SQLite pool exhausted: no connection available within {timeout}s (pool_size={self.pool_size})"
+            )
+    
+    @contextmanager
+    def connection(self, write: bool = False):
+        """Check out a reader (or the writer) connection for the duration of the block"""
+        started = time.perf_counter()
+        timeout = self.sqlite_config.get('timeout', 30)
+        
+        if write:
+            if not self._writer_lock.acquire(timeout=timeout):
+                raise sqlite3.OperationalError(f"SQLite writer busy for more than {timeout}s")
+            try:
+                if self._writer is None:
+                    self._writer = self._connect()
+                wait = time.perf_counter() - started
+                self._writer_checkouts += 1
+                self._writer_total_wait += wait
+                yield self._writer
+            finally:
+                if self._writer is not None and self._writer.in_transaction:
+                    self._writer.rollback()
+                self._writer_lock.release()
+            return
+        
+        connection = self._acquire_reader(timeout)
+        wait = time.perf_counter() - started
+        with self._lock:
+            self._checkouts += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+        if wait > 0.1:
+            self.logger.warning(f"Waited {wait * 1000:.0f}ms for a SQLite connection (pool_size={self.pool_size})")
+        
+        try:
+            yield connection
+        finally:
+            if connection.in_transaction:
+                connection.rollback()
+            self._idle.put(connection)
+    
+    def status(self) -> Dict[str, Any]:
+        """Pool size, utilisation and wait-time statistics"""
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                'pool_size': self.pool_size,
+                'open_connections': self._created + (1 if self._writer is not None else 0),
+                'idle_connections': self._idle.qsize(),
+                'checkouts': checkouts,
+                'avg_wait_ms': round(self._total_wait / checkouts * 1000, 3) if checkouts else 0.0,
+                'max_wait_ms': round(self._max_wait * 1000, 3),
+                'writer_checkouts': self._writer_checkouts,
+                'writer_avg_wait_ms': round(self._writer_total_wait / self._writer_checkouts * 1000, 3) if self._writer_checkouts else 0.0,
+                'pragmas': dict(self.pragmas)
+            }
+    
+    def close(self):
+        """Close every idle connection and the writer"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
 
 class DatabaseConfig:
     def __init__(self):
@@ -32,15 +182,68 @@ class DatabaseConfig:
             'sql_mode': 'TRADITIONAL,NO_ZERO_DATE,NO_ZERO_IN_DATE,ERROR_FOR_DIVISION_BY_ZERO'
         }
         
+        # Server-side prepared statements for compiled queries. Resetting the
+        # session on pool checkout deallocates them, so reuse requires keeping
+        # sessions across checkouts (we never change session state).
+        self.mysql_prepared_statements = os.getenv('MYSQL_PREPARED_STATEMENTS', 'true').lower() == 'true'
+        if self.mysql_prepared_statements:
+            self.mysql_config['pool_reset_session'] = False
+        self._prepared_cursors = weakref.WeakKeyDictionary()
+        
         # SQLite Configuration (fallback)
         self.sqlite_config = {
             'database': os.getenv('SQLITE_DATABASE', 'semiconductor_trade.db'),
             'check_same_thread': False,
-            'timeout': 30
+            'timeout': 30,
+            'cached_statements': 256  # Per-connection statement cache, keyed by SQL text
+        }
+        self.sqlite_pool_size = int(os.getenv('SQLITE_POOL_SIZE', '8'))
+        
+        # Applied once per pooled connection. WAL keeps readers from blocking
+        # the ingestion writer (and vice versa).
+        self.sqlite_pragmas = {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+            'cache_size': -int(os.getenv('SQLITE_CACHE_SIZE_KB', str(64 * 1024))),
+            'temp_store': 'MEMORY',
+            'busy_timeout': self.sqlite_config['timeout'] * 1000
         }
         
+        # Worker threads used to run blocking queries off the event loop.
+        # Bounded by the active backend's pool size so async callers queue
+        # here instead of timing out on the connection pool.
+        self.async_workers = int(os.getenv('DB_ASYNC_WORKERS', str(self.pool_size)))
+        
+        # Rows fetched per round trip by stream_query / stream_query_async
+        self.stream_batch_size = int(os.getenv('DB_STREAM_BATCH_SIZE', '1000'))
+        
+        # Read replicas: reads are spread round-robin over the replicas, writes
+        # go to the primary. MySQL replicas share the primary's credentials;
+        # SQLite replicas are database files opened read-only.
+        self.mysql_replica_hosts = [
+            host.strip() for host in os.getenv('MYSQL_REPLICA_HOSTS', '').split(',') if host.strip()
+        ]
+        self.sqlite_replica_databases = [
+            path.strip() for path in os.getenv('SQLITE_REPLICA_DATABASES', '').split(',') if path.strip()
+        ]
+        # After a write, reads stay on the primary for this long so they see
+        # it despite replication lag (0 disables)
+        self.read_your_writes_seconds = float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '0'))
+        
         self._connection_pool = None
+        self._sqlite_pool = None
+        self._replica_pools: Optional[List[Tuple[str, Any]]] = None
+        self._replica_lock = threading.Lock()
+        self._replica_turn = itertools.count()
+        self._last_write_at = 0.0
+        self._routing_stats = {'replica_reads': 0, 'primary_reads': 0, 'replica_fallbacks': 0}
+        self._executor = None
         self._setup_logging()
+        
+        # Per-query timings, latency histograms and the slow-query log
+        # (threshold SLOW_QUERY_MS)
+        self.query_stats = QueryStats(logger=self.logger)
     
     def _setup_logging(self):
         """Set up database logging"""
@@ -59,9 +262,129 @@ class DatabaseConfig:
             self.logger.error(f"Failed to initialize MySQL pool: {err}")
             raise
     
+    def initialize_sqlite_pool(self):
+        """Initialize the persistent SQLite connection pool"""
+        if self._sqlite_pool is not None:
+            return
+        
+        self._sqlite_pool = SQLiteConnectionPool(
+            self.sqlite_config, self.sqlite_pool_size, self.sqlite_pragmas, self.logger
+        )
+        self.logger.info(
+            f"SQLite connection pool initialized: size={self.sqlite_pool_size}, "
+            f"journal_mode={self.sqlite_pragmas['journal_mode']}, synchronous={self.sqlite_pragmas['synchronous']}, "
+            f"mmap_size={self.sqlite_pragmas['mmap_size']}, cache_size={self.sqlite_pragmas['cache_size']}"
+        )
+    
+    def initialize_replica_pools(self):
+        """Create one pool per configured read replica (connections open lazily)"""
+        with self._replica_lock:
+            if self._replica_pools is not None:
+                return
+            
+            pools = []
+            if self.db_type == 'mysql':
+                for index, address in enumerate(self.mysql_replica_hosts):
+                    host, _, port = address.partition(':')
+                    config = {
+                        **self.mysql_config,
+                        'host': host,
+                        'port': int(port or self.mysql_config['port']),
+                        'pool_name': f"{self.mysql_config['pool_name']}_replica_{index}"
+                    }
+                    try:
+                        pools.append((address, pooling.MySQLConnectionPool(**config)))
+                    except mysql.connector.Error as err:
+                        self.logger.error(f"Skipping MySQL replica {address}: {err}")
+            else:
+                # Read-only connections cannot change the journal mode; that is
+                # up to whatever keeps the replica file in sync
+                pragmas = {name: value for name, value in self.sqlite_pragmas.items()
+                           if name not in ('journal_mode', 'synchronous')}
+                for path in self.sqlite_replica_databases:
+                    config = {**self.sqlite_config, 'database': f"file:{path}?mode=ro", 'uri': True}
+                    pools.append((path, SQLiteConnectionPool(config, self.sqlite_pool_size,
+                                                             pragmas, self.logger)))
+            
+            if pools:
+                self.logger.info(f"Read replicas configured: {[name for name, _ in pools]}")
+            self._replica_pools = pools
+    
     @contextmanager
-    def get_connection(self):
-        """Get database connection (context manager)"""
+    def read_from_primary(self):
+        """Send reads in this block (and tasks it awaits) to the primary"""
+        token = _read_from_primary.set(True)
+        try:
+            yield
+        finally:
+            _read_from_primary.reset(token)
+    
+    def _count_route(self, key: str):
+        with self._replica_lock:
+            self._routing_stats[key] += 1
+    
+    def _should_use_replica(self) -> bool:
+        """True when a read may go to a replica"""
+        if self._replica_pools is None:
+            self.initialize_replica_pools()
+        if not self._replica_pools or _read_from_primary.get():
+            return False
+        if self.read_your_writes_seconds > 0:
+            return time.monotonic() - self._last_write_at >= self.read_your_writes_seconds
+        return True
+    
+    @contextmanager
+    def _mysql_pool_connection(self, pool):
+        connection = pool.get_connection()
+        try:
+            yield connection
+        finally:
+            if connection.is_connected():
+                connection.close()
+    
+    def _checkout_replica(self, stack: ExitStack):
+        """Enter a connection from the next healthy replica, or return None"""
+        pools = self._replica_pools
+        start = next(self._replica_turn)
+        for offset in range(len(pools)):
+            name, pool = pools[(start + offset) % len(pools)]
+            try:
+                if self.db_type == 'mysql':
+                    return stack.enter_context(self._mysql_pool_connection(pool))
+                return stack.enter_context(pool.connection())
+            except (mysql.connector.Error, sqlite3.Error) as err:
+                self._count_route('replica_fallbacks')
+                self.logger.warning(f"Read replica {name} unavailable: {err}")
+        return None
+    
+    @contextmanager
+    def get_connection(self, write: bool = False):
+        """Get database connection (context manager)
+        
+        write=True always uses the primary (on SQLite, its dedicated writer
+        connection). Reads go to a read replica when any are configured,
+        unless inside read_from_primary() or the read-your-writes window.
+        """
+        if not write and self._should_use_replica():
+            with ExitStack() as stack:
+                connection = self._checkout_replica(stack)
+                if connection is not None:
+                    self._count_route('replica_reads')
+                    yield connection
+                    return
+        
+        if not write and self._replica_pools:
+            self._count_route('primary_reads')
+        try:
+            with self._get_primary_connection(write) as connection:
+                yield connection
+        finally:
+            if write:
+                self._last_write_at = time.monotonic()
+    
+    @contextmanager
+    def _get_primary_connection(self, write: bool = False):
+        """Check out a connection to the primary database"""
         if self.db_type == 'mysql':
             if not self._connection_pool:
                 self.initialize_mysql_pool()
@@ -80,88 +403,333 @@ class DatabaseConfig:
                     connection.close()
         
         else:  # SQLite fallback
-            connection = None
-            try:
-                connection = sqlite3.connect(**self.sqlite_config)
-                connection.row_factory = sqlite3.Row  # Enable dict-like access
-                yield connection
-            except sqlite3.Error as err:
-                if connection:
+            if not self._sqlite_pool:
+                self.initialize_sqlite_pool()
+            
+            with self._sqlite_pool.connection(write=write) as connection:
+                try:
+                    yield connection
+                except sqlite3.Error as err:
                     connection.rollback()
-                self.logger.error(f"SQLite connection error: {err}")
-                raise
-            finally:
-                if connection:
-                    connection.close()
+                    self.logger.error(f"SQLite connection error: {err}")
+                    raise
     
     def get_cursor(self, connection):
-        """Get cursor with proper configuration"""
+        """Get cursor with proper configuration (tuple rows; execute_query decodes them)"""
         if self.db_type == 'mysql':
-            return connection.cursor(dictionary=True, buffered=True)
+            return connection.cursor(buffered=True)
         else:
             return connection.cursor()
     
-    def execute_query(self, query: str, params: Optional[tuple] = None, fetch: str = 'all'):
-        """Execute query and return results"""
-        with self.get_connection() as conn:
-            cursor = self.get_cursor(conn)
+    def _get_prepared_cursor(self, connection, query: str):
+        """Get the cached MySQL prepared cursor for this connection and statement"""
+        raw_connection = getattr(connection, '_cnx', connection)  # Unwrap pooled connection
+        cursors = self._prepared_cursors.setdefault(raw_connection, {})
+        cursor = cursors.get(query)
+        if cursor is None:
+            cursor = connection.cursor(prepared=True)
+            cursors[query] = cursor
+        return cursor
+    
+    def _evict_prepared_cursor(self, connection, query: str):
+        """Drop a cached prepared cursor so the statement is re-prepared next time"""
+        raw_connection = getattr(connection, '_cnx', connection)
+        cursor = self._prepared_cursors.get(raw_connection, {}).pop(query, None)
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+    
+    def execute_query(self, query: str, params: Optional[tuple] = None, fetch: str = 'all',
+                      prepared: bool = False):
+        """Execute query and return results
+        
+        Rows are config.rows.Row objects, the same on SQLite and MySQL: read
+        them by position, column name or attribute. DECIMAL values arrive
+        as float.
+        
+        prepared=True reuses a server-side prepared statement on MySQL; use it
+        for SQL compiled by config.query_builder, whose text is stable.
+        """
+        use_prepared = prepared and self.db_type == 'mysql' and self.mysql_prepared_statements
+        
+        requested = time.perf_counter()
+        with self.get_connection(write=not is_read_query(query)) as conn:
+            started = time.perf_counter()
+            if use_prepared:
+                cursor = self._get_prepared_cursor(conn, query)
+            else:
+                cursor = self.get_cursor(conn)
+            result = None
+            failed = False
             try:
                 cursor.execute(query, params or ())
+                decoder = RowDecoder(cursor.description) if cursor.description else None
                 
-                if fetch == 'all':
-                    result = cursor.fetchall()
+                if use_prepared:
+                    # Prepared cursors are unbuffered: drain before the cursor is reused
+                    rows = cursor.fetchall() if cursor.with_rows else []
+                    if fetch == 'all':
+                        result = decoder.decode(rows) if decoder else rows
+                    elif fetch == 'one':
+                        result = decoder.decode_one(rows[0]) if rows else None
+                    elif fetch == 'none':
+                        result = None
+                    else:
+                        result = decoder.decode(rows[:fetch]) if decoder else rows[:fetch]
+                elif fetch == 'all':
+                    result = decoder.decode(cursor.fetchall()) if decoder else []
                 elif fetch == 'one':
-                    result = cursor.fetchone()
+                    result = decoder.decode_one(cursor.fetchone()) if decoder else None
                 elif fetch == 'none':
                     result = None
                 else:
-                    result = cursor.fetchmany(fetch)
+                    result = decoder.decode(cursor.fetchmany(fetch)) if decoder else []
                 
                 conn.commit()
                 return result
             
             except Exception as err:
+                failed = True
                 conn.rollback()
+                if use_prepared:
+                    self._evict_prepared_cursor(conn, query)
                 self.logger.error(f"Query execution error: {err}")
                 raise
             finally:
-                cursor.close()
+                if isinstance(result, list):
+                    row_count = len(result)
+                elif result is not None:
+                    row_count = 1
+                else:
+                    row_count = max(cursor.rowcount or 0, 0)
+                if not use_prepared:
+                    cursor.close()
+                self.query_stats.record(
+                    query, (time.perf_counter() - started) * 1000, row_count,
+                    (started - requested) * 1000, failed
+                )
     
-    def execute_many(self, query: str, data: list):
-        """Execute query with multiple parameter sets"""
-        with self.get_connection() as conn:
+    def execute_many(self, query: str, data: list, chunk_size: Optional[int] = None):
+        """Execute query with multiple parameter sets
+        
+        With chunk_size, parameter sets are sent in chunks that each commit
+        in their own transaction.
+        """
+        if chunk_size:
+            total = 0
+            for start in range(0, len(data), chunk_size):
+                total += self.execute_many(query, data[start:start + chunk_size])
+            return total
+        
+        requested = time.perf_counter()
+        with self.get_connection(write=True) as conn:
+            started = time.perf_counter()
             cursor = self.get_cursor(conn)
+            failed = False
             try:
                 cursor.executemany(query, data)
                 conn.commit()
                 return cursor.rowcount
             except Exception as err:
+                failed = True
                 conn.rollback()
                 self.logger.error(f"Bulk query execution error: {err}")
                 raise
             finally:
+                row_count = max(cursor.rowcount or 0, 0)
                 cursor.close()
+                self.query_stats.record(
+                    query, (time.perf_counter() - started) * 1000, row_count,
+                    (started - requested) * 1000, failed
+                )
+    
+    @contextmanager
+    def transaction(self):
+        """Run several statements on the writer in one transaction (yields a cursor)"""
+        with self.get_connection(write=True) as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+                conn.commit()
+            except Exception as err:
+                conn.rollback()
+                self.logger.error(f"Transaction rolled back: {err}")
+                raise
+            finally:
+                cursor.close()
+    
+    def get_streaming_cursor(self, connection):
+        """Cursor that fetches rows from the server as they are read (MySQL: unbuffered)"""
+        if self.db_type == 'mysql':
+            return connection.cursor(buffered=False)
+        else:
+            return connection.cursor()  # sqlite3 cursors step through results lazily
+
+    def stream_batches(self, query: str, params: Optional[tuple] = None,
+                       batch_size: Optional[int] = None) -> Iterator[list]:
+        """Yield the result of a read query in lists of at most batch_size rows
+
+        The connection stays checked out until the generator is exhausted or
+        closed; close it (or use it in a for loop) to return the connection.
+        """
+        batch_size = batch_size or self.stream_batch_size
+
+        requested = time.perf_counter()
+        with self.get_connection() as conn:
+            started = time.perf_counter()
+            cursor = self.get_streaming_cursor(conn)
+            # Time spent in execute/fetch only, not while the consumer holds a batch
+            busy = 0.0
+            row_count = 0
+            failed = True
+            try:
+                cursor.execute(query, params or ())
+                decoder = RowDecoder(cursor.description)
+                busy = time.perf_counter() - started
+                while True:
+                    fetch_started = time.perf_counter()
+                    rows = decoder.decode(cursor.fetchmany(batch_size))
+                    busy += time.perf_counter() - fetch_started
+                    if not rows:
+                        break
+                    row_count += len(rows)
+                    yield rows
+                failed = False
+            except GeneratorExit:
+                failed = False  # Closed early by the consumer
+                raise
+            finally:
+                self.query_stats.record(query, busy * 1000, row_count, (started - requested) * 1000, failed)
+                if self.db_type == 'mysql' and conn.unread_result:
+                    # Abandoned early: the rest of the result must be read
+                    # off the wire before the connection can be reused
+                    conn.consume_results()
+                cursor.close()
+                conn.rollback()  # End the read snapshot
+
+    def stream_query(self, query: str, params: Optional[tuple] = None,
+                     batch_size: Optional[int] = None) -> Iterator[Any]:
+        """Iterate over the rows of a read query without materializing the result
+
+        Memory use is bounded by batch_size (DB_STREAM_BATCH_SIZE) regardless
+        of how many rows the query returns.
+        """
+        batches = self.stream_batches(query, params, batch_size)
+        try:
+            for rows in batches:
+                yield from rows
+        finally:
+            batches.close()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get (lazily create) the bounded thread pool for async access"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.async_workers,
+                thread_name_prefix='db-worker'
+            )
+        return self._executor
+    
+    async def run_async(self, func: Callable, *args, **kwargs):
+        """Run a blocking database call on the worker pool and await its result"""
+        loop = asyncio.get_running_loop()
+        # Carry context variables (e.g. read_from_primary) into the worker thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._get_executor(), partial(context.run, func, *args, **kwargs))
+    
+    async def execute_query_async(self, query: str, params: Optional[tuple] = None, fetch: str = 'all',
+                                  prepared: bool = False):
+        """Async variant of execute_query that does not block the event loop"""
+        return await self.run_async(self.execute_query, query, params, fetch, prepared)
+    
+    async def execute_many_async(self, query: str, data: list, chunk_size: Optional[int] = None):
+        """Async variant of execute_many that does not block the event loop"""
+        return await self.run_async(self.execute_many, query, data, chunk_size)
+    
+    async def stream_batches_async(self, query: str, params: Optional[tuple] = None,
+                                   batch_size: Optional[int] = None) -> AsyncIterator[list]:
+        """Async iterator over the result of a read query in lists of at most batch_size rows
+
+        Each batch is fetched on the worker pool, so the event loop never
+        blocks and at most one batch is held in memory at a time.
+        """
+        batches = self.stream_batches(query, params, batch_size)
+        try:
+            while True:
+                rows = await self.run_async(next, batches, None)
+                if rows is None:
+                    break
+                yield rows
+        finally:
+            await self.run_async(batches.close)
+
+    async def stream_query_async(self, query: str, params: Optional[tuple] = None,
+                                 batch_size: Optional[int] = None) -> AsyncIterator[Any]:
+        """Async iterator over the rows of a read query (see stream_batches_async)"""
+        async for rows in self.stream_batches_async(query, params, batch_size):
+            for row in rows:
+                yield row
+
+    async def test_connection_async(self) -> Dict[str, Any]:
+        """Async variant of test_connection"""
+        return await self.run_async(self.test_connection)
+    
+    @property
+    def pool_size(self) -> int:
+        """Connections in the active backend's pool"""
+        return self.mysql_config['pool_size'] if self.db_type == 'mysql' else self.sqlite_pool_size
+    
+    def pool_status(self) -> Dict[str, Any]:
+        """Connection pool configuration and usage statistics"""
+        if self.db_type == 'mysql':
+            return {
+                'pool_name': self.mysql_config['pool_name'],
+                'pool_size': self.mysql_config['pool_size'],
+                'initialized': self._connection_pool is not None,
+                **self.replica_status()
+            }
+        
+        if not self._sqlite_pool:
+            status = {'pool_size': self.sqlite_pool_size, 'initialized': False}
+        else:
+            status = {'initialized': True, **self._sqlite_pool.status()}
+        return {**status, **self.replica_status()}
+    
+    def replica_status(self) -> Dict[str, Any]:
+        """Configured read replicas and how reads have been routed"""
+        if not self._replica_pools:
+            return {}
+        replicas = []
+        for name, pool in self._replica_pools:
+            if self.db_type == 'mysql':
+                replicas.append({'host': name, 'pool_name': pool.pool_name, 'pool_size': pool.pool_size})
+            else:
+                replicas.append({'database': name, **pool.status()})
+        with self._replica_lock:
+            routing = dict(self._routing_stats)
+        return {
+            'replicas': replicas,
+            'routing': {**routing, 'read_your_writes_seconds': self.read_your_writes_seconds}
+        }
     
     def test_connection(self) -> Dict[str, Any]:
         """Test database connection and return status"""
         try:
-            with self.get_connection() as conn:
-                cursor = self.get_cursor(conn)
-                
-                if self.db_type == 'mysql':
-                    cursor.execute("SELECT VERSION() as version, NOW() as timestamp")
-                else:
-                    cursor.execute("SELECT sqlite_version() as version, datetime('now') as timestamp")
-                
-                result = cursor.fetchone()
-                cursor.close()
-                
-                return {
-                    'status': 'connected',
-                    'database_type': self.db_type,
-                    'version': result['version'] if self.db_type == 'mysql' else result['version'],
-                    'timestamp': result['timestamp']
-                }
+            if self.db_type == 'mysql':
+                result = self.execute_query("SELECT VERSION() as version, NOW() as timestamp", fetch='one')
+            else:
+                result = self.execute_query(
+                    "SELECT sqlite_version() as version, datetime('now') as timestamp", fetch='one'
+                )
+            
+            return {
+                'status': 'connected',
+                'database_type': self.db_type,
+                'version': result.version,
+                'timestamp': result.timestamp
+            }
         
         except Exception as err:
             return {
@@ -0,0 +1,604 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for SQLite and MySQL
+Creates and upgrades the trade tables, and checks with EXPLAIN that the hot
+endpoint queries are served by indexes rather than full table scans.
+
+Usage:
+    python -m config.migrations            # apply pending migrations
+    python -m config.migrations --explain  # apply, then report query plans
+"""
+
+import re
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple
+
+from config.database import db_config, DatabaseConfig
+from config.shared_state import exclusive
+from config.queries import (
+    TRADE_SERIES_QUERY, GLOBE_TRADE_FLOWS_QUERY, CENSUS_FLOWS_QUERY,
+    LATEST_PERIOD_QUERY, anomaly_totals_query
+)
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    sqlite: List[str] = field(default_factory=list)
+    mysql: List[str] = field(default_factory=list)
+    # Tables the migration moves rows into instead of deleting them
+    quarantine: Tuple[str, ...] = ()
+
+    def statements(self, db_type: str) -> List[str]:
+        return self.mysql if db_type == 'mysql' else self.sqlite
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        version=1,
+        description="Create core trade tables",
+        sqlite=[
+            """
+            CREATE TABLE IF NOT EXISTS countries (
+                iso3 TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                iso2 TEXT,
+                m49_code INTEGER
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS hs_codes (
+                hs6 TEXT PRIMARY KEY,
+                description TEXT NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS trade_flows (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                period TEXT NOT NULL,
+                reporter_iso TEXT NOT NULL REFERENCES countries(iso3),
+                partner_iso TEXT NOT NULL REFERENCES countries(iso3),
+                hs6 TEXT NOT NULL REFERENCES hs_codes(hs6),
+                flow TEXT NOT NULL DEFAULT 'X',
+                value_usd REAL NOT NULL DEFAULT 0,
+                quantity REAL,
+                unit TEXT,
+                source TEXT NOT NULL DEFAULT 'comtrade',
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS census_trade_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                period TEXT NOT NULL,
+                partner_name TEXT NOT NULL,
+                hs_code TEXT NOT NULL,
+                commodity_description TEXT,
+                trade_value_usd REAL NOT NULL DEFAULT 0,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+        ],
+        mysql=[
+            """
+            CREATE TABLE IF NOT EXISTS countries (
+                iso3 CHAR(3) NOT NULL PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                iso2 CHAR(2) NULL,
+                m49_code SMALLINT UNSIGNED NULL
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS hs_codes (
+                hs6 VARCHAR(6) NOT NULL PRIMARY KEY,
+                description VARCHAR(255) NOT NULL
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS trade_flows (
+                id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                period VARCHAR(7) NOT NULL,
+                reporter_iso CHAR(3) NOT NULL,
+                partner_iso CHAR(3) NOT NULL,
+                hs6 VARCHAR(6) NOT NULL,
+                flow CHAR(1) NOT NULL DEFAULT 'X',
+                value_usd DECIMAL(20, 2) NOT NULL DEFAULT 0,
+                quantity DECIMAL(20, 2) NULL,
+                unit VARCHAR(16) NULL,
+                source VARCHAR(32) NOT NULL DEFAULT 'comtrade',
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS census_trade_cache (
+                id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                period VARCHAR(7) NOT NULL,
+                partner_name VARCHAR(100) NOT NULL,
+                hs_code VARCHAR(10) NOT NULL,
+                commodity_description VARCHAR(255) NULL,
+                trade_value_usd DECIMAL(20, 2) NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """,
+        ]
+    ),
+    Migration(
+        version=2,
+        description="Covering indexes for /v2/series, /v2/anomalies and globe trade flows",
+        sqlite=[
+            # /v2/series: ORDER BY period DESC, value_usd DESC plus period range filters
+            "CREATE INDEX IF NOT EXISTS idx_tf_period_value ON trade_flows "
+            "(period, value_usd, reporter_iso, partner_iso, hs6, quantity, unit)",
+            # Globe: value_usd >= ? AND period >= ? ORDER BY value_usd DESC
+            "CREATE INDEX IF NOT EXISTS idx_tf_value_period ON trade_flows "
+            "(value_usd, period, reporter_iso, partner_iso, hs6)",
+            # /v2/anomalies and /v2/stats: GROUP BY period, commodity, route
+            "CREATE INDEX IF NOT EXISTS idx_tf_period_hs6_route ON trade_flows "
+            "(period, hs6, reporter_iso, partner_iso, value_usd)",
+            "CREATE INDEX IF NOT EXISTS idx_census_value ON census_trade_cache "
+            "(trade_value_usd, partner_name, hs_code, commodity_description, period)",
+        ],
+        mysql=[
+            "CREATE INDEX idx_tf_period_value ON trade_flows "
+            "(period, value_usd, reporter_iso, partner_iso, hs6, quantity, unit)",
+            "CREATE INDEX idx_tf_value_period ON trade_flows "
+            "(value_usd, period, reporter_iso, partner_iso, hs6)",
+            "CREATE INDEX idx_tf_period_hs6_route ON trade_flows "
+            "(period, hs6, reporter_iso, partner_iso, value_usd)",
+            "CREATE INDEX idx_census_value ON census_trade_cache "
+            "(trade_value_usd, partner_name, hs_code, commodity_description, period)",
+        ]
+    ),
+    Migration(
+        version=3,
+        description="Natural-key unique indexes for idempotent bulk upserts",
+        # The natural key is ordered (period, hs6, route) so it also serves the
+        # anomaly GROUP BY, replacing idx_tf_period_hs6_route. The globe query's
+        # period filter is served by idx_tf_period_value, so idx_tf_value_period
+        # is dropped too: each extra index costs bulk-ingest throughput.
+        #
+        # Rows that repeat a natural key must go before the unique index can
+        # be created. The newest row (highest id, the last one loaded) stays;
+        # the older ones are moved to trade_flows_duplicates and
+        # census_trade_cache_duplicates, not deleted, and apply_migrations
+        # logs how many. To keep an older row instead, swap it back by id.
+        # Keys with a NULL column never compare equal, so those rows are left
+        # alone (the unique index allows them too).
+        quarantine=("trade_flows_duplicates", "census_trade_cache_duplicates"),
+        sqlite=[
+            "CREATE TABLE IF NOT EXISTS trade_flows_duplicates AS SELECT * FROM trade_flows WHERE 0",
+            """
+            INSERT INTO trade_flows_duplicates
+            SELECT tf.* FROM trade_flows tf
+            JOIN (
+                SELECT period, reporter_iso, partner_iso, hs6, flow, MAX(id) AS keep_id
+                FROM trade_flows
+                GROUP BY period, reporter_iso, partner_iso, hs6, flow
+                HAVING COUNT(*) > 1
+            ) dup ON tf.period = dup.period AND tf.reporter_iso = dup.reporter_iso
+                 AND tf.partner_iso = dup.partner_iso AND tf.hs6 = dup.hs6
+                 AND tf.flow = dup.flow AND tf.id < dup.keep_id
+            """,
+            "DELETE FROM trade_flows WHERE id IN (SELECT id FROM trade_flows_duplicates)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_tf_natural_key ON trade_flows "
+            "(period, hs6, reporter_iso, partner_iso, flow)",
+            "DROP INDEX IF EXISTS idx_tf_period_hs6_route",
+            "DROP INDEX IF EXISTS idx_tf_value_period",
+            "CREATE TABLE IF NOT EXISTS census_trade_cache_duplicates AS "
+            "SELECT * FROM census_trade_cache WHERE 0",
+            """
+            INSERT INTO census_trade_cache_duplicates
+            SELECT c.* FROM census_trade_cache c
+            JOIN (
+                SELECT period, partner_name, hs_code, MAX(id) AS keep_id
+                FROM census_trade_cache
+                GROUP BY period, partner_name, hs_code
+                HAVING COUNT(*) > 1
+            ) dup ON c.period = dup.period AND c.partner_name = dup.partner_name
+                 AND c.hs_code = dup.hs_code AND c.id < dup.keep_id
+            """,
+            "DELETE FROM census_trade_cache WHERE id IN (SELECT id FROM census_trade_cache_duplicates)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_census_natural_key ON census_trade_cache "
+            "(period, partner_name, hs_code)",
+        ],
+        mysql=[
+            "CREATE TABLE IF NOT EXISTS trade_flows_duplicates LIKE trade_flows",
+            """
+            INSERT INTO trade_flows_duplicates
+            SELECT tf.* FROM trade_flows tf
+            JOIN (
+                SELECT period, reporter_iso, partner_iso, hs6, flow, MAX(id) AS keep_id
+                FROM trade_flows
+                GROUP BY period, reporter_iso, partner_iso, hs6, flow
+                HAVING COUNT(*) > 1
+            ) dup ON tf.period = dup.period AND tf.reporter_iso = dup.reporter_iso
+                 AND tf.partner_iso = dup.partner_iso AND tf.hs6 = dup.hs6
+                 AND tf.flow = dup.flow AND tf.id < dup.keep_id
+            """,
+            "DELETE tf FROM trade_flows tf JOIN trade_flows_duplicates d ON d.id = tf.id",
+            "CREATE UNIQUE INDEX uq_tf_natural_key ON trade_flows "
+            "(period, hs6, reporter_iso, partner_iso, flow)",
+            "DROP INDEX idx_tf_period_hs6_route ON trade_flows",
+            "DROP INDEX idx_tf_value_period ON trade_flows",
+            "CREATE TABLE IF NOT EXISTS census_trade_cache_duplicates LIKE census_trade_cache",
+            """
+            INSERT INTO census_trade_cache_duplicates
+            SELECT c.* FROM census_trade_cache c
+            JOIN (
+                SELECT period, partner_name, hs_code, MAX(id) AS keep_id
+                FROM census_trade_cache
+                GROUP BY period, partner_name, hs_code
+                HAVING COUNT(*) > 1
+            ) dup ON c.period = dup.period AND c.partner_name = dup.partner_name
+                 AND c.hs_code = dup.hs_code AND c.id < dup.keep_id
+            """,
+            "DELETE c FROM census_trade_cache c JOIN census_trade_cache_duplicates d ON d.id = c.id",
+            "CREATE UNIQUE INDEX uq_census_natural_key ON census_trade_cache "
+            "(period, partner_name, hs_code)",
+        ]
+    ),
+    Migration(
+        version=4,
+        description="Rollup tables for /v2/anomalies and /v2/stats",
+        # Kept current by BulkLoader (src/ingest/rollups.py); backfilled here
+        sqlite=[
+            """
+            CREATE TABLE IF NOT EXISTS trade_flow_rollups (
+                period TEXT NOT NULL,
+                hs6 TEXT NOT NULL,
+                reporter_iso TEXT NOT NULL,
+                partner_iso TEXT NOT NULL,
+                total_value REAL NOT NULL DEFAULT 0,
+                record_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (period, hs6, reporter_iso, partner_iso)
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS commodity_rollups (
+                hs6 TEXT PRIMARY KEY,
+                total_value REAL NOT NULL DEFAULT 0,
+                record_count INTEGER NOT NULL DEFAULT 0,
+                latest_period TEXT
+            )
+            """,
+            """
+            INSERT INTO trade_flow_rollups (period, hs6, reporter_iso, partner_iso, total_value, record_count)
+            SELECT period, hs6, reporter_iso, partner_iso, SUM(value_usd), COUNT(*)
+            FROM trade_flows
+            GROUP BY period, hs6, reporter_iso, partner_iso
+            """,
+            """
+            INSERT INTO commodity_rollups (hs6, total_value, record_count, latest_period)
+            SELECT hs6, SUM(total_value), SUM(record_count), MAX(period)
+            FROM trade_flow_rollups
+            GROUP BY hs6
+            """,
+        ],
+        mysql=[
+            """
+            CREATE TABLE IF NOT EXISTS trade_flow_rollups (
+                period VARCHAR(7) NOT NULL,
+                hs6 VARCHAR(6) NOT NULL,
+                reporter_iso CHAR(3) NOT NULL,
+                partner_iso CHAR(3) NOT NULL,
+                total_value DECIMAL(24, 2) NOT NULL DEFAULT 0,
+                record_count INT UNSIGNED NOT NULL DEFAULT 0,
+                PRIMARY KEY (period, hs6, reporter_iso, partner_iso)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS commodity_rollups (
+                hs6 VARCHAR(6) NOT NULL PRIMARY KEY,
+                total_value DECIMAL(24, 2) NOT NULL DEFAULT 0,
+                record_count BIGINT UNSIGNED NOT NULL DEFAULT 0,
+                latest_period VARCHAR(7) NULL
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """,
+            """
+            INSERT INTO trade_flow_rollups (period, hs6, reporter_iso, partner_iso, total_value, record_count)
+            SELECT period, hs6, reporter_iso, partner_iso, SUM(value_usd), COUNT(*)
+            FROM trade_flows
+            GROUP BY period, hs6, reporter_iso, partner_iso
+            """,
+            """
+            INSERT INTO commodity_rollups (hs6, total_value, record_count, latest_period)
+            SELECT hs6, SUM(total_value), SUM(record_count), MAX(period)
+            FROM trade_flow_rollups
+            GROUP BY hs6
+            """,
+        ]
+    ),
+    Migration(
+        version=5,
+        description="Keyset pagination index for /v2/series",
+        # Same covering columns as idx_tf_period_value with id right after the
+        # sort columns, so (period, value_usd, id) < (...) is an index seek
+        sqlite=[
+            "CREATE INDEX IF NOT EXISTS idx_tf_series_keyset ON trade_flows "
+            "(period, value_usd, id, reporter_iso, partner_iso, hs6, quantity, unit)",
+            "DROP INDEX IF EXISTS idx_tf_period_value",
+        ],
+        mysql=[
+            "CREATE INDEX idx_tf_series_keyset ON trade_flows "
+            "(period, value_usd, id, reporter_iso, partner_iso, hs6, quantity, unit)",
+            "DROP INDEX idx_tf_period_value ON trade_flows",
+        ]
+    ),
+    Migration(
+        version=6,
+        description="Partition trade_flows by period (opt-in, see config/partitioning.py)",
+        # Partitioning rebuilds the table and changes its primary key, so it
+        # is not applied with the other migrations: run
+        # `python -m config.partitioning --enable` on MySQL to turn it on.
+        sqlite=[],
+        mysql=[]
+    ),
+    Migration(
+        version=7,
+        description="Data version counters for response cache invalidation",
+        # Bumped by every ingest batch (config/data_version.py)
+        sqlite=[
+            """
+            CREATE TABLE IF NOT EXISTS data_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            "INSERT OR IGNORE INTO data_versions (name, version) VALUES ('trade_data', 0)",
+        ],
+        mysql=[
+            """
+            CREATE TABLE IF NOT EXISTS data_versions (
+                name VARCHAR(64) NOT NULL PRIMARY KEY,
+                version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB
+            """,
+            "INSERT IGNORE INTO data_versions (name, version) VALUES ('trade_data', 0)",
+        ]
+    ),
+    Migration(
+        version=8,
+        description="Per-period, per-source stats rollup for /v2/stats",
+        # Replaces commodity_rollups: /v2/stats reads every total and
+        # breakdown from this one table in a single statement, and its size
+        # is periods x HS codes x sources, independent of trade_flows
+        sqlite=[
+            """
+            CREATE TABLE IF NOT EXISTS stats_rollups (
+                period TEXT NOT NULL,
+                hs6 TEXT NOT NULL,
+                source TEXT NOT NULL,
+                total_value REAL NOT NULL DEFAULT 0,
+                record_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (period, hs6, source)
+            ) WITHOUT ROWID
+            """,
+            """
+            INSERT INTO stats_rollups (period, hs6, source, total_value, record_count)
+            SELECT period, hs6, source, SUM(value_usd), COUNT(*)
+            FROM trade_flows
+            GROUP BY period, hs6, source
+            """,
+            "DROP TABLE IF EXISTS commodity_rollups",
+        ],
+        mysql=[
+            """
+            CREATE TABLE IF NOT EXISTS stats_rollups (
+                period VARCHAR(7) NOT NULL,
+                hs6 VARCHAR(6) NOT NULL,
+                source VARCHAR(32) NOT NULL,
+                total_value DECIMAL(24, 2) NOT NULL DEFAULT 0,
+                record_count BIGINT UNSIGNED NOT NULL DEFAULT 0,
+                PRIMARY KEY (period, hs6, source)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """,
+            """
+            INSERT INTO stats_rollups (period, hs6, source, total_value, record_count)
+            SELECT period, hs6, source, SUM(value_usd), COUNT(*)
+            FROM trade_flows
+            GROUP BY period, hs6, source
+            """,
+            "DROP TABLE IF EXISTS commodity_rollups",
+        ]
+    ),
+]
+
+SCHEMA_TABLE_SQL = {
+    'sqlite': """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """,
+    'mysql': """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT NOT NULL PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at DATETIME NOT NULL
+        ) ENGINE=InnoDB
+    """,
+}
+
+def current_version(connection, db_type: str) -> int:
+    """Highest applied migration version (0 for an unmanaged database)"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(SCHEMA_TABLE_SQL[db_type])
+        cursor.execute("SELECT MAX(version) FROM schema_migrations")
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    connection.commit()
+    return row[0] or 0
+
+def migrate_connection(connection, db_type: str, target: Optional[int] = None) -> List[int]:
+    """
+    Apply pending migrations on an open DB-API connection
+
+    Each migration runs in its own transaction on SQLite. MySQL commits DDL
+    implicitly, so there a failed migration is reported and not recorded.
+
+    Returns:
+        List of versions applied
+    """
+    applied = []
+    version = current_version(connection, db_type)
+    placeholder = '%s' if db_type == 'mysql' else '?'
+
+    for migration in MIGRATIONS:
+        if migration.version <= version or (target is not None and migration.version > target):
+            continue
+
+        cursor = connection.cursor()
+        try:
+            if db_type == 'sqlite':
+                cursor.execute("BEGIN")
+            for statement in migration.statements(db_type):
+                cursor.execute(statement)
+            cursor.execute(
+                f"INSERT INTO schema_migrations (version, description, applied_at) "
+                f"VALUES ({placeholder}, {placeholder}, {placeholder})",
+                (migration.version, migration.description, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            connection.commit()
+            applied.append(migration.version)
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    return applied
+
+def apply_migrations(db: DatabaseConfig = db_config, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations to the configured database"""
+    # Workers starting together would otherwise race to apply the same migration
+    with exclusive("schema_migrations"), db.get_connection(write=True) as connection:
+        applied = migrate_connection(connection, db.db_type, target)
+
+    if applied:
+        db.logger.info(f"Applied schema migrations: {applied}")
+    for migration in MIGRATIONS:
+        if migration.version not in applied:
+            continue
+        for table in migration.quarantine:
+            moved = db.execute_query(f"SELECT COUNT(*) FROM {table}", fetch='one')[0]
+            if moved:
+                db.logger.warning(f"Migration {migration.version} moved {moved} duplicate rows to {table}")
+    return applied
+
+# Hot endpoint queries checked by explain_hot_queries():
+# name -> (sql, params, fact table aliases, rollup table aliases)
+# Fact tables must be reached through an index. Rollups hold one row per
+# group and aggregate endpoints read them whole, so for those the check is
+# that the read follows the primary key with no sort or temporary table.
+def hot_queries(db_type: str) -> Dict[str, Tuple[str, tuple, Tuple[str, ...], Tuple[str, ...]]]:
+    series_sql, series_params = TRADE_SERIES_QUERY.build(db_type, start_period="2020", limit=100)
+    page_sql, page_params = TRADE_SERIES_QUERY.build(
+        db_type, after=("2023-06", 1e9, 1000000), after_period="2023-06", limit=100
+    )
+    filtered_sql, filtered_params = TRADE_SERIES_QUERY.build(
+        db_type, hs6=["854232"], reporter_iso=["KOR", "TWN"], limit=100
+    )
+    globe_sql, globe_params = GLOBE_TRADE_FLOWS_QUERY.build(db_type, min_value_usd=100000000, since_period="2023")
+    census_sql, census_params = CENSUS_FLOWS_QUERY.build(db_type, min_value_usd=500000000)
+    return {
+        "/v2/series": (series_sql, series_params, ("tf",), ()),
+        "/v2/series (next page)": (page_sql, page_params, ("tf",), ()),
+        "/v2/series (filtered)": (filtered_sql, filtered_params, ("tf",), ()),
+        # Walks trade_flow_rollups in PRIMARY KEY (period, hs6, ...) order
+        "/v2/anomalies": (anomaly_totals_query(db_type), (), (), ("r", "trade_flow_rollups")),
+        "globe latest period": (LATEST_PERIOD_QUERY, (), ("trade_flows",), ()),
+        "get_trade_flows_for_globe": (globe_sql, globe_params, ("tf",), ()),
+        "census flows": (census_sql, census_params, ("census_trade_cache",), ()),
+    }
+
+def explain_query(connection, db_type: str, sql: str, params: tuple,
+                  fact_tables: Tuple[str, ...],
+                  rollup_tables: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    """
+    EXPLAIN a query and flag full scans of the fact tables, and rollup
+    reads that are missing from the plan or need a sort or temporary table
+
+    SQLite: a "SCAN <table>" step without an index is a full table scan;
+    "USE TEMP B-TREE" is a sort or grouping step.
+    MySQL: access type ALL is a full table scan; "Using temporary" or
+    "Using filesort" in Extra is a sort or grouping step.
+    """
+    cursor = connection.cursor()
+    try:
+        if db_type == 'mysql':
+            cursor.execute(f"EXPLAIN {sql}", params)
+            columns = [column[0] for column in cursor.description]
+            plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            full_scans = [
+                step['table'] for step in plan
+                if step.get('table') in fact_tables and step.get('type') == 'ALL'
+            ]
+            sorts = [
+                f"{step.get('table')}: {step.get('Extra')}" for step in plan
+                if rollup_tables and re.search(r"Using (temporary|filesort)", step.get('Extra') or '')
+            ]
+            rollup_read = any(step.get('table') in rollup_tables for step in plan)
+            steps = [
+                f"{step.get('table')}: type={step.get('type')} key={step.get('key')} "
+                f"partitions={step.get('partitions')}"
+                for step in plan
+            ]
+        else:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            steps = [row[3] for row in cursor.fetchall()]
+            full_scans = []
+            rollup_read = False
+            for detail in steps:
+                match = re.match(r"(SCAN|SEARCH) (?:TABLE )?(\w+)", detail)
+                if not match:
+                    continue
+                access, table = match.groups()
+                if access == "SCAN" and table in fact_tables and "INDEX" not in detail:
+                    full_scans.append(table)
+                rollup_read = rollup_read or table in rollup_tables
+            sorts = [detail for detail in steps if rollup_tables and "USE TEMP B-TREE" in detail]
+    finally:
+        cursor.close()
+
+    missing_rollups = list(rollup_tables[:1]) if rollup_tables and not rollup_read else []
+    return {"plan": steps, "full_scans": full_scans, "sorts": sorts, "missing_rollups": missing_rollups,
+            "uses_index": not full_scans and not sorts and not missing_rollups}
+
+def explain_hot_queries(db: DatabaseConfig = db_config) -> Dict[str, Dict[str, Any]]:
+    """EXPLAIN every hot endpoint query against the configured database"""
+    report = {}
+    with db.get_connection() as connection:
+        for name, (sql, params, fact_tables, rollup_tables) in hot_queries(db.db_type).items():
+            report[name] = explain_query(connection, db.db_type, sql, params, fact_tables, rollup_tables)
+    return report
+
+if __name__ == "__main__":
+    applied = apply_migrations()
+    print(f"Applied migrations: {applied or 'none (schema up to date)'}")
+
+    if "--explain" in sys.argv:
+        print("\n" + "="*60)
+        print("HOT QUERY PLANS")
+        print("="*60)
+        all_indexed = True
+        for name, result in explain_hot_queries().items():
+            if result["full_scans"]:
+                status = f"✗ FULL SCAN of {', '.join(result['full_scans'])}"
+            elif result["missing_rollups"]:
+                status = f"✗ NO READ of {', '.join(result['missing_rollups'])}"
+            elif result["sorts"]:
+                status = f"✗ SORT in {'; '.join(result['sorts'])}"
+            else:
+                status = "✓ index"
+            print(f"{name:<28} {status}")
+            for step in result["plan"]:
+                print(f"    {step}")
+            all_indexed = all_indexed and result["uses_index"]
+        print("="*60)
+        sys.exit(0 if all_indexed else 1)
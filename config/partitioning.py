@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+RANGE partitioning of trade_flows by period (MySQL)
+trade_flows is partitioned with RANGE COLUMNS(period): one partition per
+year, one for everything older and a MAXVALUE catch-all, `pfuture`. Period
+strings compare lexically, so '2024', '2024-01' ... '2024-12' all fall in
+p2024 (< '2025'). After each ingest, BulkLoader splits yearly partitions
+for newly seen years out of pfuture.
+
+Partitioning is opt-in: it rebuilds trade_flows and widens its primary key
+to (id, period), so the migrations leave the table alone and an operator
+turns it on with --enable. The DDL, the REORGANIZE on ingest and the pruning
+check have not yet been run against a MySQL server (the MySQL test needs
+TEST_MYSQL=1); try them on a copy of the data first.
+
+Pruning only happens for predicates directly on period (=, <, <=, >, >=,
+BETWEEN, IN); the check below EXPLAINs the period-filtered hot queries and
+fails if any of them still reads every partition. SQLite has no
+partitioning, so everything here is a no-op there.
+
+Usage:
+    python -m config.partitioning            # list partitions
+    python -m config.partitioning --enable   # partition trade_flows
+    python -m config.partitioning --check    # verify pruning with EXPLAIN
+"""
+
+import re
+import sys
+from typing import Any, Dict, Iterable, List, Tuple
+
+from config.database import db_config, DatabaseConfig
+from config.queries import TRADE_SERIES_QUERY, GLOBE_TRADE_FLOWS_QUERY
+
+PARTITIONED_TABLE = 'trade_flows'
+OLDEST_PARTITION = 'p_old'
+FUTURE_PARTITION = 'pfuture'
+# Yearly partitions created by the migration; later years are added on ingest
+INITIAL_YEARS = range(2015, 2027)
+
+def _year_partition(year: int) -> str:
+    return f"PARTITION p{year} VALUES LESS THAN ('{year + 1}')"
+
+def partition_by_clause(years: Iterable[int] = INITIAL_YEARS) -> str:
+    """PARTITION BY clause for trade_flows covering the given years"""
+    years = sorted(years)
+    partitions = [f"PARTITION {OLDEST_PARTITION} VALUES LESS THAN ('{years[0]}')"]
+    partitions += [_year_partition(year) for year in years]
+    partitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    return "PARTITION BY RANGE COLUMNS(period) (\n    " + ",\n    ".join(partitions) + "\n)"
+
+PARTITIONS_QUERY = """
+    SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS bound, TABLE_ROWS AS table_rows
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+    ORDER BY PARTITION_ORDINAL_POSITION
+"""
+
+def list_partitions(db: DatabaseConfig = db_config) -> List[Dict[str, Any]]:
+    """Partitions of trade_flows in order (empty on SQLite or an unpartitioned table)"""
+    if db.db_type != 'mysql':
+        return []
+    # Metadata must reflect DDL just run on the primary
+    with db.read_from_primary():
+        return db.execute_query(PARTITIONS_QUERY, (PARTITIONED_TABLE,))
+
+def enable_partitioning(db: DatabaseConfig = db_config) -> List[str]:
+    """
+    Partition trade_flows by period, covering every year already loaded
+
+    Every unique key must contain the partitioning column, so the primary
+    key becomes (id, period); uq_tf_natural_key already has it. Does nothing
+    on SQLite or when the table is already partitioned.
+
+    Returns:
+        Names of the partitions created
+    """
+    if db.db_type != 'mysql' or list_partitions(db):
+        return []
+    db.execute_query(
+        f"ALTER TABLE {PARTITIONED_TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (id, period)",
+        fetch='none'
+    )
+    db.execute_query(f"ALTER TABLE {PARTITIONED_TABLE} {partition_by_clause()}", fetch='none')
+    latest = db.execute_query(f"SELECT MAX(period) FROM {PARTITIONED_TABLE}", fetch='one')[0]
+    ensure_period_partitions([latest] if latest else [], db)
+    created = [partition['name'] for partition in list_partitions(db)]
+    db.logger.info(f"Partitioned trade_flows: {created}")
+    return created
+
+def _bound_year(bound: str) -> int:
+    """Year from a partition bound such as "'2025'" """
+    return int(bound.strip("'"))
+
+def ensure_period_partitions(periods: Iterable[str], db: DatabaseConfig = db_config) -> List[str]:
+    """
+    Split yearly partitions out of pfuture up to the latest year in periods
+
+    Called after an ingest: rows of a year with no partition yet land in
+    pfuture and are moved into their own partition here. Years older than
+    the first partition stay in p_old.
+
+    Returns:
+        Names of the partitions created
+    """
+    partitions = list_partitions(db)
+    if not partitions or partitions[-1]['name'] != FUTURE_PARTITION:
+        return []
+
+    # pfuture starts at the upper bound of the last yearly partition
+    next_year = _bound_year(partitions[-2]['bound'])
+    years = [int(period[:4]) for period in periods if re.match(r"\d{4}", str(period))]
+    if not years or max(years) < next_year:
+        return []
+
+    new_years = range(next_year, max(years) + 1)
+    definitions = [_year_partition(year) for year in new_years]
+    definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    db.execute_query(
+        f"ALTER TABLE {PARTITIONED_TABLE} REORGANIZE PARTITION {FUTURE_PARTITION} INTO ("
+        + ", ".join(definitions) + ")",
+        fetch='none'
+    )
+    created = [f"p{year}" for year in new_years]
+    db.logger.info(f"Created trade_flows partitions: {created}")
+    return created
+
+# Period-filtered hot queries that must prune: name -> (sql, params)
+def pruning_queries(db_type: str) -> Dict[str, Tuple[str, tuple]]:
+    series_sql, series_params = TRADE_SERIES_QUERY.build(
+        db_type, start_period="2024", end_period="2024-12", limit=100
+    )
+    page_sql, page_params = TRADE_SERIES_QUERY.build(
+        db_type, after=("2023-06", 1e9, 1000000), after_period="2023-06", limit=100
+    )
+    globe_sql, globe_params = GLOBE_TRADE_FLOWS_QUERY.build(
+        db_type, min_value_usd=100000000, since_period="2024"
+    )
+    return {
+        "get_trade_series (period range)": (series_sql, series_params),
+        "get_trade_series (next page)": (page_sql, page_params),
+        "get_trade_flows_for_globe": (globe_sql, globe_params),
+    }
+
+def check_partition_pruning(db: DatabaseConfig = db_config) -> Dict[str, Dict[str, Any]]:
+    """
+    EXPLAIN each period-filtered query and report the trade_flows partitions read
+
+    A query is pruned when it reads fewer partitions than the table has.
+    (MySQL 5.7+ always reports the partitions column, which replaces the
+    removed EXPLAIN PARTITIONS syntax.)
+    """
+    all_partitions = [partition['name'] for partition in list_partitions(db)]
+    report = {}
+    with db.get_connection() as connection:
+        cursor = connection.cursor()
+        try:
+            for name, (sql, params) in pruning_queries(db.db_type).items():
+                cursor.execute(f"EXPLAIN {sql}", params)
+                columns = [column[0] for column in cursor.description]
+                plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                step = next(step for step in plan if step.get('table') == 'tf')
+                read = (step.get('partitions') or '').split(',') if step.get('partitions') else all_partitions
+                report[name] = {
+                    'partitions': read,
+                    'pruned': len(read) < len(all_partitions)
+                }
+        finally:
+            cursor.close()
+    return report
+
+if __name__ == "__main__":
+    if db_config.db_type != 'mysql':
+        print("trade_flows is only partitioned on MySQL (DB_TYPE=mysql)")
+        sys.exit(0)
+
+    if "--enable" in sys.argv:
+        enable_partitioning()
+    partitions = list_partitions()
+    if not partitions:
+        print("trade_flows is not partitioned; run python -m config.partitioning --enable")
+        sys.exit(1)
+    for partition in partitions:
+        print(f"{partition['name']:<10} < {partition['bound']:<10} ~{partition['table_rows']} rows")
+
+    if "--check" in sys.argv:
+        print("\n" + "="*60)
+        print("PARTITION PRUNING")
+        print("="*60)
+        all_pruned = True
+        for name, result in check_partition_pruning().items():
+            status = "✓ pruned" if result['pruned'] else "✗ reads every partition"
+            print(f"{name:<34} {status}: {','.join(result['partitions'])}")
+            all_pruned = all_pruned and result['pruned']
+        print("="*60)
+        sys.exit(0 if all_pruned else 1)
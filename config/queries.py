@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+SQL for the hot API endpoints
+Kept in one place so the endpoints, the migrations' index checks and the
+benchmarks all exercise exactly the same statements.
+"""
+
+from config.query_builder import QueryTemplate, get_dialect
+
+# /v2/series
+TRADE_SERIES_QUERY = QueryTemplate(
+    name="trade_series",
+    base="""
+        SELECT 
+            tf.period,
+            c1.name as reporter,
+            c2.name as partner,
+            hs.description as commodity,
+            tf.hs6,
+            tf.value_usd,
+            tf.quantity,
+            tf.unit,
+            tf.id
+        FROM trade_flows tf
+        JOIN countries c1 ON tf.reporter_iso = c1.iso3
+        JOIN countries c2 ON tf.partner_iso = c2.iso3
+        JOIN hs_codes hs ON tf.hs6 = hs.hs6
+    """,
+    # Name searches are resolved to keys up front (src/api/filter_index.py), so
+    # these are IN lookups on columns of the covering index, not LIKE on joins
+    filters={
+        "hs6": "tf.hs6 IN ({p*})",
+        "reporter_iso": "tf.reporter_iso IN ({p*})",
+        "partner_iso": "tf.partner_iso IN ({p*})",
+        "start_period": "tf.period >= {p}",
+        "end_period": "tf.period <= {p}",
+        # Keyset pagination: rows after the last one served, as (period, value_usd, id)
+        "after": "(tf.period, tf.value_usd, tf.id) < ({p}, {p}, {p})",
+        # Same bound as a plain column predicate, which MySQL can prune
+        # partitions with (it does not prune on row comparisons)
+        "after_period": "tf.period <= {p}",
+    },
+    suffix="ORDER BY tf.period DESC, tf.value_usd DESC, tf.id DESC LIMIT {p}",
+    suffix_params=("limit",)
+)
+
+# /v2/export: the /v2/series join and filters with every trade_flows column,
+# unpaged and unsorted so both engines can stream it without a sort
+TRADE_EXPORT_QUERY = QueryTemplate(
+    name="trade_export",
+    base="""
+        SELECT 
+            tf.period,
+            c1.name as reporter,
+            tf.reporter_iso,
+            c2.name as partner,
+            tf.partner_iso,
+            hs.description as commodity,
+            tf.hs6,
+            tf.flow,
+            tf.value_usd,
+            tf.quantity,
+            tf.unit,
+            tf.source
+        FROM trade_flows tf
+        JOIN countries c1 ON tf.reporter_iso = c1.iso3
+        JOIN countries c2 ON tf.partner_iso = c2.iso3
+        JOIN hs_codes hs ON tf.hs6 = hs.hs6
+    """,
+    filters={
+        "hs6": "tf.hs6 IN ({p*})",
+        "reporter_iso": "tf.reporter_iso IN ({p*})",
+        "partner_iso": "tf.partner_iso IN ({p*})",
+        "start_period": "tf.period >= {p}",
+        "end_period": "tf.period <= {p}",
+    }
+)
+
+# /v2/globe/trade-flows
+GLOBE_TRADE_FLOWS_QUERY = QueryTemplate(
+    name="globe_trade_flows",
+    base="""
+    SELECT r.name as reporter_name, p.name as partner_name, 
+           h.description as commodity_name, tf.hs6 as hs_code,
+           tf.value_usd as trade_value_usd, 'export' as trade_flow, tf.period
+    FROM trade_flows tf
+    JOIN countries r ON tf.reporter_iso = r.iso3
+    JOIN countries p ON tf.partner_iso = p.iso3  
+    JOIN hs_codes h ON tf.hs6 = h.hs6
+    """,
+    filters={
+        "min_value_usd": "tf.value_usd >= {p}",
+        "since_period": "tf.period >= {p}",
+    },
+    suffix="ORDER BY tf.value_usd DESC LIMIT 100"
+)
+
+LATEST_PERIOD_QUERY = "SELECT MAX(period) FROM trade_flows"
+
+# Census-backed US flows merged into the globe
+CENSUS_FLOWS_QUERY = QueryTemplate(
+    name="census_flows",
+    base="""
+    SELECT partner_name, hs_code, commodity_description, trade_value_usd, period
+    FROM census_trade_cache 
+    """,
+    filters={
+        "min_value_usd": "trade_value_usd >= {p}",
+    },
+    suffix="ORDER BY trade_value_usd DESC"
+)
+
+# /v2/stats: every total and breakdown comes from this one read of
+# stats_rollups (one row per period, HS code and source), folded by
+# src/analytics/summary_stats.py
+STATS_SNAPSHOT_QUERY = """
+    SELECT s.period, s.source, s.hs6, hs.description, s.total_value, s.record_count
+    FROM stats_rollups s
+    LEFT JOIN hs_codes hs ON s.hs6 = hs.hs6
+"""
+
+def anomaly_totals_query(db_type: str) -> str:
+    """
+    /v2/anomalies: totals per period, commodity and trade route
+
+    One row per trade_flow_rollups group, in key order; no GROUP BY or sort
+    is needed because the rollup is already aggregated.
+    """
+    concat_clause = get_dialect(db_type).concat("c1.name", "' → '", "c2.name")
+    return f"""
+        SELECT 
+            r.period,
+            hs.description as commodity,
+            {concat_clause} as trade_route,
+            r.total_value
+        FROM trade_flow_rollups r
+        JOIN countries c1 ON r.reporter_iso = c1.iso3
+        JOIN countries c2 ON r.partner_iso = c2.iso3
+        JOIN hs_codes hs ON r.hs6 = hs.hs6
+        WHERE r.total_value > 0
+    """
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Dialect-aware query compiler
+Compiles a filter spec into SQL with the right placeholder style for SQLite
+or MySQL, and caches the compiled statement by filter shape so the SQL text
+is stable across requests (and reusable as a server-side prepared statement).
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple, List
+
+@dataclass(frozen=True)
+class Dialect:
+    name: str
+    placeholder: str
+
+    def concat(self, *parts: str) -> str:
+        """String concatenation expression for this dialect"""
+        if self.name == 'mysql':
+            return f"CONCAT({', '.join(parts)})"
+        return " || ".join(parts)
+
+DIALECTS = {
+    'sqlite': Dialect('sqlite', '?'),
+    'mysql': Dialect('mysql', '%s'),
+}
+
+def get_dialect(db_type: str) -> Dialect:
+    """Look up the dialect for a DatabaseConfig.db_type value"""
+    try:
+        return DIALECTS[db_type]
+    except KeyError:
+        raise ValueError(f"Unsupported database dialect: {db_type}")
+
+@dataclass(frozen=True)
+class CompiledQuery:
+    """SQL text plus the order in which named parameters must be bound"""
+    sql: str
+    param_names: Tuple[str, ...]
+
+    def bind(self, values: Dict[str, Any]) -> tuple:
+        """
+        Build the positional parameter tuple for this statement
+
+        A parameter used by several placeholders may be given as a tuple, whose
+        items are bound to those placeholders in order; any other value is
+        repeated.
+        """
+        params = []
+        used: Dict[str, int] = {}
+        for name in self.param_names:
+            value = values[name]
+            if isinstance(value, tuple):
+                index = used.get(name, 0)
+                used[name] = index + 1
+                value = value[index]
+            params.append(value)
+        return tuple(params)
+
+def padded_size(count: int) -> int:
+    """Smallest power of two >= count, so IN lists come in a few fixed shapes"""
+    size = 1
+    while size < count:
+        size *= 2
+    return size
+
+class QueryTemplate:
+    """
+    Parameterised SELECT with optional filters
+
+    Filter conditions and the suffix are written with `{p}` where a bound
+    parameter goes, e.g. "tf.period >= {p}". Each filter binds the parameter
+    of the same name; the suffix binds `suffix_params` in order.
+
+    A condition with `{p*}`, e.g. "tf.hs6 IN ({p*})", is a list filter: it
+    takes a sequence and expands to one placeholder per item. Lists are
+    padded to a power of two by repeating the last item, which keeps the
+    number of distinct statements (and prepared statements) small.
+    """
+
+    def __init__(self,
+                 name: str,
+                 base: str,
+                 filters: Optional[Dict[str, str]] = None,
+                 suffix: str = "",
+                 suffix_params: Tuple[str, ...] = ()):
+        self.name = name
+        self.base = base.rstrip()
+        self.filters = filters or {}
+        self.suffix = suffix
+        self.suffix_params = tuple(suffix_params)
+
+        self._cache: Dict[Tuple[str, Tuple[str, ...]], CompiledQuery] = {}
+        self._lock = threading.Lock()
+
+    def is_list_filter(self, name: str) -> bool:
+        return "{p*}" in self.filters[name]
+
+    def compile(self, db_type: str, active_filters: Tuple[str, ...] = (),
+                list_sizes: Optional[Dict[str, int]] = None) -> CompiledQuery:
+        """
+        Compile for a dialect and set of active filters (cached by shape)
+
+        list_sizes gives the number of placeholders for each active list filter.
+        """
+        list_sizes = list_sizes or {}
+        shape = tuple(name for name in self.filters if name in active_filters)
+        sizes = tuple(list_sizes.get(name, 1) for name in shape if self.is_list_filter(name))
+        key = (db_type, shape, sizes)
+
+        compiled = self._cache.get(key)
+        if compiled is not None:
+            return compiled
+
+        dialect = get_dialect(db_type)
+        clauses: List[str] = []
+        param_names: List[str] = []
+        for filter_name in shape:
+            condition = self.filters[filter_name]
+            if self.is_list_filter(filter_name):
+                size = list_sizes.get(filter_name, 1)
+                condition = condition.replace("{p*}", ", ".join(["{p}"] * size))
+            clauses.append(condition.replace("{p}", dialect.placeholder))
+            param_names.extend([filter_name] * condition.count("{p}"))
+
+        sql = self.base
+        if clauses:
+            joiner = " AND " if re.search(r"\bWHERE\b", self.base, re.IGNORECASE) else " WHERE "
+            sql += joiner + " AND ".join(clauses)
+        if self.suffix:
+            sql += " " + self.suffix.replace("{p}", dialect.placeholder).strip()
+            param_names.extend(self.suffix_params)
+
+        compiled = CompiledQuery(sql=sql, param_names=tuple(param_names))
+        with self._lock:
+            self._cache.setdefault(key, compiled)
+        return compiled
+
+    def build(self, db_type: str, **values) -> Tuple[str, tuple]:
+        """
+        Compile and bind in one step
+
+        Filters whose value is None are left out of the statement. List
+        filters need a non-empty sequence (an empty one would match nothing;
+        callers should skip the query instead).
+        Returns (sql, params) ready for DatabaseConfig.execute_query.
+        """
+        active = tuple(name for name in self.filters if values.get(name) is not None)
+        list_sizes = {}
+        for name in active:
+            if self.is_list_filter(name):
+                items = list(values[name])
+                if not items:
+                    raise ValueError(f"List filter '{name}' needs at least one value")
+                size = padded_size(len(items))
+                values[name] = tuple(items + items[-1:] * (size - len(items)))
+                list_sizes[name] = size
+        compiled = self.compile(db_type, active, list_sizes)
+        return compiled.sql, compiled.bind(values)
+
+    def cache_info(self) -> Dict[str, Any]:
+        """Number of compiled shapes held for this template"""
+        return {"template": self.name, "compiled_shapes": len(self._cache)}
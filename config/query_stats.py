@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Per-query timing instrumentation
+DatabaseConfig records every statement it runs here: duration, rows, time
+spent waiting for a pooled connection and the API endpoint that issued it.
+Statements are grouped by fingerprint (SQL with literals and IN lists
+normalized), each with a latency histogram; statements slower than
+SLOW_QUERY_MS are logged and kept in a bounded slow-query log.
+"""
+
+import bisect
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Endpoint (route path) on whose behalf queries run; set by the API middleware
+current_endpoint = contextvars.ContextVar('current_endpoint', default=None)
+
+@contextmanager
+def endpoint_context(name: str):
+    """Attribute queries run in this block (and tasks it awaits) to name"""
+    token = current_endpoint.set(name)
+    try:
+        yield
+    finally:
+        current_endpoint.reset(token)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def fingerprint(query: str) -> str:
+    """Normalize a statement so executions differing only in literals group together"""
+    normalized = query.replace('%s', '?')
+    normalized = _STRING_LITERAL.sub('?', normalized)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _PLACEHOLDER_LIST.sub('(?...)', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+def _percentile(buckets: List[int], count: int, fraction: float) -> Optional[float]:
+    """Upper bound (ms) of the bucket holding the given percentile; None if unbounded"""
+    if not count:
+        return 0.0
+    target = fraction * count
+    seen = 0
+    for bound, bucket_count in zip(LATENCY_BUCKETS_MS, buckets):
+        seen += bucket_count
+        if seen >= target:
+            return float(bound)
+    return None
+
+class _FingerprintStats:
+    __slots__ = ('count', 'errors', 'total_ms', 'max_ms', 'rows', 'pool_wait_ms', 'buckets', 'endpoints')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.pool_wait_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.endpoints = Counter()
+
+class QueryStats:
+    """Thread-safe aggregation of query timings, histograms and the slow-query log"""
+
+    def __init__(self, slow_query_ms: Optional[float] = None, slow_log_size: int = 100,
+                 max_fingerprints: int = 500, logger: Optional[logging.Logger] = None):
+        self.slow_query_ms = slow_query_ms if slow_query_ms is not None else float(
+            os.getenv('SLOW_QUERY_MS', '500')
+        )
+        self.max_fingerprints = max_fingerprints
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._slow_log = deque(maxlen=slow_log_size)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._by_fingerprint: Dict[str, _FingerprintStats] = {}
+            self._buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            self._count = 0
+            self._slow_count = 0
+            self._slow_log.clear()
+            self._since = time.time()
+
+    def record(self, query: str, duration_ms: float, rows: int = 0, pool_wait_ms: float = 0.0,
+               error: bool = False):
+        """Record one statement execution"""
+        key = fingerprint(query)
+        endpoint = current_endpoint.get()
+        bucket = bisect.bisect_left(LATENCY_BUCKETS_MS, duration_ms)
+        slow = duration_ms >= self.slow_query_ms
+
+        with self._lock:
+            stats = self._by_fingerprint.get(key)
+            if stats is None:
+                if len(self._by_fingerprint) >= self.max_fingerprints:
+                    key = '<other>'  # Bound memory if fingerprints are unexpectedly diverse
+                    stats = self._by_fingerprint.get(key)
+                if stats is None:
+                    stats = self._by_fingerprint[key] = _FingerprintStats()
+            stats.count += 1
+            stats.errors += error
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.rows += rows
+            stats.pool_wait_ms += pool_wait_ms
+            stats.buckets[bucket] += 1
+            stats.endpoints[endpoint or '-'] += 1
+            self._buckets[bucket] += 1
+            self._count += 1
+            if slow:
+                self._slow_count += 1
+                self._slow_log.append({
+                    'fingerprint': key,
+                    'duration_ms': round(duration_ms, 2),
+                    'rows': rows,
+                    'pool_wait_ms': round(pool_wait_ms, 2),
+                    'endpoint': endpoint,
+                    'error': error,
+                    'at': time.time()
+                })
+
+        if slow:
+            self.logger.warning(
+                f"Slow query ({duration_ms:.0f}ms, {rows} rows, pool wait {pool_wait_ms:.0f}ms, "
+                f"endpoint {endpoint or '-'}): {key[:300]}"
+            )
+
+    @staticmethod
+    def _histogram(buckets: List[int]) -> Dict[str, int]:
+        labels = [f"le_{bound}ms" for bound in LATENCY_BUCKETS_MS] + ['gt_10000ms']
+        return dict(zip(labels, buckets))
+
+    def snapshot(self, top: int = 20) -> Dict[str, Any]:
+        """Aggregated stats: overall histogram, top fingerprints by total time, slow log"""
+        with self._lock:
+            entries = sorted(self._by_fingerprint.items(), key=lambda item: item[1].total_ms, reverse=True)
+            queries = [{
+                'fingerprint': key,
+                'count': stats.count,
+                'errors': stats.errors,
+                'total_ms': round(stats.total_ms, 2),
+                'avg_ms': round(stats.total_ms / stats.count, 3),
+                'max_ms': round(stats.max_ms, 2),
+                'p50_ms': _percentile(stats.buckets, stats.count, 0.50),
+                'p95_ms': _percentile(stats.buckets, stats.count, 0.95),
+                'p99_ms': _percentile(stats.buckets, stats.count, 0.99),
+                'avg_rows': round(stats.rows / stats.count, 1),
+                'avg_pool_wait_ms': round(stats.pool_wait_ms / stats.count, 3),
+                'endpoints': dict(stats.endpoints.most_common(5)),
+                'histogram': self._histogram(stats.buckets)
+            } for key, stats in entries[:top]]
+            return {
+                'since': self._since,
+                'queries_recorded': self._count,
+                'distinct_fingerprints': len(self._by_fingerprint),
+                'slow_query_ms': self.slow_query_ms,
+                'slow_queries': self._slow_count,
+                'p50_ms': _percentile(self._buckets, self._count, 0.50),
+                'p95_ms': _percentile(self._buckets, self._count, 0.95),
+                'p99_ms': _percentile(self._buckets, self._count, 0.99),
+                'histogram': self._histogram(self._buckets),
+                'top_queries': queries,
+                'slow_log': list(self._slow_log)[::-1]  # Most recent first
+            }
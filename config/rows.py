@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Typed result rows shared by SQLite, MySQL and the columnar mirror
+DatabaseConfig decodes every result into rows of one class per column
+list: tuples with `__slots__ = ()` (no per-row __dict__) that also allow
+access by column name, as an attribute or a key. SQLite and MySQL rows are
+therefore identical: `row.value_usd`, `row['value_usd']` and `row[5]` all
+work on both.
+
+MySQL DECIMAL columns are converted to float while decoding, so callers
+never see Decimal.
+"""
+
+import gc
+import threading
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from mysql.connector.constants import FieldType
+    # mysql-connector type codes of DECIMAL columns (incl. SUM() over them)
+    DECIMAL_TYPE_CODES = frozenset((FieldType.DECIMAL, FieldType.NEWDECIMAL))
+except ImportError:
+    DECIMAL_TYPE_CODES = frozenset()
+
+class Row(tuple):
+    """Result row: a tuple whose values can also be read by column name"""
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    _index: Dict[str, int] = {}
+
+    def __getitem__(self, key):
+        if key.__class__ is str:
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(zip(self._fields, self))
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={value!r}" for name, value in zip(self._fields, self))
+        return f"Row({values})"
+
+    def __reduce__(self):
+        return (make_row, (self._fields, tuple(self)))
+
+@lru_cache(maxsize=512)
+def row_class(fields: Tuple[str, ...]) -> type:
+    """Row subclass for a column list (cached: one class per distinct result shape)"""
+    namespace = {
+        '__slots__': (),
+        '_fields': fields,
+        '_index': {name: position for position, name in enumerate(fields)},
+    }
+    for position, name in enumerate(fields):
+        # Columns such as MAX(period) are reachable by key and index only
+        if name.isidentifier() and not hasattr(Row, name):
+            namespace[name] = property(itemgetter(position))
+    return type('Row', (Row,), namespace)
+
+def make_row(fields: Tuple[str, ...], values: Sequence[Any]) -> Row:
+    return tuple.__new__(row_class(tuple(fields)), values)
+
+def decimal_columns(description: Sequence[Sequence[Any]]) -> List[int]:
+    """Positions of DECIMAL columns in a DB-API cursor description"""
+    return [position for position, column in enumerate(description) if column[1] in DECIMAL_TYPE_CODES]
+
+@lru_cache(maxsize=512)
+def _row_converter(row_type: type, width: int, decimals: Tuple[int, ...]) -> Callable[[Sequence[Any]], Row]:
+    """
+    Compile the raw tuple -> Row conversion for one result shape
+
+    The DECIMAL -> float casts are decided once per shape and inlined, so
+    decoding does no per-field type checks (namedtuple builds its __new__
+    the same way).
+    """
+    items = ", ".join(
+        f"(None if v[{position}] is None else _float(v[{position}]))" if position in decimals else f"v[{position}]"
+        for position in range(width)
+    )
+    return eval(f"lambda v: _new(_row_type, ({items},))",
+                {'_new': tuple.__new__, '_row_type': row_type, '_float': float})
+
+# Results at least this large are decoded with the cyclic GC paused: each new
+# row is a GC-tracked tuple, and collections triggered mid-decode dominate
+# the cost on large results (see benchmarks/row_decoding.py)
+GC_PAUSE_MIN_ROWS = 10000
+
+# gc.disable() is process-wide and decodes run on several executor threads,
+# so pauses are counted: the last decode to finish re-enables the GC, and
+# only if it was enabled when the first one started
+_gc_lock = threading.Lock()
+_gc_pauses = 0
+_gc_was_enabled = False
+
+@contextmanager
+def gc_paused():
+    """Pause the cyclic GC for the duration of the block, nesting across threads"""
+    global _gc_pauses, _gc_was_enabled
+    with _gc_lock:
+        if _gc_pauses == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_was_enabled:
+                gc.enable()
+
+class RowDecoder:
+    """Turns raw DB-API tuples into Row objects for one cursor description"""
+
+    __slots__ = ('row_type', 'decimals', '_convert')
+
+    def __init__(self, description: Optional[Sequence[Sequence[Any]]]):
+        description = description or ()
+        self.row_type = row_class(tuple(column[0] for column in description))
+        self.decimals = decimal_columns(description)
+        if self.decimals:
+            self._convert = _row_converter(self.row_type, len(description), tuple(self.decimals))
+        else:
+            self._convert = partial(tuple.__new__, self.row_type)
+
+    def decode(self, rows: Sequence[Sequence[Any]]) -> List[Row]:
+        if len(rows) < GC_PAUSE_MIN_ROWS:
+            return list(map(self._convert, rows))
+        with gc_paused():
+            return list(map(self._convert, rows))
+
+    def decode_one(self, row: Optional[Sequence[Any]]) -> Optional[Row]:
+        return None if row is None else self._convert(row)
+
+def decode_rows(description, rows: Sequence[Sequence[Any]]) -> List[Row]:
+    """Decode a whole result given its cursor description"""
+    return RowDecoder(description).decode(rows)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Process-shared state for multi-worker deployments
+Each uvicorn/gunicorn worker is a separate process with its own copy of
+the module-level clients and caches, so per-process rate limiters let N
+workers spend N times the upstream quota. With SHARED_STATE_BACKEND set,
+the pieces that must agree across workers go through one store:
+
+- upstream rate limits (src/api/rate_limit.py): one request budget per API
+- the response cache (src/api/response_cache.py): a shared tier behind
+  each worker's in-memory LRU
+- the data version reading (config/data_version.py): one database check
+  per interval for all workers
+- startup schema migrations: run by one worker at a time
+
+Backends:
+    local   per-process state (default; single worker)
+    sqlite  a WAL-mode SQLite file (SHARED_STATE_PATH) for workers on one host
+    redis   a Redis-compatible server (SHARED_STATE_REDIS_URL, else REDIS_URL;
+            needs the optional redis package) for workers on several hosts
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Union
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limit_starts (name TEXT NOT NULL, start REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_rate_limit_starts ON rate_limit_starts (name, start);
+CREATE TABLE IF NOT EXISTS shared_values (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS shared_locks (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL);
+"""
+
+# Sliding-window reservation (see SlidingWindowLimiter.reserve), atomic on the server
+# and timed by the server clock so workers on different hosts agree
+REDIS_RESERVE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local window, limit = tonumber(ARGV[1]), tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local start = now
+local nth = redis.call('ZREVRANGE', KEYS[1], limit - 1, limit - 1, 'WITHSCORES')
+if nth[2] then
+    start = math.max(now, tonumber(nth[2]) + window)
+end
+redis.call('ZADD', KEYS[1], start, ARGV[3])
+redis.call('PEXPIRE', KEYS[1], math.ceil((start - now + window) * 1000))
+return tostring(start - now)
+"""
+
+class SQLiteSharedState:
+    """Shared state in a SQLite file; safe across the processes of one host"""
+
+    backend = 'sqlite'
+    PURGE_EVERY = 256  # writes between sweeps of expired values
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, reopened in forked children
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SQLITE_SCHEMA)
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction holding the database lock from the start"""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def reserve(self, name: str, limit: int, window: float) -> float:
+        """Claim the next start slot of a shared sliding window; returns seconds to wait"""
+        with self._transaction() as connection:
+            now = time.time()
+            connection.execute(
+                "DELETE FROM rate_limit_starts WHERE name = ? AND start <= ?", (name, now - window)
+            )
+            nth = connection.execute(
+                "SELECT start FROM rate_limit_starts WHERE name = ? ORDER BY start DESC LIMIT 1 OFFSET ?",
+                (name, limit - 1)
+            ).fetchone()
+            start = now if nth is None else max(now, nth[0] + window)
+            connection.execute("INSERT INTO rate_limit_starts (name, start) VALUES (?, ?)", (name, start))
+        return start - now
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._connection().execute(
+            "SELECT value FROM shared_values WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._transaction() as connection:
+            now = time.time()
+            connection.execute(
+                "INSERT OR REPLACE INTO shared_values (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + ttl)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                connection.execute("DELETE FROM shared_values WHERE expires_at <= ?", (now,))
+
+    def delete(self, key: str):
+        self._connection().execute("DELETE FROM shared_values WHERE key = ?", (key,))
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = 300.0) -> Iterator[None]:
+        """
+        Mutual exclusion across processes; the lock lapses after `timeout`
+        seconds if its holder dies without releasing it
+        """
+        owner = f"{os.getpid()}-{threading.get_ident()}-{time.monotonic_ns()}"
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._transaction() as connection:
+                now = time.time()
+                connection.execute("DELETE FROM shared_locks WHERE name = ? AND expires_at <= ?", (name, now))
+                acquired = connection.execute(
+                    "INSERT OR IGNORE INTO shared_locks (name, owner, expires_at) VALUES (?, ?, ?)",
+                    (name, owner, now + timeout)
+                ).rowcount == 1
+            if acquired:
+                break
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for shared lock {name}")
+            time.sleep(0.05)
+        try:
+            yield
+        finally:
+            self._connection().execute(
+                "DELETE FROM shared_locks WHERE name = ? AND owner = ?", (name, owner)
+            )
+
+    def describe(self) -> str:
+        return self.path
+
+class RedisSharedState:
+    """Shared state on a Redis-compatible server; safe across hosts"""
+
+    backend = 'redis'
+
+    def __init__(self, url: str, prefix: str = 'semiconductor-monitor:'):
+        self.url = url
+        self.prefix = prefix
+        # redis-py's connection pool reconnects in forked children by itself
+        self.client = redis.Redis.from_url(url)
+        self._reserve = self.client.register_script(REDIS_RESERVE_SCRIPT)
+
+    def reserve(self, name: str, limit: int, window: float) -> float:
+        member = f"{os.getpid()}-{threading.get_ident()}-{time.monotonic_ns()}"
+        return float(self._reserve(keys=[f"{self.prefix}rate:{name}"], args=[window, limit, member]))
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.client.set(self.prefix + key, value, px=max(int(ttl * 1000), 1))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = 300.0) -> Iterator[None]:
+        with self.client.lock(f"{self.prefix}lock:{name}", timeout=timeout, blocking_timeout=timeout):
+            yield
+
+    def describe(self) -> str:
+        return self.url
+
+SharedState = Union[SQLiteSharedState, RedisSharedState]
+
+def shared_state_backend() -> str:
+    return os.getenv('SHARED_STATE_BACKEND', 'local').lower()
+
+def create_shared_state() -> Optional[SharedState]:
+    """The configured store, or None for per-process state"""
+    backend = shared_state_backend()
+    if backend == 'redis':
+        if REDIS_AVAILABLE:
+            url = os.getenv('SHARED_STATE_REDIS_URL') or os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+            return RedisSharedState(url)
+        # Still process-safe on one host; per-process state would multiply quotas
+        logger.warning("SHARED_STATE_BACKEND=redis needs the optional redis package; using sqlite")
+        backend = 'sqlite'
+    if backend == 'sqlite':
+        return SQLiteSharedState(os.getenv('SHARED_STATE_PATH', 'shared_state.db'))
+    if backend != 'local':
+        logger.warning(f"Unknown SHARED_STATE_BACKEND={backend}; using per-process state")
+    return None
+
+@contextmanager
+def exclusive(name: str, timeout: float = 300.0) -> Iterator[None]:
+    """Run a block in one worker at a time (a no-op for per-process state)"""
+    if shared_state is None:
+        yield
+        return
+    with shared_state.lock(name, timeout):
+        yield
+
+# Global store used by the rate limiters, response cache and data version
+shared_state = create_shared_state()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Shared fixtures for the test suite
+config.database builds the global db_config (used by the API, the data
+version and the caches) from the environment once, at import, so the
+environment points at a throwaway SQLite database before any test module
+imports it. Tests that need a database of their own use `sqlite_db`.
+
+test_complete_system.py exercises a running server and is run directly.
+
+Usage:
+    python -m pytest -q
+    TEST_MYSQL=1 DB_TYPE=mysql python -m pytest -q test_query_plans.py   # also MySQL checks
+"""
+
+import os
+import tempfile
+from typing import Dict, List
+
+import pytest
+
+collect_ignore = ["test_complete_system.py"]
+
+# MySQL settings come from the caller's MYSQL_* variables; DB_TYPE is
+# pinned to sqlite below for the API database, so remember whether asked
+MYSQL_TESTS = os.getenv("TEST_MYSQL", "").lower() in ("1", "true")
+
+_api_database = tempfile.TemporaryDirectory(prefix="semiconductor-monitor-tests-")
+os.environ.update({
+    "DB_TYPE": "sqlite",
+    "SQLITE_DATABASE": os.path.join(_api_database.name, "api.db"),
+    "SHARED_STATE_BACKEND": "local",
+    "AGGREGATE_ENGINE": "database",
+    # Writes made by a test are visible to the next request
+    "DATA_VERSION_CHECK_SECONDS": "0",
+})
+
+COUNTRIES = {"KOR": "South Korea", "TWN": "Taiwan", "USA": "USA", "CHN": "China"}
+HS_CODES = {
+    "854231": "Electronic integrated circuits: Processors and controllers",
+    "854232": "Electronic integrated circuits: Memory (DRAM, flash, HBM)",
+}
+PERIODS = ("2023-01", "2023-02", "2023-03")
+
+def trade_records(scale: float = 1.0, source: str = "comtrade") -> List[Dict]:
+    """One record per (period, route, HS code, flow) over COUNTRIES, HS_CODES and PERIODS"""
+    records = []
+    for p, period in enumerate(PERIODS):
+        for r, reporter in enumerate(COUNTRIES):
+            for q, partner in enumerate(COUNTRIES):
+                if reporter == partner:
+                    continue
+                for h, hs6 in enumerate(HS_CODES):
+                    for flow in ("X", "M"):
+                        records.append({
+                            "period": period, "reporter_iso": reporter, "partner_iso": partner,
+                            "hs6": hs6, "flow": flow,
+                            "value_usd": scale * (1 + p) * (1e8 + r * 1e7 + q * 1e6 + h * 1e5),
+                            "quantity": 10.0 * (p + 1), "unit": "u", "source": source,
+                        })
+    return records
+
+def load_trade_data(db, records: List[Dict]):
+    from src.ingest.bulk_loader import BulkLoader
+    loader = BulkLoader(db)
+    loader.upsert_countries(COUNTRIES)
+    loader.upsert_hs_codes(HS_CODES)
+    return loader.upsert_trade_flows(records)
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """A migrated, empty SQLite database of the test's own"""
+    from config.database import DatabaseConfig
+    from config.migrations import apply_migrations
+    monkeypatch.setenv("SQLITE_DATABASE", str(tmp_path / "test.db"))
+    db = DatabaseConfig()
+    apply_migrations(db)
+    return db
+
+@pytest.fixture(scope="session")
+def api_db():
+    """The API's database (the global db_config), migrated and loaded with trade_records()"""
+    from config.database import db_config
+    from config.migrations import apply_migrations
+    apply_migrations(db_config)
+    load_trade_data(db_config, trade_records())
+    return db_config
+
+@pytest.fixture(scope="session")
+def client(api_db):
+    from fastapi.testclient import TestClient
+    from src.api.fastapi_server import app
+    return TestClient(app)
@@ -42,6 +42,91 @@ const WGS84_ELLIPSOID = {
 };
 
 
+// Push updates: one EventSource per tab, shared by the dashboard and the
+// trade flow manager. The server sends a snapshot on connect and deltas
+// only when an ingest changes the flows; both fall back to polling while
+// the stream is down or EventSource is unavailable.
+class GlobeUpdateStream {
+    constructor(url) {
+        this.url = url;
+        this.flows = new Map();
+        this.anomalies = new Map();
+        this.listeners = [];
+        this.connected = false;
+        this.source = null;
+    }
+
+    subscribe(listener) {
+        this.listeners.push(listener);
+        if (!this.source && window.EventSource) this.connect();
+    }
+
+    connect() {
+        this.source = new EventSource(this.url);
+        this.source.addEventListener('open', () => { this.connected = true; });
+        // EventSource reconnects on its own, resuming from the last event id
+        this.source.addEventListener('error', () => { this.connected = false; });
+        this.source.addEventListener('snapshot', event => {
+            const data = JSON.parse(event.data);
+            this.flows = new Map(data.flows.map(flow => [flow.key, flow]));
+            this.anomalies = new Map(data.anomalies.map(anomaly => [anomaly.key, anomaly]));
+            this.notify();
+        });
+        this.source.addEventListener('delta', event => {
+            const data = JSON.parse(event.data);
+            data.flows.remove.forEach(key => this.flows.delete(key));
+            data.flows.upsert.forEach(flow => this.flows.set(flow.key, flow));
+            data.anomalies.remove.forEach(key => this.anomalies.delete(key));
+            data.anomalies.upsert.forEach(anomaly => this.anomalies.set(anomaly.key, anomaly));
+            this.notify();
+        });
+    }
+
+    tradeFlows() {
+        return [...this.flows.values()].sort((a, b) => b.value - a.value);
+    }
+
+    notify() {
+        this.connected = true;
+        this.listeners.forEach(listener => listener(this));
+    }
+}
+
+const globeUpdates = new GlobeUpdateStream('/v2/globe/stream');
+
+// format=binary trade flows (src/api/globe_binary.py): a JSON header with
+// lookup tables and column offsets, then 8-byte aligned little-endian
+// columns. The columns are wrapped in typed array views over the response
+// buffer, without copying or parsing; trade_flows exposes them in the JSON
+// endpoint's shape for code that walks flows one by one.
+function decodeGlobeFlows(buffer) {
+    const view = new DataView(buffer);
+    if (view.getUint32(0, true) !== 0x46424c47) throw new Error('Not a globe flows payload'); // "GLBF"
+    const headerLength = view.getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+    const dataStart = Math.ceil((8 + headerLength) / 8) * 8;
+    const columns = {};
+    for (const [name, spec] of Object.entries(header.columns)) {
+        const ArrayType = spec.type === 'float32' ? Float32Array : Uint16Array;
+        columns[name] = new ArrayType(buffer, dataStart + spec.offset, header.count * spec.components);
+    }
+    const { coordinates, value, intensity } = columns;
+    const trade_flows = Array.from({ length: header.count }, (_, i) => {
+        const commodity = header.commodities[columns.commodity[i]];
+        return {
+            from: { country: header.countries[columns.from_country[i]], coordinates: coordinates.subarray(i * 4, i * 4 + 2) },
+            to: { country: header.countries[columns.to_country[i]], coordinates: coordinates.subarray(i * 4 + 2, i * 4 + 4) },
+            value: value[i],
+            intensity: intensity[i],
+            commodity: commodity.name,
+            hs_code: commodity.hs_code,
+            period: header.periods[columns.period[i]],
+            source: header.sources[columns.source[i]] || undefined
+        };
+    });
+    return { columns, trade_flows, country_stats: header.country_stats, metadata: header.metadata };
+}
+
 // Dashboard functionality
 class DashboardManager {
     constructor() {
@@ -54,9 +139,25 @@ class DashboardManager {
     async init() {
         await this.fetchTradeData();
         this.renderTiles();
+        globeUpdates.subscribe(stream => {
+            this.dataSource = 'UN Comtrade (live)';
+            this.tradeData = this.toTiles(stream.tradeFlows());
+            this.renderTiles();
+        });
         this.startAutoUpdate();
     }
 
+    toTiles(flows) {
+        return flows.slice(0, 10).map(flow => ({
+            value: this.formatValue(flow.value),
+            route: `${flow.from.country} → ${flow.to.country}`,
+            commodity: flow.commodity || 'Semiconductors',
+            time: this.formatTime(null),
+            code: flow.hs_code || 'HS: 8542',
+            intensity: flow.intensity
+        }));
+    }
+
     async fetchTradeData() {
         try {
             // Try enhanced endpoint first, then fallback to standard
@@ -67,20 +168,15 @@ class DashboardManager {
                 if (!response.ok) throw new Error('Enhanced endpoint failed');
                 dataSource = 'UN Comtrade + USITC';
             } catch {
-                response = await fetch('/v2/globe/trade-flows?min_value=100000000&period=recent');
+                response = await fetch('/v2/globe/trade-flows?min_value=100000000&period=recent&format=binary');
             }
             
-            const data = await response.json();
+            const data = dataSource === 'UN Comtrade'
+                ? decodeGlobeFlows(await response.arrayBuffer())
+                : await response.json();
             this.dataSource = dataSource;
             
-            this.tradeData = data.trade_flows?.slice(0, 10).map(flow => ({
-                value: this.formatValue(flow.value),
-                route: `${flow.from.country} → ${flow.to.country}`,
-                commodity: flow.commodity || 'Semiconductors',
-                time: this.formatTime(null),
-                code: flow.hs_code || 'HS: 8542',
-                intensity: flow.intensity
-            })) || [];
+            this.tradeData = this.toTiles(data.trade_flows || []);
         } catch (error) {
             console.log('Globe API failed, using demo data for dashboard');
             this.dataSource = 'Demo Data';
@@ -136,7 +232,8 @@ class DashboardManager {
 
     startAutoUpdate() {
         setInterval(async () => {
-            if (!this.isUpdating) {
+            // The stream pushes changes; poll only while it is down
+            if (!this.isUpdating && !globeUpdates.connected) {
                 this.isUpdating = true;
                 await this.fetchTradeData();
                 this.renderTiles();
@@ -559,6 +656,29 @@ class TradeFlowManager {
     
     init() {
         this.loadTradeFlowData();
+        globeUpdates.subscribe(stream => {
+            const tradeFlows = this.toVisualizationFlows(stream.tradeFlows());
+            if (tradeFlows.length > 0) {
+                console.log(`📡 Pushed update: ${tradeFlows.length} trade flows`);
+                this.createTradeFlowVisualizations(tradeFlows);
+            }
+        });
+    }
+    
+    toVisualizationFlows(apiFlows) {
+        return apiFlows.map(flow => ({
+            from: flow.from.country,
+            to: flow.to.country,
+            value: flow.value / 1000000000, // Convert to billions for display
+            type: this.getTradeType(flow.commodity, flow.hs_code),
+            commodity: flow.commodity,
+            hs_code: flow.hs_code,
+            intensity: flow.intensity,
+            coordinates: {
+                from: flow.from.coordinates,
+                to: flow.to.coordinates
+            }
+        }));
     }
     
     async loadTradeFlowData() {
@@ -588,11 +708,11 @@ class TradeFlowManager {
                     }
                 } catch (demoError) {
                     console.log('⚠️ Demo API failed, using standard endpoint:', demoError.message);
-                    const standardResponse = await fetch('/v2/globe/trade-flows?min_value=100000000&period=recent');
+                    const standardResponse = await fetch('/v2/globe/trade-flows?min_value=100000000&period=recent&format=binary');
                     if (!standardResponse.ok) {
                         throw new Error(`Standard API error: ${standardResponse.status}`);
                     }
-                    apiData = await standardResponse.json();
+                    apiData = decodeGlobeFlows(await standardResponse.arrayBuffer());
                     dataSource = "Standard (UN Comtrade)";
                 }
             } else {
@@ -615,11 +735,11 @@ class TradeFlowManager {
                     console.log('⚠️ Enhanced API failed, falling back to standard endpoint:', enhancedError.message);
                     
                     // Fallback to standard endpoint
-                    const standardResponse = await fetch('/v2/globe/trade-flows?min_value=100000000&period=recent');
+                    const standardResponse = await fetch('/v2/globe/trade-flows?min_value=100000000&period=recent&format=binary');
                     if (!standardResponse.ok) {
                         throw new Error(`Standard API error: ${standardResponse.status} ${standardResponse.statusText}`);
                     }
-                    apiData = await standardResponse.json();
+                    apiData = decodeGlobeFlows(await standardResponse.arrayBuffer());
                     dataSource = "Standard (UN Comtrade)";
                     console.log('✅ Successfully loaded standard trade flows');
                 }
@@ -627,19 +747,7 @@ class TradeFlowManager {
             console.log('📊 API Response:', apiData);
             
             // Transform API data format to our visualization format
-            const tradeFlows = apiData.trade_flows?.map(flow => ({
-                from: flow.from.country,
-                to: flow.to.country,
-                value: flow.value / 1000000000, // Convert to billions for display
-                type: this.getTradeType(flow.commodity, flow.hs_code),
-                commodity: flow.commodity,
-                hs_code: flow.hs_code,
-                intensity: flow.intensity,
-                coordinates: {
-                    from: flow.from.coordinates,
-                    to: flow.to.coordinates
-                }
-            })) || [];
+            const tradeFlows = this.toVisualizationFlows(apiData.trade_flows || []);
             
             console.log(`✅ Loaded ${tradeFlows.length} trade flows from ${dataSource} API`);
             console.log(`📈 Total trade value: $${(apiData.trade_flows?.reduce((sum, flow) => sum + flow.value, 0) / 1000000000).toFixed(1)}B`);
@@ -903,9 +1011,9 @@ class TradeFlowManager {
             });
         }
         
-        // Check if we need to refresh data
+        // Check if we need to refresh data (pushed instead while the stream is up)
         const now = Date.now();
-        if (now - this.lastUpdate > this.updateInterval) {
+        if (!globeUpdates.connected && now - this.lastUpdate > this.updateInterval) {
             this.lastUpdate = now;
             console.log('🔄 Auto-refreshing trade flow data...');
             this.loadTradeFlowData();
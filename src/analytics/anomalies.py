@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Period-over-period anomaly detection for /v2/anomalies and the 3D globe
+Reads per-period totals by commodity and trade route from the rollup table
+(anomaly_totals_query in config/queries.py) or, when AGGREGATE_ENGINE=duckdb,
+from the columnar mirror, and flags consecutive periods whose value moved
+by at least the threshold percentage. The REST endpoint and the globe
+stream share this so both see the same anomalies after every ingest.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config.database import db_config, DatabaseConfig
+from config.queries import anomaly_totals_query
+from src.analytics.columnar_mirror import columnar_mirror, use_columnar_mirror, MIRROR_ANOMALY_TOTALS_QUERY
+
+# Joins reporter and partner names in trade_route (see anomaly_totals_query)
+ROUTE_SEPARATOR = " → "
+
+TOP_ANOMALIES = 50
+
+async def fetch_anomaly_totals(db: DatabaseConfig = db_config) -> List[Sequence[Any]]:
+    """(period, commodity, trade_route, total_value) rows from the mirror or the rollup table"""
+    if use_columnar_mirror():
+        return await columnar_mirror.query_async(MIRROR_ANOMALY_TOTALS_QUERY)
+    return await db.execute_query_async(anomaly_totals_query(db.db_type), fetch='all')
+
+def classify_change(change_percent: float) -> str:
+    if abs(change_percent) >= 50:
+        return "HIGH"
+    if abs(change_percent) >= 25:
+        return "MEDIUM"
+    return "LOW"
+
+def detect_anomalies(rows: Iterable[Sequence[Any]], threshold: float = 20.0,
+                     severity: Optional[str] = None,
+                     limit: Optional[int] = TOP_ANOMALIES) -> List[Dict[str, Any]]:
+    """
+    Anomalies from (period, commodity, trade_route, total_value) rows
+
+    Returns:
+        Dicts with the AnomalyResponse fields, most significant change first
+    """
+    # Rollup rows are per HS code and ISO route; names can repeat
+    trade_series: Dict[Tuple[str, str], Dict[str, float]] = {}
+    for period, commodity, route, value in rows:
+        periods = trade_series.setdefault((commodity, route), {})
+        periods[period] = periods.get(period, 0.0) + float(value)
+
+    anomalies = []
+    for (commodity, route), periods in trade_series.items():
+        sorted_periods = sorted(periods)
+        # Check for significant changes between consecutive periods
+        for previous_period, current_period in zip(sorted_periods, sorted_periods[1:]):
+            current_value = periods[current_period]
+            previous_value = periods[previous_period]
+            if previous_value <= 0:  # Avoid division by zero
+                continue
+
+            change_percent = ((current_value - previous_value) / previous_value) * 100
+            if abs(change_percent) < threshold:
+                continue
+            anomaly_severity = classify_change(change_percent)
+            if severity is not None and anomaly_severity != severity:
+                continue
+
+            anomalies.append({
+                "period": current_period,
+                "commodity": commodity,
+                "trade_route": route,
+                "current_value": current_value,
+                "previous_value": previous_value,
+                "change_percent": round(change_percent, 2),
+                "alert_type": "SPIKE" if change_percent > 0 else "DROP",
+                "severity": anomaly_severity,
+            })
+
+    anomalies.sort(key=lambda anomaly: abs(anomaly["change_percent"]), reverse=True)
+    return anomalies if limit is None else anomalies[:limit]
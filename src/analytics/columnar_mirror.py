@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Columnar analytical mirror of trade_flows
+Exports trade_flows as Parquet partitioned by period (plus the countries and
+hs_codes dimensions) and answers the aggregate endpoint queries with DuckDB.
+Only the periods an ingest touched are re-exported.
+
+duckdb and pyarrow are optional: without them the mirror reports itself
+unavailable and the endpoints keep using the database.
+
+Usage:
+    python -m src.analytics.columnar_mirror --refresh            # export every period
+    python -m src.analytics.columnar_mirror --refresh 2024-01    # export some periods
+"""
+
+import argparse
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional
+
+from config.data_version import bump_data_version, data_version
+from config.database import db_config, DatabaseConfig
+from config.rows import Row, decode_rows
+
+try:
+    import duckdb
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    COLUMNAR_AVAILABLE = True
+except ImportError:
+    COLUMNAR_AVAILABLE = False
+
+TRADE_FLOW_EXPORT_QUERY = """
+    SELECT period, reporter_iso, partner_iso, hs6, flow, value_usd, quantity, unit, source
+    FROM trade_flows
+    WHERE period = {p}
+"""
+
+# Aggregate endpoint queries in DuckDB SQL, run against the mirror views
+MIRROR_ANOMALY_TOTALS_QUERY = """
+    SELECT tf.period, hs.description AS commodity,
+           c1.name || ' → ' || c2.name AS trade_route,
+           SUM(tf.value_usd) AS total_value
+    FROM trade_flows tf
+    JOIN countries c1 ON tf.reporter_iso = c1.iso3
+    JOIN countries c2 ON tf.partner_iso = c2.iso3
+    JOIN hs_codes hs ON tf.hs6 = hs.hs6
+    GROUP BY ALL
+    HAVING SUM(tf.value_usd) > 0
+"""
+
+# Same columns as STATS_SNAPSHOT_QUERY, aggregated in one scan of the mirror
+MIRROR_STATS_QUERY = """
+    SELECT tf.period, tf.source, tf.hs6, hs.description,
+           SUM(tf.value_usd) AS total_value, COUNT(*) AS record_count
+    FROM trade_flows tf
+    LEFT JOIN hs_codes hs ON tf.hs6 = hs.hs6
+    GROUP BY ALL
+"""
+
+class ColumnarMirror:
+    """Parquet export of trade_flows queried through an embedded DuckDB"""
+
+    def __init__(self, db: DatabaseConfig = db_config, directory: Optional[str] = None):
+        self.db = db
+        self.directory = directory or os.getenv('ANALYTICS_MIRROR_DIR', 'analytics_mirror')
+        self.logger = db.logger
+        self._connection = None
+        self._lock = threading.Lock()
+        self._last_refresh: Optional[Dict[str, Any]] = None
+
+    @property
+    def trade_flows_dir(self) -> str:
+        return os.path.join(self.directory, 'trade_flows')
+
+    def is_available(self) -> bool:
+        """True when duckdb/pyarrow are installed and the mirror has been exported"""
+        return COLUMNAR_AVAILABLE and os.path.isdir(self.trade_flows_dir) and bool(os.listdir(self.trade_flows_dir))
+
+    def _placeholder_sql(self, template: str) -> str:
+        return template.replace("{p}", '%s' if self.db.db_type == 'mysql' else '?')
+
+    def _write_parquet(self, path: str, table: "pa.Table"):
+        """Write atomically so concurrent readers never see a partial file"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+
+    def _export_dimensions(self):
+        countries = self.db.execute_query("SELECT iso3, name FROM countries")
+        hs_codes = self.db.execute_query("SELECT hs6, description FROM hs_codes")
+        self._write_parquet(os.path.join(self.directory, 'countries.parquet'), pa.table({
+            'iso3': [row['iso3'] for row in countries],
+            'name': [row['name'] for row in countries],
+        }))
+        self._write_parquet(os.path.join(self.directory, 'hs_codes.parquet'), pa.table({
+            'hs6': [row['hs6'] for row in hs_codes],
+            'description': [row['description'] for row in hs_codes],
+        }))
+
+    def _export_period(self, period: str) -> int:
+        """Re-export one period partition, streaming rows from the database"""
+        schema = pa.schema([
+            ('reporter_iso', pa.string()), ('partner_iso', pa.string()), ('hs6', pa.string()),
+            ('flow', pa.string()), ('value_usd', pa.float64()), ('quantity', pa.float64()),
+            ('unit', pa.string()), ('source', pa.string()),
+        ])
+        partition_dir = os.path.join(self.trade_flows_dir, f"period={period}")
+        path = os.path.join(partition_dir, 'data.parquet')
+        os.makedirs(partition_dir, exist_ok=True)
+        tmp_path = path + '.tmp'
+
+        rows = 0
+        with pq.ParquetWriter(tmp_path, schema, compression='zstd') as writer:
+            for batch in self.db.stream_batches(self._placeholder_sql(TRADE_FLOW_EXPORT_QUERY), (period,),
+                                                batch_size=50000):
+                writer.write_table(pa.table({
+                    'reporter_iso': [row['reporter_iso'] for row in batch],
+                    'partner_iso': [row['partner_iso'] for row in batch],
+                    'hs6': [row['hs6'] for row in batch],
+                    'flow': [row['flow'] for row in batch],
+                    'value_usd': [row['value_usd'] for row in batch],
+                    'quantity': [row['quantity'] for row in batch],
+                    'unit': [row['unit'] for row in batch],
+                    'source': [row['source'] for row in batch],
+                }, schema=schema))
+                rows += len(batch)
+
+        if rows:
+            os.replace(tmp_path, path)
+        else:
+            # Period no longer has rows: drop its partition
+            os.remove(tmp_path)
+            shutil.rmtree(partition_dir, ignore_errors=True)
+        return rows
+
+    def refresh(self, periods: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Re-export the given periods (all periods when None) and the dimensions
+
+        Called by BulkLoader after an ingest with the periods it touched.
+        """
+        if not COLUMNAR_AVAILABLE:
+            raise RuntimeError("The columnar mirror needs the duckdb and pyarrow packages")
+
+        started = time.perf_counter()
+        # Replicas may lag the ingest that triggered this refresh
+        with self.db.read_from_primary():
+            if periods is None:
+                periods = [row['period'] for row in
+                           self.db.execute_query("SELECT DISTINCT period FROM trade_flows")]
+            periods = sorted(set(periods))
+
+            self._export_dimensions()
+            rows = sum(self._export_period(period) for period in periods)
+
+        # Responses cached from the mirror's previous contents are now stale
+        with self.db.transaction() as cursor:
+            bump_data_version(cursor, self.db.db_type)
+        data_version.expire()
+
+        self._last_refresh = {
+            'periods': len(periods),
+            'rows': rows,
+            'seconds': round(time.perf_counter() - started, 3),
+            'at': time.time()
+        }
+        self.logger.info(f"Columnar mirror refreshed: {rows} rows in {len(periods)} periods "
+                         f"({self._last_refresh['seconds']}s)")
+        return self._last_refresh
+
+    def _get_connection(self):
+        """In-memory DuckDB with views over the Parquet files (created once)"""
+        if self._connection is None:
+            with self._lock:
+                if self._connection is None:
+                    connection = duckdb.connect()
+                    tf_glob = os.path.join(self.trade_flows_dir, '*', '*.parquet')
+                    connection.execute(
+                        f"CREATE VIEW trade_flows AS SELECT * FROM "
+                        f"read_parquet('{tf_glob}', hive_partitioning = true, hive_types = {{'period': VARCHAR}})"
+                    )
+                    connection.execute(
+                        f"CREATE VIEW countries AS SELECT * FROM "
+                        f"read_parquet('{os.path.join(self.directory, 'countries.parquet')}')"
+                    )
+                    connection.execute(
+                        f"CREATE VIEW hs_codes AS SELECT * FROM "
+                        f"read_parquet('{os.path.join(self.directory, 'hs_codes.parquet')}')"
+                    )
+                    self._connection = connection
+        return self._connection
+
+    def query(self, sql: str, params: Optional[list] = None) -> List[Row]:
+        """Run a DuckDB query against the mirror (blocking; one cursor per call)
+
+        Rows are the same config.rows.Row type DatabaseConfig returns.
+        """
+        cursor = self._get_connection().cursor()
+        try:
+            cursor.execute(sql, params or [])
+            return decode_rows(cursor.description, cursor.fetchall())
+        finally:
+            cursor.close()
+
+    async def query_async(self, sql: str, params: Optional[list] = None) -> List[Row]:
+        """Async variant of query, run on the database worker pool"""
+        return await self.db.run_async(self.query, sql, params)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'available': self.is_available(),
+            'directory': self.directory,
+            'last_refresh': self._last_refresh
+        }
+
+# Global instance shared by the API and the ingest path
+columnar_mirror = ColumnarMirror()
+
+def aggregate_engine() -> str:
+    """Engine for aggregate endpoints: 'database' (default) or 'duckdb' (the columnar mirror)"""
+    return os.getenv('AGGREGATE_ENGINE', 'database').lower()
+
+def use_columnar_mirror() -> bool:
+    """True when aggregate endpoints should read the columnar mirror"""
+    return aggregate_engine() == 'duckdb' and columnar_mirror.is_available()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the columnar analytics mirror")
+    parser.add_argument("--refresh", nargs="*", metavar="PERIOD",
+                        help="Re-export the given periods (all periods if none given)")
+    args = parser.parse_args()
+
+    if args.refresh is not None:
+        print(columnar_mirror.refresh(args.refresh or None))
+    else:
+        parser.print_help()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Summary statistics for /v2/stats
+Folds the rows of STATS_SNAPSHOT_QUERY (config/queries.py) or
+MIRROR_STATS_QUERY (the columnar mirror) into the totals, top commodities
+and per-period and per-source breakdowns in one pass. Both return one row
+per (period, hs6, source), so the cost depends on how many periods, HS
+codes and sources exist, not on the size of trade_flows.
+"""
+
+import heapq
+from typing import Any, Dict, Iterable, Sequence
+
+TOP_COMMODITIES = 5
+
+def summarize_stats(rows: Iterable[Sequence[Any]], top: int = TOP_COMMODITIES) -> Dict[str, Any]:
+    """
+    Summary statistics from (period, source, hs6, description, total_value,
+    record_count) rows
+
+    Returns:
+        Dict with the SummaryStatsResponse fields
+    """
+    total_records = 0
+    total_value = 0.0
+    commodities = set()
+    latest_period = None
+    by_commodity: Dict[str, float] = {}
+    by_period: Dict[str, list] = {}
+    by_source: Dict[str, list] = {}
+
+    for period, source, hs6, description, value, count in rows:
+        if not count:
+            continue
+        value = float(value or 0)
+        total_records += count
+        total_value += value
+        commodities.add(hs6)
+        if latest_period is None or period > latest_period:
+            latest_period = period
+
+        # Descriptions can repeat across HS codes; totals are per name
+        name = description or hs6
+        by_commodity[name] = by_commodity.get(name, 0.0) + value
+        for breakdown, key in ((by_period, period), (by_source, source)):
+            totals = breakdown.get(key)
+            if totals is None:
+                breakdown[key] = [value, count]
+            else:
+                totals[0] += value
+                totals[1] += count
+
+    top_commodities = heapq.nlargest(top, by_commodity.items(), key=lambda item: item[1])
+    return {
+        "total_records": total_records,
+        "total_value": total_value,
+        "unique_commodities": len(commodities),
+        "latest_period": latest_period,
+        "top_commodities": [{"name": name, "value": value} for name, value in top_commodities],
+        "by_period": [
+            {"period": period, "value": value, "records": count}
+            for period, (value, count) in sorted(by_period.items())
+        ],
+        "by_source": [
+            {"source": source, "value": value, "records": count}
+            for source, (value, count) in sorted(by_source.items(), key=lambda item: item[1][0], reverse=True)
+        ],
+    }
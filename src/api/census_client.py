@@ -13,6 +13,8 @@ from datetime import datetime
 import os
 from dotenv import load_dotenv
 
+from src.api.rate_limit import SlidingWindowLimiter
+
 # Load environment variables
 load_dotenv()
 
@@ -23,7 +25,7 @@ class CensusBureauAPIClient:
         # Census API doesn't require authentication for public data
         self.base_url = "https://api.census.gov/data/timeseries/intltrade/imports/hs"
         self.rate_limit = 60  # Conservative rate limit (no official limit stated)
-        self.last_request_time = 0
+        self.limiter = SlidingWindowLimiter(1, 1.0, name='census')
         
         # Semiconductor HS codes from your API docs
         self.semiconductor_hs_codes = {
@@ -48,15 +50,8 @@ class CensusBureauAPIClient:
         }
     
     def _wait_for_rate_limit(self):
-        """Enforce rate limiting to be respectful to Census API"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        # Wait at least 1 second between requests
-        if time_since_last < 1.0:
-            time.sleep(1.0 - time_since_last)
-        
-        self.last_request_time = time.time()
+        """Enforce rate limiting to be respectful to Census API (1 request per second, shared across workers)"""
+        self.limiter.wait()
     
     def get_monthly_imports(self, 
                           hs_code: str,
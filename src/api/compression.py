@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Response compression and precompressed static assets
+Dynamic responses of compressible types are gzip- or brotli-encoded per
+request when the client accepts it and the body is at least
+COMPRESSION_MIN_BYTES. Static assets (the globe scripts, countries.geojson,
+the H100 supply chain flows) are held in memory together with their .gz
+and .br variants, so serving one is a dict lookup instead of a disk read
+plus compression.
+
+Variants come from the build step below when present (`.gz`/`.br` files
+next to the asset, newer than it); otherwise they are compressed once at
+load time. brotli is optional: without it, .br variants are only served
+if the build step produced them on a machine that had it.
+
+Encoded responses get their own strong ETag (`"<etag>-gzip"`, as Apache
+does) and every negotiable response, including a 304 revalidating an
+encoded representation, carries `Vary: Accept-Encoding`.
+
+Usage:
+    python -m src.api.compression --build     # write .gz/.br next to each asset
+"""
+
+import gzip
+import hashlib
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+# Content types worth compressing (prefix match, parameters ignored)
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/geo+json", "application/javascript",
+    "text/", "image/svg+xml",
+    # format=binary globe flows: the JSON header and repeated coordinates shrink well
+    "application/vnd.semiconductor-monitor.globe-flows",
+)
+
+# Preference order when the client accepts several with equal weight
+ENCODINGS = ("br", "gzip")
+FILE_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+def min_compress_bytes() -> int:
+    return int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+
+def gzip_level() -> int:
+    """Level for per-request (dynamic) gzip; static assets always use 9"""
+    return int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith(COMPRESSIBLE_TYPES)
+
+def accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Encodings from an Accept-Encoding header with their q-values"""
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        accepted[name] = weight
+    return accepted
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Iterable[str] = ENCODINGS) -> Optional[str]:
+    """Best encoding the client accepts among those available, or None for identity"""
+    accepted = accepted_encodings(accept_encoding)
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        if encoding not in available:
+            continue
+        weight = accepted.get(encoding, accepted.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+def dynamic_encodings() -> Tuple[str, ...]:
+    """Encodings that can be produced per request"""
+    return ENCODINGS if BROTLI_AVAILABLE else ("gzip",)
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    if encoding == "gzip":
+        # mtime=0 keeps the output (and so the ETag) stable
+        return gzip.compress(body, compresslevel=level or gzip_level(), mtime=0)
+    if encoding == "br":
+        return brotli.compress(body, quality=level or 5)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """Strong ETag of an encoded representation: "abc" -> "abc-gzip" """
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+def strip_encoded_etags(if_none_match: str) -> Tuple[str, Optional[str]]:
+    """
+    If-None-Match with encoding suffixes removed, so inner handlers compare
+    against their identity ETags, plus the suffix that was removed
+    """
+    suffix = None
+    candidates = []
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        for encoding in ENCODINGS:
+            if candidate.endswith(f'-{encoding}"'):
+                candidate = candidate[:-len(encoding) - 2] + '"'
+                suffix = encoding
+                break
+        candidates.append(candidate)
+    return ", ".join(candidates), suffix
+
+def add_vary(headers, value: str = "Accept-Encoding"):
+    """Append to Vary without duplicating it"""
+    current = headers.get("vary")
+    if not current:
+        headers["Vary"] = value
+    elif value.lower() not in [part.strip().lower() for part in current.split(",")]:
+        headers["Vary"] = f"{current}, {value}"
+
+CONTENT_TYPES = {
+    ".js": "application/javascript",
+    ".json": "application/json",
+    ".geojson": "application/geo+json",
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css",
+}
+
+@dataclass
+class StaticAsset:
+    path: str
+    content_type: str
+    mtime: float
+    etag: str
+    # encoding ('identity', 'gzip', 'br') -> body
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+def _read_variant(path: str, encoding: str, mtime: float) -> Optional[bytes]:
+    """A build-time variant of path, if it exists and is not older than the source"""
+    variant_path = path + FILE_SUFFIXES[encoding]
+    try:
+        if os.path.getmtime(variant_path) >= mtime:
+            with open(variant_path, "rb") as handle:
+                return handle.read()
+    except OSError:
+        pass
+    return None
+
+def load_asset(path: str) -> StaticAsset:
+    """Read an asset and its compressed variants (compressing any not built)"""
+    mtime = os.path.getmtime(path)
+    with open(path, "rb") as handle:
+        body = handle.read()
+    extension = os.path.splitext(path)[1].lower()
+    asset = StaticAsset(
+        path=path,
+        content_type=CONTENT_TYPES.get(extension, "application/octet-stream"),
+        mtime=mtime,
+        etag=f'"s-{hashlib.sha1(body).hexdigest()[:24]}"',
+        variants={"identity": body}
+    )
+    if is_compressible(asset.content_type) and len(body) >= min_compress_bytes():
+        for encoding in ENCODINGS:
+            variant = _read_variant(path, encoding, mtime)
+            if variant is None and (encoding == "gzip" or BROTLI_AVAILABLE):
+                variant = compress(body, encoding, 9 if encoding == "gzip" else 11)
+            # A variant that does not shrink the asset is not worth serving
+            if variant is not None and len(variant) < len(body):
+                asset.variants[encoding] = variant
+    return asset
+
+class StaticAssets:
+    """In-memory store of static files keyed by path; reloads a file when it changes"""
+
+    def __init__(self, root: str = "."):
+        self.root = root
+        self._assets: Dict[str, StaticAsset] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[StaticAsset]:
+        """The asset for a file name relative to root, or None if it does not exist"""
+        path = os.path.join(self.root, name)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        asset = self._assets.get(path)
+        if asset is None or asset.mtime != mtime:
+            with self._lock:
+                asset = self._assets.get(path)
+                if asset is None or asset.mtime != mtime:
+                    asset = load_asset(path)
+                    self._assets[path] = asset
+        return asset
+
+    def select(self, asset: StaticAsset, accept_encoding: Optional[str]) -> Tuple[bytes, Dict[str, str]]:
+        """Body and headers of the best variant for a request"""
+        encoding = negotiate_encoding(accept_encoding, asset.variants)
+        headers = {"Content-Type": asset.content_type, "Cache-Control": "no-cache"}
+        if len(asset.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding is None:
+            headers["ETag"] = asset.etag
+            return asset.variants["identity"], headers
+        headers["ETag"] = encoded_etag(asset.etag, encoding)
+        headers["Content-Encoding"] = encoding
+        return asset.variants[encoding], headers
+
+# Files served by the API's static routes, precompressed by --build
+STATIC_ASSET_FILES = (
+    "globe.js", "globe-static.js", "h100-supply-chain.js", "h100_supply_chain_flows.js",
+    "debug-logger.js", "countries.geojson", "h100_supply_chain_flows.json",
+    "static-trade-flows.json", "index.html", "world.html",
+)
+
+def build_precompressed(names: Iterable[str] = STATIC_ASSET_FILES, root: str = ".") -> List[str]:
+    """Write .gz (and .br when brotli is installed) next to each asset"""
+    written = []
+    for name in names:
+        path = os.path.join(root, name)
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as handle:
+            body = handle.read()
+        if not is_compressible(CONTENT_TYPES.get(os.path.splitext(path)[1].lower())) \
+                or len(body) < min_compress_bytes():
+            continue
+        encodings = ENCODINGS if BROTLI_AVAILABLE else ("gzip",)
+        for encoding in encodings:
+            variant_path = path + FILE_SUFFIXES[encoding]
+            with open(variant_path, "wb") as handle:
+                handle.write(compress(body, encoding, 9 if encoding == "gzip" else 11))
+            written.append(f"{variant_path} ({len(body):,} -> {os.path.getsize(variant_path):,} bytes)")
+    return written
+
+# Global instance used by the API's static routes
+static_assets = StaticAssets()
+
+if __name__ == "__main__":
+    if "--build" not in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+    if not BROTLI_AVAILABLE:
+        print("brotli is not installed; writing .gz variants only")
+    for line in build_precompressed():
+        print(line)
@@ -14,6 +14,8 @@ from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 
+from src.api.rate_limit import SlidingWindowLimiter
+
 # Load environment variables
 load_dotenv()
 
@@ -24,9 +26,8 @@ class ComtradeAPIClient:
         self.api_key = os.getenv('UN_COMTRADE_API_KEY')
         self.base_url = "https://comtradeapi.un.org/data/v1/getDA"
         self.rate_limit = 100  # requests per minute for authenticated users
-        self.last_request_time = 0
-        self.request_count = 0
-        self.request_window_start = time.time()
+        # One start per 0.6 s keeps within 100/minute without bursts
+        self.limiter = SlidingWindowLimiter(1, 60.0 / self.rate_limit, name='comtrade')
         
         # Semiconductor HS codes we're monitoring (from research)
         self.target_hs_codes = {
@@ -52,30 +53,8 @@ class ComtradeAPIClient:
         }
     
     def _wait_for_rate_limit(self):
-        """Enforce rate limiting (100 requests per minute)"""
-        current_time = time.time()
-        
-        # Reset counter if we're in a new minute window
-        if current_time - self.request_window_start >= 60:
-            self.request_count = 0
-            self.request_window_start = current_time
-        
-        # If we've hit the rate limit, wait
-        if self.request_count >= self.rate_limit:
-            wait_time = 60 - (current_time - self.request_window_start)
-            if wait_time > 0:
-                print(f"Rate limit reached, waiting {wait_time:.1f} seconds...")
-                time.sleep(wait_time)
-                self.request_count = 0
-                self.request_window_start = time.time()
-        
-        # Minimum delay between requests to be respectful
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < 0.6:  # 100 req/min = 1 request per 0.6 seconds
-            time.sleep(0.6 - time_since_last)
-        
-        self.last_request_time = time.time()
-        self.request_count += 1
+        """Enforce rate limiting (100 requests per minute, shared across workers)"""
+        self.limiter.wait()
     
     def get_bilateral_flows(self, reporter_code: str, partner_code: str, 
                            hs_code: str, year: str = "2023", 
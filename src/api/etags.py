@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+ETags and conditional GET for the read endpoints
+Responses that depend only on the database (the response cache's paths)
+get an ETag derived from the data version and the normalized request, so an
+If-None-Match revalidation is answered with 304 before the endpoint runs:
+no query, no serialization, no body. Other read endpoints get an ETag
+hashed from the body they produced, which still saves the transfer.
+"""
+
+import hashlib
+from typing import Optional
+
+# Other read endpoints (external APIs, or errors reported in a 200 body): ETag from the body
+BODY_ETAG_PATHS = frozenset({
+    "/v2/economic-context",
+    "/v2/globe/anomalies",
+    "/v2/globe/trade-flows-enhanced",
+    "/v2/globe/economic-context",
+    "/v2/globe/trade-flows-demo",
+    "/v2/usitc/status",
+    "/v2/usitc/us-imports",
+})
+
+# Clients may reuse a stored response but must revalidate it first
+REVALIDATE = "no-cache"
+
+def version_etag(cache_key: str, data_version: int, salt: str = "") -> str:
+    """
+    Strong ETag for a database-backed response
+
+    The salt (the API version) changes ETags when a deploy may change
+    response shapes without any new data.
+    """
+    digest = hashlib.sha1(f"{salt}|{data_version}|{cache_key}".encode()).hexdigest()[:24]
+    return f'"v{data_version}-{digest}"'
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag from the response bytes"""
+    return f'"b-{hashlib.sha1(body).hexdigest()[:24]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches an ETag
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match, so
+    W/"x" matches "x".
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
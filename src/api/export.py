@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Streaming encoders for /v2/export
+Each encoder turns an async iterator of row batches (DatabaseConfig.
+stream_batches_async) into an async iterator of byte chunks, one chunk per
+batch, so an export holds one batch in memory however many rows it has.
+The response is sent with chunked transfer encoding and the client's read
+rate paces the database reads.
+
+A streaming export keeps its pooled connection until the client has read
+everything, so only EXPORT_MAX_CONCURRENT exports read at once (fewer than
+the pool has connections); the others wait for a slot holding none.
+
+Formats: NDJSON (orjson when installed), CSV, and Arrow IPC stream (needs
+the optional pyarrow package).
+"""
+
+import asyncio
+import csv
+import io
+import json
+import os
+from typing import AsyncIterator, Dict, List, Sequence
+
+from config.rows import Row
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+# Column types of TRADE_EXPORT_QUERY, for the Arrow schema
+EXPORT_COLUMNS = (
+    ("period", "string"), ("reporter", "string"), ("reporter_iso", "string"),
+    ("partner", "string"), ("partner_iso", "string"), ("commodity", "string"),
+    ("hs6", "string"), ("flow", "string"), ("value_usd", "float64"),
+    ("quantity", "float64"), ("unit", "string"), ("source", "string"),
+)
+
+def export_batch_size() -> int:
+    """Rows fetched and encoded per chunk"""
+    return int(os.getenv('EXPORT_BATCH_SIZE', '10000'))
+
+def max_concurrent_exports(pool_size: int) -> int:
+    """Exports read at once: a quarter of the pool by default, always leaving a connection free"""
+    limit = int(os.getenv('EXPORT_MAX_CONCURRENT', str(pool_size // 4)))
+    return max(1, min(limit, pool_size - 1))
+
+Batches = AsyncIterator[List[Row]]
+
+async def limit_concurrency(batches: Batches, slots: asyncio.Semaphore) -> Batches:
+    """
+    Read batches once one of slots is free
+
+    The connection is checked out on the first read, so a waiting export
+    holds none, and it is returned (batches closed) before the slot is.
+    """
+    async with slots:
+        try:
+            async for rows in batches:
+                yield rows
+        finally:
+            await batches.aclose()
+
+async def empty_batches() -> Batches:
+    """No rows (a filter matched nothing); encoders still emit headers/schema"""
+    return
+    yield
+
+async def encode_ndjson(batches: Batches) -> AsyncIterator[bytes]:
+    fields = [name for name, _ in EXPORT_COLUMNS]
+    if ORJSON_AVAILABLE:
+        dumps = orjson.dumps
+    else:
+        def dumps(record):
+            return json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode()
+    async for rows in batches:
+        yield b"\n".join(dumps(dict(zip(fields, row))) for row in rows) + b"\n"
+
+async def encode_csv(batches: Batches) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(name for name, _ in EXPORT_COLUMNS)
+    yield buffer.getvalue().encode()
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+
+class _ChunkSink:
+    """File-like object the Arrow stream writer writes into; drained after each batch"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+async def encode_arrow(batches: Batches) -> AsyncIterator[bytes]:
+    """Arrow IPC stream: the schema, one record batch per row batch, end-of-stream marker"""
+    schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in EXPORT_COLUMNS])
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    async for rows in batches:
+        columns = list(zip(*rows))
+        writer.write_batch(pa.record_batch(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema
+        ))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+# format -> (encoder, media type, file extension)
+EXPORT_FORMATS: Dict[str, Sequence] = {
+    "ndjson": (encode_ndjson, "application/x-ndjson", "ndjson"),
+    "csv": (encode_csv, "text/csv; charset=utf-8", "csv"),
+    "arrow": (encode_arrow, "application/vnd.apache.arrow.stream", "arrow"),
+}
+
+def format_available(name: str) -> bool:
+    return name != "arrow" or ARROW_AVAILABLE
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Fast JSON path for row-heavy responses
+With API_FAST_JSON=true, endpoints that return many rows build the
+response straight from the database rows: one dict per row holding only
+the response model's fields, encoded with orjson. This skips building a
+Pydantic object per row, re-validating it against response_model and
+encoding it with the json module. The response model is still declared on
+the route, so OpenAPI documents the same schema.
+
+The rows must already have the model's types (config/rows.py decodes
+DECIMAL columns to float). orjson is optional: without it the endpoints
+keep the model path.
+"""
+
+import os
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Dict, List, Sequence, Tuple, Type
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from config.rows import Row
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+def fast_json_enabled() -> bool:
+    """True when row-heavy endpoints should bypass per-row models"""
+    return os.getenv('API_FAST_JSON', 'false').lower() == 'true' and ORJSON_AVAILABLE
+
+@lru_cache(maxsize=64)
+def model_fields(model: Type[BaseModel]) -> Tuple[str, ...]:
+    """Field names of a response model, in declaration order"""
+    return tuple(model.model_fields)
+
+def rows_as_dicts(rows: Sequence[Row], fields: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    """Project rows onto fields (extra columns such as keyset ids are dropped)"""
+    if not rows:
+        return []
+    positions = tuple(rows[0]._index[name] for name in fields)
+    if positions == tuple(range(len(fields))):
+        # Fields are a prefix of the columns: zip stops at the last field
+        return [dict(zip(fields, row)) for row in rows]
+    pick = itemgetter(*positions) if len(positions) > 1 else (lambda row: (row[positions[0]],))
+    return [dict(zip(fields, pick(row))) for row in rows]
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
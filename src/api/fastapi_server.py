@@ -4,41 +4,193 @@ FastAPI Server for Semiconductor Trade Monitor
 Production-ready REST API with real database integration
 """
 
-from fastapi import FastAPI, HTTPException, Query, Depends, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, Query, Depends, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Union, Tuple
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 import asyncio
 import logging
+import time
+from contextlib import asynccontextmanager
 
 # Load environment variables
 load_dotenv()
 
 # Import database configuration and API clients
 from config.database import db_config
+from config.query_stats import endpoint_context
+from config.rows import Row
+from config.data_version import data_version
+from config.migrations import apply_migrations
+from config.queries import (
+    TRADE_SERIES_QUERY, TRADE_EXPORT_QUERY, STATS_SNAPSHOT_QUERY
+)
 from src.api.comtrade_client import ComtradeAPIClient
 from src.api.usitc_client import USITCAPIClient
 from src.api.fred_client import FREDAPIClient
 from src.api.trade_visualization_client import visualization_client
+from src.api.pagination import encode_cursor, decode_cursor, InvalidCursorError
+from src.api.filter_index import name_index
+from src.api.response_cache import response_cache, cache_key, CachedResponse
+from src.api.fast_json import FastJSONResponse, fast_json_enabled, model_fields, rows_as_dicts
+from src.api.compression import (
+    static_assets, is_compressible, min_compress_bytes, negotiate_encoding, dynamic_encodings,
+    compress, encoded_etag, strip_encoded_etags, add_vary
+)
+from src.api.globe_stream import globe_updates
+from src.api.single_flight import single_flight
+from src.api.export import (
+    EXPORT_FORMATS, format_available, export_batch_size, empty_batches,
+    max_concurrent_exports, limit_concurrency
+)
+from src.api.globe_binary import (
+    ARROW_AVAILABLE as GLOBE_ARROW_AVAILABLE, ARROW_MEDIA_TYPE, BINARY_MEDIA_TYPE,
+    encode_binary as encode_globe_binary, encode_arrow as encode_globe_arrow
+)
+from src.api.etags import BODY_ETAG_PATHS, REVALIDATE, version_etag, body_etag, etag_matches
+from src.analytics.columnar_mirror import (
+    columnar_mirror, aggregate_engine, use_columnar_mirror,
+    MIRROR_STATS_QUERY
+)
+from src.analytics.summary_stats import summarize_stats
+from src.analytics.anomalies import fetch_anomaly_totals, detect_anomalies
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Bring the database schema up to date before serving requests; close the globe stream on shutdown"""
+    if os.getenv('DB_AUTO_MIGRATE', 'true').lower() == 'true':
+        await db_config.run_async(apply_migrations)
+    yield
+    await globe_updates.close()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Semiconductor Trade Monitor API",
     description="Production REST API for global semiconductor trade flow analysis",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
+@app.middleware("http")
+async def serve_read_responses(request: Request, call_next):
+    """
+    Conditional GET and the response cache for the read endpoints
+    (see src/api/etags.py and src/api/response_cache.py)
+
+    Database-backed responses carry an ETag derived from the data version,
+    so a matching If-None-Match gets a 304 before the endpoint runs.
+    Registered before CORS so it sits inside it: CORS headers depend on the
+    request's Origin and are never stored.
+    """
+    if request.method != "GET":
+        return await call_next(request)
+    path = request.url.path
+    if_none_match = request.headers.get("if-none-match")
+
+    key = cache_key(path, request.query_params.multi_items())
+    if key is None:
+        if path not in BODY_ETAG_PATHS:
+            return await call_next(request)
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = body_etag(body)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": REVALIDATE})
+        headers = {name: value for name, value in response.headers.items() if name.lower() != "content-length"}
+        headers.update({"ETag": etag, "Cache-Control": REVALIDATE})
+        return Response(body, status_code=response.status_code, headers=headers)
+
+    version = await data_version.current_async()
+    if version is None:
+        return await call_next(request)
+    etag = version_etag(key, version, app.version)
+    validators = {"ETag": etag, "Cache-Control": REVALIDATE}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=validators)
+
+    if not response_cache.enabled:
+        response = await call_next(request)
+        if response.status_code == 200:
+            response.headers.update(validators)
+        return response
+
+    entry = await response_cache.get_async(key, version)
+    if entry is not None:
+        response = Response(entry.body, status_code=entry.status_code, headers=dict(entry.headers))
+        response.headers.update({**validators, "X-Cache": "HIT"})
+        return response
+
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    headers = [(name, value) for name, value in response.headers.items() if name.lower() != "content-length"]
+    await response_cache.put_async(key, CachedResponse(
+        body=body, status_code=response.status_code, headers=headers,
+        version=version, stored_at=time.time()
+    ))
+    response = Response(body, status_code=response.status_code, headers=dict(headers))
+    response.headers.update({**validators, "X-Cache": "MISS"})
+    return response
+
+@app.middleware("http")
+async def compress_responses(request: Request, call_next):
+    """
+    gzip/brotli for dynamic responses of at least COMPRESSION_MIN_BYTES
+
+    Wraps serve_read_responses, so cached bodies and version ETags stay
+    identity-encoded: encoded responses get "<etag>-<encoding>", and that
+    suffix is removed from If-None-Match on the way in. Streamed responses
+    (no Content-Length) and already-encoded ones pass through.
+    """
+    suffix = None
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        stripped, suffix = strip_encoded_etags(if_none_match)
+        if suffix:
+            request.scope["headers"] = [
+                (name, stripped.encode("latin-1") if name == b"if-none-match" else value)
+                for name, value in request.scope["headers"]
+            ]
+
+    response = await call_next(request)
+    if response.status_code == 304:
+        if suffix and "etag" in response.headers:
+            # Revalidating an encoded representation: the 304 carries what
+            # its 200 did (the inner 304s already set Cache-Control)
+            response.headers["ETag"] = encoded_etag(response.headers["etag"], suffix)
+            add_vary(response.headers)
+        return response
+    if "content-encoding" in response.headers or not is_compressible(response.headers.get("content-type")):
+        return response
+    length = response.headers.get("content-length")
+    if length is None or int(length) < min_compress_bytes():
+        return response
+
+    add_vary(response.headers)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), dynamic_encodings())
+    if encoding is None:
+        return response
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    headers = {name: value for name, value in response.headers.items() if name.lower() != "content-length"}
+    headers["Content-Encoding"] = encoding
+    if "etag" in headers:
+        headers["etag"] = encoded_etag(headers["etag"], encoding)
+    return Response(compress(body, encoding), status_code=response.status_code, headers=headers)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -46,78 +198,102 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Cache", "ETag", "X-Timed-Out-Series"],
 )
 
+@app.middleware("http")
+async def attribute_queries_to_endpoint(request: Request, call_next):
+    """Tag database queries run for this request with its path (see /internal/db-stats)"""
+    with endpoint_context(request.url.path):
+        return await call_next(request)
+
 # Mount static files for the 3D globe visualization
 app.mount("/node_modules", StaticFiles(directory="node_modules"), name="node_modules")
 
-# Serve specific files needed for the globe
-from fastapi import Request
-from fastapi.responses import FileResponse
+# Serve specific files needed for the globe (held in memory with their
+# compressed variants, see src/api/compression.py)
+def serve_static_asset(request: Request, name: str) -> Response:
+    asset = static_assets.get(name)
+    if asset is None:
+        raise HTTPException(status_code=404, detail=f"{name} not found")
+    body, headers = static_assets.select(asset, request.headers.get("accept-encoding"))
+    # compress_responses has already reduced encoded ETags to the identity one
+    if etag_matches(request.headers.get("if-none-match"), asset.etag):
+        headers = {key: value for key, value in headers.items() if key in ("Cache-Control", "Vary")}
+        return Response(status_code=304, headers={**headers, "ETag": asset.etag})
+    return Response(body, headers=headers)
 
 @app.get("/world.js")
-async def serve_world_js():
-    return FileResponse("world.js")
+async def serve_world_js(request: Request):
+    return serve_static_asset(request, "world.js")
 
 @app.get("/world-simple.js")
-async def serve_world_simple_js():
-    return FileResponse("world-simple.js")
+async def serve_world_simple_js(request: Request):
+    return serve_static_asset(request, "world-simple.js")
 
 @app.get("/world-original.js")
-async def serve_world_original_js():
-    return FileResponse("world-original.js")
+async def serve_world_original_js(request: Request):
+    return serve_static_asset(request, "world-original.js")
 
 @app.get("/globe.js")
-async def serve_globe_js():
-    return FileResponse("globe.js")
+async def serve_globe_js(request: Request):
+    return serve_static_asset(request, "globe.js")
 
-@app.get("/world.geojson") 
-async def serve_world_geojson():
-    return FileResponse("world.geojson")
+@app.get("/world.geojson")
+async def serve_world_geojson(request: Request):
+    return serve_static_asset(request, "world.geojson")
 
 @app.get("/world-trade.js")
-async def serve_world_trade_js():
-    return FileResponse("world-trade.js")
+async def serve_world_trade_js(request: Request):
+    return serve_static_asset(request, "world-trade.js")
 
 @app.get("/test-simple")
-async def serve_test_simple():
-    return FileResponse("test-simple.html")
+async def serve_test_simple(request: Request):
+    return serve_static_asset(request, "test-simple.html")
 
 @app.get("/test-minimal")
-async def serve_test_minimal():
-    return FileResponse("test-minimal.html")
+async def serve_test_minimal(request: Request):
+    return serve_static_asset(request, "test-minimal.html")
 
 @app.get("/world-minimal.js")
-async def serve_world_minimal_js():
-    return FileResponse("world-minimal.js")
+async def serve_world_minimal_js(request: Request):
+    return serve_static_asset(request, "world-minimal.js")
 
 @app.get("/debug-logger.js")
-async def serve_debug_logger_js():
-    return FileResponse("debug-logger.js")
+async def serve_debug_logger_js(request: Request):
+    return serve_static_asset(request, "debug-logger.js")
 
 @app.get("/test-complete")
-async def serve_test_complete():
-    return FileResponse("test-complete.html")
+async def serve_test_complete(request: Request):
+    return serve_static_asset(request, "test-complete.html")
 
 @app.get("/globe-working")
-async def serve_globe_working():
-    return FileResponse("globe-working.html")
+async def serve_globe_working(request: Request):
+    return serve_static_asset(request, "globe-working.html")
 
 @app.get("/globe-fixed")
-async def serve_globe_fixed():
-    return FileResponse("globe-fixed.html")
+async def serve_globe_fixed(request: Request):
+    return serve_static_asset(request, "globe-fixed.html")
 
 @app.get("/globe-test")
-async def serve_globe_test():
-    return FileResponse("globe-test.html")
+async def serve_globe_test(request: Request):
+    return serve_static_asset(request, "globe-test.html")
 
 @app.get("/globe_github.html")
-async def serve_globe_github_html():
-    return FileResponse("globe_github.html")
+async def serve_globe_github_html(request: Request):
+    return serve_static_asset(request, "globe_github.html")
 
 @app.get("/globe_github.js")
-async def serve_globe_github_js():
-    return FileResponse("globe_github.js")
+async def serve_globe_github_js(request: Request):
+    return serve_static_asset(request, "globe_github.js")
+
+@app.get("/countries.geojson")
+async def serve_countries_geojson(request: Request):
+    return serve_static_asset(request, "countries.geojson")
+
+@app.get("/h100_supply_chain_flows.json")
+async def serve_h100_supply_chain_flows(request: Request):
+    return serve_static_asset(request, "h100_supply_chain_flows.json")
 
 @app.post("/write-debug-file")
 async def write_debug_file(request: Request):
@@ -170,8 +346,10 @@ class SummaryStatsResponse(BaseModel):
     total_records: int
     total_value: float
     unique_commodities: int
-    latest_period: str
+    latest_period: Optional[str] = None
     top_commodities: List[Dict[str, Union[str, float]]]
+    by_period: List[Dict[str, Union[str, float, int]]] = []
+    by_source: List[Dict[str, Union[str, float, int]]] = []
 
 class EconomicIndicatorResponse(BaseModel):
     series_id: str
@@ -185,6 +363,8 @@ class APIStatusResponse(BaseModel):
     database_type: str
     timestamp: str
     apis_available: Dict[str, bool]
+    database_pool: Optional[Dict[str, Any]] = None
+    aggregate_engine: Optional[Dict[str, Any]] = None
 
 # Health check endpoint
 @app.get("/health", response_model=APIStatusResponse)
@@ -192,7 +372,7 @@ async def health_check():
     """Health check endpoint for monitoring"""
     
     # Test database connection
-    db_status = db_config.test_connection()
+    db_status = await db_config.test_connection_async()
     
     # Check API availability (simplified)
     apis_status = {
@@ -206,120 +386,210 @@ async def health_check():
         status="healthy" if all(apis_status.values()) else "degraded",
         database_type=db_status.get("database_type", "unknown"),
         timestamp=datetime.now().isoformat(),
-        apis_available=apis_status
+        apis_available=apis_status,
+        database_pool=db_config.pool_status(),
+        aggregate_engine={
+            "configured": aggregate_engine(),
+            "active": "duckdb" if use_columnar_mirror() else "database",
+            "columnar_mirror": columnar_mirror.status()
+        }
     )
 
+@app.get("/internal/db-stats", include_in_schema=False)
+async def database_query_stats(
+    top: int = Query(20, ge=1, le=500, description="Number of query fingerprints to return"),
+    reset: bool = Query(False, description="Clear the statistics after reading them")
+):
+    """Per-query latency histograms, slow-query log and connection pool usage"""
+    stats = db_config.query_stats.snapshot(top)
+    if reset:
+        db_config.query_stats.reset()
+    return {**stats, "database_pool": db_config.pool_status()}
+
+@app.get("/internal/cache-stats", include_in_schema=False)
+async def response_cache_stats(
+    reset: bool = Query(False, description="Clear the hit/miss counters after reading them")
+):
+    """Response cache hit/miss ratios and occupancy"""
+    stats = response_cache.stats()
+    if reset:
+        response_cache.reset_stats()
+    # Counters are per worker; the pid tells which one answered
+    return {**stats, "data_version": await data_version.current_async(), "worker_pid": os.getpid()}
+
+@app.get("/internal/coalescing-stats", include_in_schema=False)
+async def request_coalescing_stats(
+    reset: bool = Query(False, description="Clear the counters after reading them")
+):
+    """Computations and coalesced requests of the single-flight endpoints (this worker)"""
+    stats = single_flight.stats()
+    if reset:
+        single_flight.reset_stats()
+    return {**stats, "worker_pid": os.getpid()}
+
+@app.get("/internal/stream-stats", include_in_schema=False)
+async def globe_stream_stats():
+    """Subscribers and broadcast counts of the /v2/globe/stream channel"""
+    return globe_updates.stats()
+
 # Trade data endpoints
+async def fetch_trade_series_rows(
+    commodity: Optional[str] = None,
+    reporter: Optional[str] = None,
+    partner: Optional[str] = None,
+    start_period: Optional[str] = None,
+    end_period: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> Tuple[List[Row], Optional[str]]:
+    """
+    One page of /v2/series rows and the cursor for the next page (None on the last)
+
+    Pages are keyed on (period, value_usd, id), so every page costs one index
+    seek no matter how deep into the result it is.
+    """
+    filters = {
+        "commodity": commodity, "reporter": reporter, "partner": partner,
+        "start_period": start_period, "end_period": end_period
+    }
+    try:
+        after = decode_cursor(cursor, filters)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        # Resolve name searches to key sets; a search matching nothing means no rows
+        keys = await name_index.match_filters(commodity, reporter, partner)
+        if keys is None:
+            return [], None
+        hs6, reporter_iso, partner_iso = keys
+        
+        query, params = TRADE_SERIES_QUERY.build(
+            db_config.db_type,
+            hs6=hs6,
+            reporter_iso=reporter_iso,
+            partner_iso=partner_iso,
+            start_period=start_period,
+            end_period=end_period,
+            after=after,
+            after_period=after[0] if after else None,
+            limit=limit + 1  # One extra row tells us whether another page exists
+        )
+        
+        rows = await db_config.execute_query_async(query, params, fetch='all', prepared=True)
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor((last.period, last.value_usd, last.id), filters)
+        
+        return rows, next_cursor
+        
+    except Exception as e:
+        logger.error(f"Error fetching trade series: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+async def fetch_trade_series_page(
+    commodity: Optional[str] = None,
+    reporter: Optional[str] = None,
+    partner: Optional[str] = None,
+    start_period: Optional[str] = None,
+    end_period: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> Tuple[List[TradeFlowResponse], Optional[str]]:
+    """One page of /v2/series as response models and the cursor for the next page"""
+    rows, next_cursor = await fetch_trade_series_rows(
+        commodity, reporter, partner, start_period, end_period, limit, cursor
+    )
+    # Column aliases match the response model, so rows validate directly
+    return [TradeFlowResponse.model_validate(row.as_dict()) for row in rows], next_cursor
+
 @app.get("/v2/series", response_model=List[TradeFlowResponse])
 async def get_trade_series(
+    response: Response,
     commodity: Optional[str] = Query(None, description="Filter by commodity (e.g., 'HBM', 'GPU')"),
     reporter: Optional[str] = Query(None, description="Filter by reporter country"),
     partner: Optional[str] = Query(None, description="Filter by partner country"),
     start_period: Optional[str] = Query(None, description="Start period (YYYY)"),
     end_period: Optional[str] = Query(None, description="End period (YYYY)"),
-    limit: int = Query(100, le=1000, description="Maximum number of records to return")
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header")
 ):
     """
     Get semiconductor trade time series data with optional filters
     
     Returns trade flow records from the database with applied filters.
+    When more rows match, the X-Next-Cursor response header holds the
+    cursor for the next page; pass it back with the same filters.
     """
     
-    try:
-        # Build query with filters
-        query = """
-            SELECT 
-                tf.period,
-                c1.name as reporter,
-                c2.name as partner,
-                hs.description as commodity,
-                tf.hs6,
-                tf.value_usd,
-                tf.quantity,
-                tf.unit
-            FROM trade_flows tf
-            JOIN countries c1 ON tf.reporter_iso = c1.iso3
-            JOIN countries c2 ON tf.partner_iso = c2.iso3
-            JOIN hs_codes hs ON tf.hs6 = hs.hs6
-            WHERE 1=1
-        """
-        
-        params = []
-        
-        if commodity:
-            if db_config.db_type == 'mysql':
-                query += " AND hs.description LIKE %s"
-            else:
-                query += " AND hs.description LIKE ?"
-            params.append(f"%{commodity}%")
-        
-        if reporter:
-            if db_config.db_type == 'mysql':
-                query += " AND c1.name LIKE %s"
-            else:
-                query += " AND c1.name LIKE ?"
-            params.append(f"%{reporter}%")
-        
-        if partner:
-            if db_config.db_type == 'mysql':
-                query += " AND c2.name LIKE %s"
-            else:
-                query += " AND c2.name LIKE ?"
-            params.append(f"%{partner}%")
-        
-        if start_period:
-            if db_config.db_type == 'mysql':
-                query += " AND tf.period >= %s"
-            else:
-                query += " AND tf.period >= ?"
-            params.append(start_period)
-        
-        if end_period:
-            if db_config.db_type == 'mysql':
-                query += " AND tf.period <= %s"
-            else:
-                query += " AND tf.period <= ?"
-            params.append(end_period)
-        
-        query += f" ORDER BY tf.period DESC, tf.value_usd DESC LIMIT {limit}"
-        
-        rows = db_config.execute_query(query, tuple(params), fetch='all')
-        
-        # Convert to response models
-        trade_flows = []
-        for row in rows:
-            if isinstance(row, dict):
-                # MySQL returns dict
-                trade_flows.append(TradeFlowResponse(
-                    period=row['period'],
-                    reporter=row['reporter'],
-                    partner=row['partner'],
-                    commodity=row['commodity'],
-                    hs6=row['hs6'],
-                    value_usd=float(row['value_usd']) if row['value_usd'] else 0.0,
-                    quantity=float(row['quantity']) if row['quantity'] else None,
-                    unit=row['unit']
-                ))
-            else:
-                # SQLite returns tuple
-                trade_flows.append(TradeFlowResponse(
-                    period=row[0],
-                    reporter=row[1],
-                    partner=row[2],
-                    commodity=row[3],
-                    hs6=row[4],
-                    value_usd=float(row[5]) if row[5] else 0.0,
-                    quantity=float(row[6]) if row[6] else None,
-                    unit=row[7]
-                ))
-        
-        return trade_flows
-        
-    except Exception as e:
-        logger.error(f"Error fetching trade series: {e}")
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if fast_json_enabled():
+        rows, next_cursor = await fetch_trade_series_rows(
+            commodity, reporter, partner, start_period, end_period, limit, cursor
+        )
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+        return FastJSONResponse(rows_as_dicts(rows, model_fields(TradeFlowResponse)), headers=headers)
+    
+    trade_flows, next_cursor = await fetch_trade_series_page(
+        commodity, reporter, partner, start_period, end_period, limit, cursor
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return trade_flows
+
+# Exports hold a connection while the client reads; keep the rest of the pool for other endpoints
+export_slots = asyncio.Semaphore(max_concurrent_exports(db_config.pool_size))
+
+@app.get("/v2/export")
+async def export_trade_flows(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|arrow)$", description="ndjson, csv or arrow (Arrow IPC stream)"),
+    commodity: Optional[str] = Query(None, description="Filter by commodity (e.g., 'HBM', 'GPU')"),
+    reporter: Optional[str] = Query(None, description="Filter by reporter country"),
+    partner: Optional[str] = Query(None, description="Filter by partner country"),
+    start_period: Optional[str] = Query(None, description="Start period (YYYY)"),
+    end_period: Optional[str] = Query(None, description="End period (YYYY)")
+):
+    """
+    Stream every trade flow matching the /v2/series filters
+    
+    The result is read with a streaming cursor and sent in chunks as it is
+    encoded, so exports of any size use constant server memory. Rows are
+    not sorted. At most EXPORT_MAX_CONCURRENT exports read at once; the
+    others wait for a slot (src/api/export.py).
+    """
+    
+    if not format_available(format):
+        raise HTTPException(status_code=406, detail="Arrow export needs the optional pyarrow package")
+    encode, media_type, extension = EXPORT_FORMATS[format]
+    
+    keys = await name_index.match_filters(commodity, reporter, partner)
+    if keys is None:
+        # Nothing matches: an empty export in the requested format
+        batches = empty_batches()
+    else:
+        hs6, reporter_iso, partner_iso = keys
+        query, params = TRADE_EXPORT_QUERY.build(
+            db_config.db_type,
+            hs6=hs6,
+            reporter_iso=reporter_iso,
+            partner_iso=partner_iso,
+            start_period=start_period,
+            end_period=end_period
+        )
+        batches = limit_concurrency(
+            db_config.stream_batches_async(query, params, export_batch_size()), export_slots
+        )
+    
+    return StreamingResponse(
+        encode(batches),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="trade_flows.{extension}"'}
+    )
 
 @app.get("/v2/anomalies", response_model=List[AnomalyResponse])
+@single_flight.coalesce("/v2/anomalies")
 async def get_anomalies(
     threshold: float = Query(20.0, ge=1.0, le=100.0, description="Anomaly detection threshold percentage"),
     severity: Optional[str] = Query(None, pattern="^(LOW|MEDIUM|HIGH)$", description="Filter by severity level")
@@ -331,142 +601,36 @@ async def get_anomalies(
     """
     
     try:
-        # Get trade data grouped by period, commodity, and route
-        if db_config.db_type == 'mysql':
-            concat_clause = "CONCAT(c1.name, ' → ', c2.name)"
-        else:
-            concat_clause = "c1.name || ' → ' || c2.name"
+        # Per-period totals by commodity and route: from the columnar mirror
+        # when AGGREGATE_ENGINE=duckdb, otherwise from the rollup table
+        rows = await fetch_anomaly_totals(db_config)
         
-        query = f"""
-            SELECT 
-                tf.period,
-                hs.description as commodity,
-                {concat_clause} as trade_route,
-                SUM(tf.value_usd) as total_value
-            FROM trade_flows tf
-            JOIN countries c1 ON tf.reporter_iso = c1.iso3
-            JOIN countries c2 ON tf.partner_iso = c2.iso3
-            JOIN hs_codes hs ON tf.hs6 = hs.hs6
-            GROUP BY tf.period, hs.description, trade_route
-            HAVING SUM(tf.value_usd) > 0
-            ORDER BY tf.period, total_value DESC
-        """
-        
-        rows = db_config.execute_query(query, fetch='all')
-        
-        # Organize data by commodity and route for anomaly detection
-        trade_series = {}
-        for row in rows:
-            if isinstance(row, dict):
-                # MySQL returns dict
-                period, commodity, route, value = row['period'], row['commodity'], row['trade_route'], row['total_value']
-            else:
-                # SQLite returns tuple
-                period, commodity, route, value = row
-            
-            key = f"{commodity}|{route}"
-            if key not in trade_series:
-                trade_series[key] = {}
-            trade_series[key][period] = float(value)
-        
-        # Detect anomalies
-        anomalies = []
-        for key, periods in trade_series.items():
-            commodity, route = key.split('|')
-            sorted_periods = sorted(periods.keys())
-            
-            # Check for significant changes between consecutive periods
-            for i in range(1, len(sorted_periods)):
-                current_period = sorted_periods[i]
-                previous_period = sorted_periods[i-1]
-                current_value = periods[current_period]
-                previous_value = periods[previous_period]
-                
-                if previous_value > 0:  # Avoid division by zero
-                    change_percent = ((current_value - previous_value) / previous_value) * 100
-                    
-                    if abs(change_percent) >= threshold:
-                        # Determine severity
-                        if abs(change_percent) >= 50:
-                            anomaly_severity = "HIGH"
-                        elif abs(change_percent) >= 25:
-                            anomaly_severity = "MEDIUM"
-                        else:
-                            anomaly_severity = "LOW"
-                        
-                        # Filter by severity if requested
-                        if severity is None or anomaly_severity == severity:
-                            alert_type = "SPIKE" if change_percent > 0 else "DROP"
-                            
-                            anomalies.append(AnomalyResponse(
-                                period=current_period,
-                                commodity=commodity,
-                                trade_route=route,
-                                current_value=current_value,
-                                previous_value=previous_value,
-                                change_percent=round(change_percent, 2),
-                                alert_type=alert_type,
-                                severity=anomaly_severity
-                            ))
-        
-        # Sort by absolute change percentage (most significant first)
-        anomalies.sort(key=lambda x: abs(x.change_percent), reverse=True)
-        
-        return anomalies[:50]  # Limit to top 50 anomalies
+        # Most significant changes first, limited to the top 50
+        return [AnomalyResponse(**anomaly) for anomaly in detect_anomalies(rows, threshold, severity)]
         
     except Exception as e:
         logger.error(f"Error detecting anomalies: {e}")
         raise HTTPException(status_code=500, detail=f"Anomaly detection error: {str(e)}")
 
 @app.get("/v2/stats", response_model=SummaryStatsResponse)
+@single_flight.coalesce("/v2/stats")
 async def get_summary_stats():
     """
     Get summary statistics for the trade data
     
-    Returns aggregate statistics about the trade database.
+    Returns aggregate statistics about the trade database, with totals
+    per period and per data source.
     """
     
     try:
-        # Basic counts
-        total_records = db_config.execute_query("SELECT COUNT(*) as count FROM trade_flows", fetch='one')
-        total_value = db_config.execute_query("SELECT SUM(value_usd) as total FROM trade_flows", fetch='one')
-        unique_commodities = db_config.execute_query("SELECT COUNT(DISTINCT hs6) as count FROM trade_flows", fetch='one')
-        latest_period = db_config.execute_query("SELECT MAX(period) as period FROM trade_flows", fetch='one')
-        
-        # Top commodities
-        top_commodities_query = """
-            SELECT hs.description, SUM(tf.value_usd) as total_value
-            FROM trade_flows tf
-            JOIN hs_codes hs ON tf.hs6 = hs.hs6
-            GROUP BY hs.description
-            ORDER BY total_value DESC
-            LIMIT 5
-        """
-        top_commodities_rows = db_config.execute_query(top_commodities_query, fetch='all')
-        
-        # Format top commodities
-        top_commodities = []
-        for row in top_commodities_rows:
-            if isinstance(row, dict):
-                # MySQL returns dict
-                top_commodities.append({
-                    "name": row['description'],
-                    "value": float(row['total_value'])
-                })
-            else:
-                # SQLite returns tuple
-                top_commodities.append({
-                    "name": row[0],
-                    "value": float(row[1])
-                })
+        # One read of one row per (period, HS code, source): the stats
+        # rollup, or a single grouped scan of the columnar mirror
+        if use_columnar_mirror():
+            rows = await columnar_mirror.query_async(MIRROR_STATS_QUERY)
+        else:
+            rows = await db_config.execute_query_async(STATS_SNAPSHOT_QUERY, fetch='all')
         
-        return SummaryStatsResponse(
-            total_records=total_records['count'] if isinstance(total_records, dict) else total_records[0],
-            total_value=float(total_value['total'] or 0) if isinstance(total_value, dict) else float(total_value[0] or 0),
-            unique_commodities=unique_commodities['count'] if isinstance(unique_commodities, dict) else unique_commodities[0],
-            latest_period=latest_period['period'] if isinstance(latest_period, dict) else latest_period[0],
-            top_commodities=top_commodities
-        )
+        return SummaryStatsResponse(**summarize_stats(rows))
         
     except Exception as e:
         logger.error(f"Error fetching summary stats: {e}")
@@ -474,6 +638,7 @@ async def get_summary_stats():
 
 @app.get("/v2/economic-context", response_model=List[EconomicIndicatorResponse])
 async def get_economic_context(
+    response: Response,
     start_date: str = Query("2023-01-01", description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     background_tasks: BackgroundTasks = BackgroundTasks()
@@ -482,6 +647,9 @@ async def get_economic_context(
     Get economic context data from FRED API
     
     Returns key economic indicators relevant to semiconductor trade.
+    The series are fetched concurrently; any that miss the fan-out deadline
+    (FRED_FANOUT_DEADLINE_SECONDS) are left out and named in the
+    X-Timed-Out-Series response header.
     """
     
     try:
@@ -499,40 +667,41 @@ async def get_economic_context(
             ("UNRATE", "US Unemployment Rate")
         ]
         
+        results, timed_out = await fred_client.fetch_series_concurrently(
+            [series_id for series_id, _ in indicators],
+            start_date=start_date,
+            end_date=end_date,
+            frequency="m"
+        )
+        if timed_out:
+            response.headers["X-Timed-Out-Series"] = ",".join(timed_out)
+        
         context_data = []
         
         for series_id, description in indicators:
-            try:
-                result = fred_client.get_series_data(
-                    series_id=series_id,
-                    start_date=start_date,
-                    end_date=end_date,
-                    frequency="m"
-                )
-                
-                if result.get("success") and result.get("data"):
-                    data_points = result["data"]
-                    latest_point = data_points[-1] if data_points else None
-                    
-                    context_data.append(EconomicIndicatorResponse(
-                        series_id=series_id,
-                        description=description,
-                        latest_value=latest_point.get("value") if latest_point else None,
-                        latest_date=latest_point.get("date") if latest_point else None,
-                        data_points=len(data_points)
-                    ))
-                else:
-                    context_data.append(EconomicIndicatorResponse(
-                        series_id=series_id,
-                        description=description,
-                        latest_value=None,
-                        latest_date=None,
-                        data_points=0
-                    ))
-                    
-            except Exception as e:
-                logger.warning(f"Failed to fetch {series_id}: {e}")
+            result = results.get(series_id)
+            if result is None:
                 continue
+            
+            if result.get("success") and result.get("data"):
+                data_points = result["data"]
+                latest_point = data_points[-1] if data_points else None
+                
+                context_data.append(EconomicIndicatorResponse(
+                    series_id=series_id,
+                    description=description,
+                    latest_value=latest_point.get("value") if latest_point else None,
+                    latest_date=latest_point.get("date") if latest_point else None,
+                    data_points=len(data_points)
+                ))
+            else:
+                context_data.append(EconomicIndicatorResponse(
+                    series_id=series_id,
+                    description=description,
+                    latest_value=None,
+                    latest_date=None,
+                    data_points=0
+                ))
         
         return context_data
         
@@ -541,17 +710,55 @@ async def get_economic_context(
         raise HTTPException(status_code=500, detail=f"Economic data error: {str(e)}")
 
 # 3D Globe Visualization Endpoints
+@single_flight.coalesce("/v2/globe/trade-flows")
+async def globe_trade_flows(period: str, min_value: float, include_usitc: bool) -> Dict[str, Any]:
+    if include_usitc:
+        return await visualization_client.get_enhanced_trade_flows_for_globe(period, min_value, include_usitc=True)
+    return await visualization_client.get_trade_flows_for_globe(period, min_value)
+
 @app.get("/v2/globe/trade-flows")
 async def get_globe_trade_flows(
     period: str = Query("recent", description="Time period for data (recent, YYYY-MM, etc.)"),
     min_value: float = Query(100000000, description="Minimum trade value in USD"),
-    include_usitc: bool = Query(False, description="Include USITC US trade data (may be slow due to rate limits)")
+    include_usitc: bool = Query(False, description="Include USITC US trade data (may be slow due to rate limits)"),
+    format: str = Query("json", pattern="^(json|binary|arrow)$", description="json, binary (typed columns) or arrow")
 ):
-    """Get trade flows formatted for 3D globe visualization with optional USITC data"""
-    if include_usitc:
-        return await visualization_client.get_enhanced_trade_flows_for_globe(period, min_value, include_usitc=True)
-    else:
-        return await visualization_client.get_trade_flows_for_globe(period, min_value)
+    """
+    Get trade flows formatted for 3D globe visualization with optional USITC data
+
+    format=binary and format=arrow send the same flows as typed columns
+    (Float32 coordinates and values, index-coded countries and
+    commodities; see src/api/globe_binary.py) that the globe copies
+    straight into GPU buffers.
+    """
+    if format == "arrow" and not GLOBE_ARROW_AVAILABLE:
+        raise HTTPException(status_code=406, detail="format=arrow needs the optional pyarrow package")
+    # Coalesced before encoding, so JSON and binary requests share the computation
+    try:
+        result = await globe_trade_flows(period=period, min_value=min_value, include_usitc=include_usitc)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Globe data error: {str(e)}")
+    if format == "binary":
+        return Response(encode_globe_binary(result), media_type=BINARY_MEDIA_TYPE)
+    if format == "arrow":
+        return Response(encode_globe_arrow(result), media_type=ARROW_MEDIA_TYPE)
+    return result
+
+@app.get("/v2/globe/stream")
+async def stream_globe_updates(request: Request):
+    """
+    Server-Sent Events feed of globe trade flows and anomalies
+
+    Sends a "snapshot" event on connect, then a "delta" event (flows and
+    anomalies to upsert or remove, by key) whenever an ingest changes them.
+    Flows use the /v2/globe/trade-flows defaults (period=recent,
+    min_value=GLOBE_STREAM_MIN_VALUE).
+    """
+    return StreamingResponse(
+        globe_updates.subscribe(request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/v2/globe/trade-flows-enhanced")
 async def get_enhanced_globe_trade_flows(
@@ -559,12 +766,18 @@ async def get_enhanced_globe_trade_flows(
     min_value: float = Query(100000000, description="Minimum trade value in USD")
 ):
     """Get enhanced trade flows including USITC US data for 3D globe visualization"""
-    return await visualization_client.get_enhanced_trade_flows_for_globe(period, min_value, include_usitc=True)
+    try:
+        return await visualization_client.get_enhanced_trade_flows_for_globe(period, min_value, include_usitc=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Globe data error: {str(e)}")
 
 @app.get("/v2/globe/anomalies")
 async def get_globe_anomalies():
     """Get anomaly data formatted for 3D globe visualization"""
-    return await visualization_client.get_anomalies_for_globe()
+    try:
+        return await visualization_client.get_anomalies_for_globe()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Anomaly detection error: {str(e)}")
 
 @app.get("/v2/globe/economic-context")
 async def get_globe_economic_context():
@@ -578,25 +791,29 @@ async def get_trade_series_v1(
     reporter: Optional[str] = None,
     partner: Optional[str] = None,
     start_period: Optional[str] = None,
-    end_period: Optional[str] = None
+    end_period: Optional[str] = None,
+    cursor: Optional[str] = None
 ):
     """Legacy v1 endpoint for backward compatibility"""
     
-    trade_flows = await get_trade_series(
+    rows, next_cursor = await fetch_trade_series_rows(
         commodity=commodity,
         reporter=reporter,
         partner=partner,
         start_period=start_period,
         end_period=end_period,
-        limit=100
+        limit=100,
+        cursor=cursor
     )
     
     # Convert to legacy format
-    return {
+    content = {
         "success": True,
-        "count": len(trade_flows),
-        "data": [flow.dict() for flow in trade_flows]
+        "count": len(rows),
+        "data": rows_as_dicts(rows, model_fields(TradeFlowResponse)),
+        "next_cursor": next_cursor
     }
+    return FastJSONResponse(content) if fast_json_enabled() else content
 
 @app.get("/v1/anomalies")
 async def get_anomalies_v1():
@@ -827,7 +1044,7 @@ async def get_demo_enhanced_trade_flows(
         
     except Exception as e:
         logger.error(f"Error creating demo enhanced flows: {e}")
-        return {"trade_flows": [], "country_stats": {}, "metadata": {"error": str(e)}}
+        raise HTTPException(status_code=500, detail=f"Globe data error: {str(e)}")
 
 # Root endpoint
 @app.get("/")
@@ -843,10 +1060,12 @@ async def root():
             "health": "/health",
             "documentation": "/docs",
             "trade_series": "/v2/series",
+            "export": "/v2/export",
             "anomalies": "/v2/anomalies", 
             "statistics": "/v2/stats",
             "economic_context": "/v2/economic-context",
             "globe_trade_flows": "/v2/globe/trade-flows",
+            "globe_stream": "/v2/globe/stream",
             "globe_anomalies": "/v2/globe/anomalies",
             "globe_economic_context": "/v2/globe/economic-context"
         },
@@ -856,12 +1075,19 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
+    from config.shared_state import shared_state
+    
+    # Several workers share rate limits and caches only through a shared store
+    workers = int(os.getenv('API_WORKERS', '1'))
+    if workers > 1 and shared_state is None:
+        logger.warning("API_WORKERS > 1 without SHARED_STATE_BACKEND: each worker keeps its own rate limits")
     
     # Run the FastAPI server
     uvicorn.run(
         "src.api.fastapi_server:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=workers == 1,
+        workers=workers,
         log_level="info"
     )
\ No newline at end of file
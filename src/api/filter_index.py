@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+In-memory name index for commodity and country filters
+hs_codes and countries are small, so their names are held in memory and
+free-text filters ("HBM", "Korea") are resolved to exact hs6 / iso3 keys
+before the trade query runs. The query then filters with IN lists on
+indexed trade_flows columns instead of leading-wildcard LIKE on the joins.
+
+The index is tagged with the data version (config/data_version.py) it was
+loaded at and reloads once an ingest moves it, so new countries and HS
+codes resolve on the first request that the response cache keys under the
+new version.
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config.database import db_config, DatabaseConfig
+from config.data_version import data_version, DataVersion
+
+class NameIndex:
+    """Case-insensitive substring lookup of HS code descriptions and country names"""
+
+    def __init__(self, db: DatabaseConfig = db_config, version: DataVersion = data_version,
+                 ttl_seconds: Optional[float] = None):
+        self.db = db
+        self.version = version
+        # Also reloaded after this long, for edits made outside BulkLoader
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv('FILTER_INDEX_TTL_SECONDS', '300')
+        )
+        self._commodities: Dict[str, str] = {}  # hs6 -> casefolded description
+        self._countries: Dict[str, str] = {}    # iso3 -> casefolded name
+        self._loaded_at: Optional[float] = None
+        self._loaded_version: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    def _is_stale(self, version: Optional[int]) -> bool:
+        return (self._loaded_at is None or version != self._loaded_version
+                or time.monotonic() - self._loaded_at >= self.ttl_seconds)
+
+    def invalidate(self):
+        """Force a reload on next use"""
+        self._loaded_at = None
+
+    async def refresh(self, force: bool = False):
+        """Reload both name tables if stale (concurrent callers share one reload)"""
+        version = await self.version.current_async()
+        if not force and not self._is_stale(version):
+            return
+        async with self._lock:
+            if not force and not self._is_stale(version):
+                return
+            commodities, countries = await asyncio.gather(
+                self.db.execute_query_async("SELECT hs6, description FROM hs_codes"),
+                self.db.execute_query_async("SELECT iso3, name FROM countries")
+            )
+            self._commodities = {
+                row['hs6']: (row['description'] or '').casefold() for row in commodities
+            }
+            self._countries = {
+                row['iso3']: (row['name'] or '').casefold() for row in countries
+            }
+            # Tagged with the version read before loading: a bump during the
+            # load triggers another reload rather than being missed
+            self._loaded_at = time.monotonic()
+            self._loaded_version = version
+
+    @staticmethod
+    def _match(names: Dict[str, str], term: str) -> List[str]:
+        needle = term.casefold()
+        return sorted(key for key, name in names.items() if needle in name)
+
+    async def match_commodities(self, term: str) -> List[str]:
+        """hs6 codes whose description contains term"""
+        await self.refresh()
+        return self._match(self._commodities, term)
+
+    async def match_countries(self, term: str) -> List[str]:
+        """iso3 codes whose name contains term"""
+        await self.refresh()
+        return self._match(self._countries, term)
+
+    async def match_filters(self, commodity: Optional[str], reporter: Optional[str],
+                            partner: Optional[str]) -> Optional[Tuple[Optional[List[str]], ...]]:
+        """
+        (hs6, reporter_iso, partner_iso) key lists for the trade query filters
+
+        A term that is not given stays None (no filter). Returns None when a
+        given term matches nothing, since the query would then return no rows.
+        """
+        keys = (
+            await self.match_commodities(commodity) if commodity else None,
+            await self.match_countries(reporter) if reporter else None,
+            await self.match_countries(partner) if partner else None,
+        )
+        if any(matched == [] for matched in keys):
+            return None
+        return keys
+
+    def status(self) -> Dict[str, object]:
+        return {
+            'commodities': len(self._commodities),
+            'countries': len(self._countries),
+            'age_seconds': round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+            'data_version': self._loaded_version,
+            'ttl_seconds': self.ttl_seconds
+        }
+
+# Global instance shared by the API endpoints
+name_index = NameIndex()
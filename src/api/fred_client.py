@@ -7,12 +7,21 @@ Fetches economic context data from Federal Reserve Economic Data (FRED)
 import requests
 import time
 import json
+import asyncio
 import pandas as pd
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 
+from src.api.rate_limit import SlidingWindowLimiter
+
+try:
+    import httpx
+    ASYNC_TRANSPORT_AVAILABLE = True
+except ImportError:
+    ASYNC_TRANSPORT_AVAILABLE = False
+
 # Load environment variables
 load_dotenv()
 
@@ -23,9 +32,12 @@ class FREDAPIClient:
         self.api_key = os.getenv('FRED_API_KEY')
         self.base_url = "https://api.stlouisfed.org/fred"
         self.rate_limit = 120  # 120 requests per minute
-        self.last_request_time = 0
-        self.request_count = 0
-        self.request_window_start = time.time()
+        self.limiter = SlidingWindowLimiter(self.rate_limit, 60.0, name='fred')
+        
+        # Concurrent fan-outs (get_multiple_series_async)
+        self.max_concurrency = int(os.getenv('FRED_MAX_CONCURRENCY', '8'))
+        self.fanout_deadline = float(os.getenv('FRED_FANOUT_DEADLINE_SECONDS', '5'))
+        self._http = None
         
         # Key economic indicators for semiconductor industry context
         self.key_indicators = {
@@ -61,30 +73,58 @@ class FREDAPIClient:
         }
     
     def _wait_for_rate_limit(self):
-        """Enforce rate limiting (120 requests per minute)"""
-        current_time = time.time()
-        
-        # Reset counter if we're in a new minute window
-        if current_time - self.request_window_start >= 60:
-            self.request_count = 0
-            self.request_window_start = current_time
-        
-        # If we've hit the rate limit, wait
-        if self.request_count >= self.rate_limit:
-            wait_time = 60 - (current_time - self.request_window_start)
-            if wait_time > 0:
-                print(f"Rate limit reached, waiting {wait_time:.1f} seconds...")
-                time.sleep(wait_time)
-                self.request_count = 0
-                self.request_window_start = time.time()
-        
-        # Minimum delay between requests
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < 0.5:  # 120 req/min = 1 request per 0.5 seconds
-            time.sleep(0.5 - time_since_last)
-        
-        self.last_request_time = time.time()
-        self.request_count += 1
+        """Enforce rate limiting (120 requests per minute, shared with the async path)"""
+        self.limiter.wait()
+    
+    def _observation_params(self, series_id: str, start_date: str, end_date: str,
+                            frequency: str, aggregation_method: str, units: str) -> Dict[str, str]:
+        return {
+            "series_id": series_id,
+            "api_key": self.api_key,
+            "file_type": "json",
+            "observation_start": start_date,
+            "observation_end": end_date,
+            "frequency": frequency,
+            "aggregation_method": aggregation_method,
+            "units": units,
+            "sort_order": "asc"
+        }
+    
+    def _parse_observations(self, data: Dict[str, Any], series_id: str, start_date: str,
+                            end_date: str, frequency: str, units: str) -> Dict[str, Any]:
+        """Turn a series/observations response into the get_series_data result"""
+        if 'observations' not in data:
+            print(f"No observations found for series {series_id}")
+            return {"success": False, "error": "No observations found", "data": []}
+        
+        # Filter out missing values (FRED uses "." for missing data)
+        valid_observations = [
+            obs for obs in data['observations']
+            if obs.get('value') != '.' and obs.get('value') is not None
+        ]
+        
+        # Convert values to float
+        for obs in valid_observations:
+            try:
+                obs['value'] = float(obs['value'])
+            except (ValueError, TypeError):
+                obs['value'] = None
+        
+        return {
+            "success": True,
+            "series_id": series_id,
+            "count": len(valid_observations),
+            "data": valid_observations,
+            "metadata": {
+                "source": "FRED",
+                "timestamp": datetime.now().isoformat(),
+                "start_date": start_date,
+                "end_date": end_date,
+                "frequency": frequency,
+                "units": units,
+                "description": self.key_indicators.get(series_id, f"FRED Series {series_id}")
+            }
+        }
     
     def get_series_data(self,
                        series_id: str,
@@ -119,17 +159,7 @@ class FREDAPIClient:
         
         # Build API request
         endpoint = f"{self.base_url}/series/observations"
-        params = {
-            "series_id": series_id,
-            "api_key": self.api_key,
-            "file_type": "json",
-            "observation_start": start_date,
-            "observation_end": end_date,
-            "frequency": frequency,
-            "aggregation_method": aggregation_method,
-            "units": units,
-            "sort_order": "asc"
-        }
+        params = self._observation_params(series_id, start_date, end_date, frequency, aggregation_method, units)
         
         try:
             print(f"Requesting FRED series: {series_id} ({start_date} to {end_date})")
@@ -137,43 +167,7 @@ class FREDAPIClient:
             response = requests.get(endpoint, params=params, timeout=30)
             response.raise_for_status()
             
-            data = response.json()
-            
-            # Parse FRED response structure
-            if 'observations' in data:
-                observations = data['observations']
-                
-                # Filter out missing values (FRED uses "." for missing data)
-                valid_observations = [
-                    obs for obs in observations 
-                    if obs.get('value') != '.' and obs.get('value') is not None
-                ]
-                
-                # Convert values to float
-                for obs in valid_observations:
-                    try:
-                        obs['value'] = float(obs['value'])
-                    except (ValueError, TypeError):
-                        obs['value'] = None
-                
-                return {
-                    "success": True,
-                    "series_id": series_id,
-                    "count": len(valid_observations),
-                    "data": valid_observations,
-                    "metadata": {
-                        "source": "FRED",
-                        "timestamp": datetime.now().isoformat(),
-                        "start_date": start_date,
-                        "end_date": end_date,
-                        "frequency": frequency,
-                        "units": units,
-                        "description": self.key_indicators.get(series_id, f"FRED Series {series_id}")
-                    }
-                }
-            else:
-                print(f"No observations found for series {series_id}")
-                return {"success": False, "error": "No observations found", "data": []}
+            return self._parse_observations(response.json(), series_id, start_date, end_date, frequency, units)
                 
         except requests.exceptions.RequestException as e:
             print(f"FRED API request failed: {e}")
@@ -236,6 +230,136 @@ class FREDAPIClient:
             "timestamp": datetime.now().isoformat()
         }
     
+    async def _get_json_async(self, endpoint: str, params: Dict[str, str]) -> Dict[str, Any]:
+        """GET a FRED endpoint without blocking the event loop"""
+        if not ASYNC_TRANSPORT_AVAILABLE:
+            # Without httpx the blocking request runs on a worker thread
+            def fetch():
+                response = requests.get(endpoint, params=params, timeout=30)
+                response.raise_for_status()
+                return response.json()
+            return await asyncio.to_thread(fetch)
+        
+        if self._http is None:
+            # One connection pool for every fan-out (keep-alive to FRED)
+            self._http = httpx.AsyncClient(
+                timeout=30, limits=httpx.Limits(max_connections=self.max_concurrency)
+            )
+        response = await self._http.get(endpoint, params=params)
+        response.raise_for_status()
+        return response.json()
+    
+    async def get_series_data_async(self,
+                                    series_id: str,
+                                    start_date: str = "2020-01-01",
+                                    end_date: Optional[str] = None,
+                                    frequency: str = "m",
+                                    aggregation_method: str = "avg",
+                                    units: str = "lin") -> Dict[str, Any]:
+        """
+        Async variant of get_series_data (same arguments and result)
+        
+        Waits for a rate-limit slot with asyncio.sleep, so many calls can be
+        in flight at once within the 120 requests/minute budget.
+        """
+        
+        if not self.api_key:
+            raise ValueError("FRED_API_KEY not found in environment variables")
+        
+        if not end_date:
+            end_date = datetime.now().strftime("%Y-%m-%d")
+        
+        await self.limiter.wait_async()
+        
+        endpoint = f"{self.base_url}/series/observations"
+        params = self._observation_params(series_id, start_date, end_date, frequency, aggregation_method, units)
+        
+        try:
+            data = await self._get_json_async(endpoint, params)
+            return self._parse_observations(data, series_id, start_date, end_date, frequency, units)
+        except ValueError as e:
+            print(f"JSON decode error: {e}")
+            return {"error": "Invalid JSON response", "data": []}
+        except Exception as e:
+            print(f"FRED API request failed: {e}")
+            return {"error": str(e), "data": []}
+    
+    async def fetch_series_concurrently(self,
+                                        series_ids: List[str],
+                                        deadline: Optional[float] = None,
+                                        **kwargs) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """
+        Fetch several series at once, at most max_concurrency in flight
+        
+        Args:
+            series_ids: FRED series identifiers
+            deadline: Seconds the whole fan-out may take (default
+                FRED_FANOUT_DEADLINE_SECONDS); requests still running then
+                are cancelled
+            **kwargs: Passed to get_series_data_async
+            
+        Returns:
+            (results by series_id for the series that finished, series_ids
+            that missed the deadline). A series whose request raised is in
+            neither.
+        """
+        
+        deadline = self.fanout_deadline if deadline is None else deadline
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def fetch(series_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.get_series_data_async(series_id=series_id, **kwargs)
+        
+        tasks = {asyncio.ensure_future(fetch(series_id)): series_id for series_id in series_ids}
+        if not tasks:
+            return {}, []
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        
+        results = {}
+        for task in done:
+            series_id = tasks[task]
+            if task.exception() is not None:
+                print(f"Error fetching {series_id}: {task.exception()}")
+                continue
+            results[series_id] = task.result()
+        
+        timed_out = [tasks[task] for task in pending]
+        if timed_out:
+            print(f"FRED fan-out deadline ({deadline}s) passed; missing {', '.join(timed_out)}")
+        return results, timed_out
+    
+    async def get_multiple_series_async(self,
+                                        series_ids: List[str],
+                                        start_date: str = "2020-01-01",
+                                        end_date: Optional[str] = None,
+                                        frequency: str = "m",
+                                        deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Async, concurrent variant of get_multiple_series
+        
+        Series that miss the deadline are listed under "timed_out"; the
+        ones that finished in time are returned as usual.
+        """
+        
+        results, timed_out = await self.fetch_series_concurrently(
+            series_ids, deadline, start_date=start_date, end_date=end_date, frequency=frequency
+        )
+        all_series_data = {
+            series_id: result for series_id, result in results.items() if result.get("success")
+        }
+        
+        return {
+            "success": True,
+            "total_series": len(series_ids),
+            "successful_requests": len(all_series_data),
+            "data": all_series_data,
+            "timed_out": timed_out,
+            "timestamp": datetime.now().isoformat()
+        }
+    
     def get_semiconductor_context_data(self,
                                      start_date: str = "2020-01-01",
                                      end_date: Optional[str] = None) -> Dict[str, Any]:
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Compact columnar encodings of globe trade flows
+The JSON payload of /v2/globe/trade-flows repeats country names,
+coordinates and commodity names inside every flow, and the globe then
+copies them into Three.js buffers. These encodings send one typed column
+per field instead, with countries, commodities, periods and sources
+index-coded against small lookup tables, so the globe can wrap the
+columns in Float32Array / Uint16Array views and hand them to GPU buffers
+without parsing.
+
+format=binary (no dependencies), little-endian:
+
+    b"GLBF" | u32 header length | header JSON (UTF-8) | zero padding
+    | columns, each starting on an 8-byte boundary
+
+The column data starts at the first 8-byte boundary after the header. The
+header holds the lookup tables, country_stats, metadata and, per column,
+its type, offset (from the start of the column data) and components per
+flow:
+
+    coordinates   float32 x4  from lng, from lat, to lng, to lat
+    value         float32     trade value in USD
+    intensity     float32
+    from_country  uint16      index into countries
+    to_country    uint16      index into countries
+    commodity     uint16      index into commodities ({name, hs_code})
+    period        uint16      index into periods
+    source        uint16      index into sources ("" when unset)
+
+format=arrow sends the same columns as an Arrow IPC stream with
+dictionary-encoded strings (needs the optional pyarrow package).
+"""
+
+import json
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List, Tuple
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+MAGIC = b"GLBF"
+FORMAT_VERSION = 1
+BINARY_MEDIA_TYPE = "application/vnd.semiconductor-monitor.globe-flows"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# name, array typecode, components per flow
+COLUMNS = (
+    ("coordinates", "f", 4),
+    ("value", "f", 1),
+    ("intensity", "f", 1),
+    ("from_country", "H", 1),
+    ("to_country", "H", 1),
+    ("commodity", "H", 1),
+    ("period", "H", 1),
+    ("source", "H", 1),
+)
+TYPE_NAMES = {"f": "float32", "H": "uint16"}
+
+class _Table:
+    """Index-codes values in first-seen order"""
+
+    def __init__(self):
+        self.values: List[Any] = []
+        self._index: Dict[Any, int] = {}
+
+    def code(self, value) -> int:
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+def _columns(flows: List[Dict[str, Any]]) -> Tuple[Dict[str, array], Dict[str, list]]:
+    """Typed columns and lookup tables for a list of globe flow dicts"""
+    countries, commodities, periods, sources = _Table(), _Table(), _Table(), _Table()
+    columns = {name: array(typecode) for name, typecode, _ in COLUMNS}
+    coordinates = columns["coordinates"]
+    for flow in flows:
+        origin, destination = flow["from"], flow["to"]
+        coordinates.extend(origin["coordinates"])
+        coordinates.extend(destination["coordinates"])
+        columns["value"].append(flow.get("value") or 0.0)
+        columns["intensity"].append(flow.get("intensity") or 0.0)
+        columns["from_country"].append(countries.code(origin["country"]))
+        columns["to_country"].append(countries.code(destination["country"]))
+        columns["commodity"].append(commodities.code((flow.get("commodity") or "", flow.get("hs_code") or "")))
+        columns["period"].append(periods.code(str(flow.get("period") or "")))
+        columns["source"].append(sources.code(flow.get("source") or ""))
+    tables = {
+        "countries": countries.values,
+        "commodities": [{"name": name, "hs_code": hs_code} for name, hs_code in commodities.values],
+        "periods": periods.values,
+        "sources": sources.values,
+    }
+    return columns, tables
+
+def _pad(length: int, alignment: int = 8) -> int:
+    return -length % alignment
+
+def encode_binary(result: Dict[str, Any]) -> bytes:
+    """Encode a get_trade_flows_for_globe result as format=binary"""
+    flows = result.get("trade_flows", [])
+    columns, tables = _columns(flows)
+    if sys.byteorder == "big":
+        for column in columns.values():
+            column.byteswap()
+
+    layout, position = {}, 0
+    for name, typecode, components in COLUMNS:
+        layout[name] = {"type": TYPE_NAMES[typecode], "offset": position, "components": components}
+        position += len(columns[name]) * columns[name].itemsize
+        position += _pad(position)
+
+    header = json.dumps({
+        "format": "globe-flows",
+        "version": FORMAT_VERSION,
+        "count": len(flows),
+        **tables,
+        "columns": layout,
+        "country_stats": result.get("country_stats", {}),
+        "metadata": result.get("metadata", {}),
+    }, separators=(",", ":"), default=str).encode()
+
+    parts = [MAGIC, struct.pack("<I", len(header)), header, b"\0" * _pad(8 + len(header))]
+    for name, _, _ in COLUMNS:
+        data = columns[name].tobytes()
+        parts.append(data)
+        parts.append(b"\0" * _pad(len(data)))
+    return b"".join(parts)
+
+def decode_binary(body: bytes) -> Tuple[Dict[str, Any], Dict[str, memoryview]]:
+    """Header and column views of a format=binary payload (for tests and tooling)"""
+    if body[:4] != MAGIC:
+        raise ValueError("Not a globe flows payload")
+    (header_length,) = struct.unpack_from("<I", body, 4)
+    header = json.loads(body[8:8 + header_length])
+    data_start = 8 + header_length + _pad(8 + header_length)
+    count = header["count"]
+    views = {}
+    for name, spec in header["columns"].items():
+        typecode = "f" if spec["type"] == "float32" else "H"
+        length = count * spec["components"] * (4 if typecode == "f" else 2)
+        offset = data_start + spec["offset"]
+        views[name] = memoryview(body)[offset:offset + length].cast(typecode)
+    return header, views
+
+def encode_arrow(result: Dict[str, Any]) -> bytes:
+    """Encode a get_trade_flows_for_globe result as an Arrow IPC stream"""
+    flows = result.get("trade_flows", [])
+    columns, tables = _columns(flows)
+    countries = pa.array(tables["countries"], type=pa.string())
+
+    def dictionary(indices: array, values: List[str]) -> "pa.DictionaryArray":
+        return pa.DictionaryArray.from_arrays(pa.array(indices, type=pa.uint16()), pa.array(values, type=pa.string()))
+
+    coordinates = columns["coordinates"]
+    batch = pa.record_batch({
+        "from_lng": pa.array(coordinates[0::4], type=pa.float32()),
+        "from_lat": pa.array(coordinates[1::4], type=pa.float32()),
+        "to_lng": pa.array(coordinates[2::4], type=pa.float32()),
+        "to_lat": pa.array(coordinates[3::4], type=pa.float32()),
+        "value": pa.array(columns["value"], type=pa.float32()),
+        "intensity": pa.array(columns["intensity"], type=pa.float32()),
+        "from_country": pa.DictionaryArray.from_arrays(pa.array(columns["from_country"], type=pa.uint16()), countries),
+        "to_country": pa.DictionaryArray.from_arrays(pa.array(columns["to_country"], type=pa.uint16()), countries),
+        "commodity": dictionary(columns["commodity"], [item["name"] for item in tables["commodities"]]),
+        "hs_code": dictionary(columns["commodity"], [item["hs_code"] for item in tables["commodities"]]),
+        "period": dictionary(columns["period"], tables["periods"]),
+        "source": dictionary(columns["source"], tables["sources"]),
+    })
+    # Country stats and metadata ride along as schema metadata
+    batch = batch.replace_schema_metadata({
+        "country_stats": json.dumps(result.get("country_stats", {}), default=str),
+        "metadata": json.dumps(result.get("metadata", {}), default=str),
+    })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
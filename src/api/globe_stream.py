@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Server-Sent Events channel for the 3D globe
+One background task watches the data version (config/data_version.py).
+When an ingest moves it, the task recomputes the globe's trade flows and
+anomalies once, diffs them against the previous state and encodes a single
+"delta" event, which every subscriber receives as the same bytes object.
+Nothing is queried while the data is unchanged, however many tabs are
+open.
+
+A new subscriber first gets a "snapshot" event (skipped when its
+Last-Event-ID already names the current version), then "delta" events
+holding the flows and anomalies to upsert or remove by key. A subscriber
+that falls too far behind has its backlog replaced by a fresh snapshot
+instead of growing its queue. Comment-line heartbeats keep idle connections open
+through proxies.
+
+The task runs only while at least one client is subscribed.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from config.data_version import data_version, DataVersion
+from src.api.trade_visualization_client import visualization_client, TradeVisualizationClient
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT = b": keepalive\n\n"
+
+def flow_key(flow: Dict[str, Any]) -> str:
+    return f"{flow['from']['country']}|{flow['to']['country']}|{flow.get('hs_code')}|{flow.get('period')}"
+
+def anomaly_key(anomaly: Dict[str, Any]) -> str:
+    route = anomaly['route']
+    return f"{route['from']['country']}|{route['to']['country']}|{anomaly.get('commodity')}|{anomaly.get('period')}"
+
+def diff_items(previous: Dict[str, Dict[str, Any]],
+               current: Dict[str, Dict[str, Any]]) -> Dict[str, list]:
+    """Items added or changed since `previous` (with their key) and keys removed"""
+    return {
+        "upsert": [{"key": key, **item} for key, item in current.items() if previous.get(key) != item],
+        "remove": [key for key in previous if key not in current],
+    }
+
+def sse_event(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> bytes:
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":"), default=str))
+    return ("\n".join(lines) + "\n\n").encode()
+
+class GlobeUpdateChannel:
+    """Broadcasts globe flow and anomaly deltas when the data version changes"""
+
+    def __init__(self, client: TradeVisualizationClient = visualization_client,
+                 version: DataVersion = data_version, min_value: Optional[float] = None,
+                 heartbeat_seconds: Optional[float] = None, queue_size: Optional[int] = None):
+        self.client = client
+        self.version = version
+        self.min_value = min_value if min_value is not None else float(
+            os.getenv('GLOBE_STREAM_MIN_VALUE', '100000000')
+        )
+        self.heartbeat_seconds = heartbeat_seconds if heartbeat_seconds is not None else float(
+            os.getenv('GLOBE_STREAM_HEARTBEAT_SECONDS', '15')
+        )
+        self.queue_size = queue_size or int(os.getenv('GLOBE_STREAM_QUEUE_SIZE', '8'))
+        self.poll_seconds = max(self.version.check_seconds, 0.5)
+
+        self._subscribers: "set[asyncio.Queue]" = set()
+        self._task: Optional[asyncio.Task] = None
+        self._computed = False
+
+        self._version: Optional[int] = None
+        self._flows: Dict[str, Dict[str, Any]] = {}
+        self._anomalies: Dict[str, Dict[str, Any]] = {}
+        self._country_stats: Dict[str, Any] = {}
+        self._snapshot: Optional[bytes] = None
+        self._stats = {'updates': 0, 'deltas_sent': 0, 'snapshots_sent': 0, 'resyncs': 0}
+
+    async def _compute(self) -> Tuple[Dict[str, Dict], Dict[str, Dict], Dict[str, Any]]:
+        flows, anomalies = await asyncio.gather(
+            self.client.get_trade_flows_for_globe("recent", self.min_value),
+            self.client.get_anomalies_for_globe(),
+            return_exceptions=True
+        )
+        # Keep the last good state rather than telling every globe that
+        # the data vanished
+        if isinstance(flows, Exception):
+            raise flows
+        if isinstance(anomalies, Exception):
+            anomaly_map = self._anomalies
+        else:
+            anomaly_map = {anomaly_key(anomaly): anomaly for anomaly in anomalies.get("anomalies", [])}
+        return (
+            {flow_key(flow): flow for flow in flows.get("trade_flows", [])},
+            anomaly_map,
+            flows.get("country_stats", {})
+        )
+
+    def _snapshot_event(self) -> bytes:
+        if self._snapshot is None:
+            self._snapshot = sse_event("snapshot", {
+                "version": self._version,
+                "flows": [{"key": key, **flow} for key, flow in self._flows.items()],
+                "anomalies": [{"key": key, **anomaly} for key, anomaly in self._anomalies.items()],
+                "country_stats": self._country_stats,
+            }, self._version)
+        return self._snapshot
+
+    async def _refresh(self, version: Optional[int]):
+        """Recompute the globe state and broadcast what changed"""
+        flows, anomalies, country_stats = await self._compute()
+        first = not self._computed
+        delta = {
+            "version": version,
+            "flows": diff_items(self._flows, flows),
+            "anomalies": diff_items(self._anomalies, anomalies),
+            "country_stats": country_stats,
+        }
+        self._version = version
+        self._flows, self._anomalies, self._country_stats = flows, anomalies, country_stats
+        self._snapshot = None
+        self._stats['updates'] += 1
+        self._computed = True
+
+        if first:
+            # Clients that connected before the first computation
+            self._broadcast(self._snapshot_event())
+            self._stats['snapshots_sent'] += len(self._subscribers)
+            return
+        if any(delta[name]["upsert"] or delta[name]["remove"] for name in ("flows", "anomalies")):
+            self._broadcast(sse_event("delta", delta, version))
+            self._stats['deltas_sent'] += len(self._subscribers)
+
+    def _broadcast(self, message: bytes):
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too far behind for deltas to be useful: start it over
+                while not queue.empty():
+                    queue.get_nowait()
+                if self._computed:
+                    queue.put_nowait(self._snapshot_event())
+                    self._stats['resyncs'] += 1
+                else:
+                    queue.put_nowait(message)
+
+    async def _run(self):
+        last_heartbeat = time.monotonic()
+        while self._subscribers:
+            try:
+                version = await self.version.current_async()
+                if not self._computed or version != self._version:
+                    await self._refresh(version)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Globe stream refresh failed: {e}")
+            if time.monotonic() - last_heartbeat >= self.heartbeat_seconds:
+                self._broadcast(HEARTBEAT)
+                last_heartbeat = time.monotonic()
+            await asyncio.sleep(self.poll_seconds)
+        self._task = None
+
+    async def subscribe(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """SSE byte stream for one client; ends when the client disconnects"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        try:
+            yield b"retry: 5000\n\n"
+            # Before the first computation the snapshot arrives through the queue
+            if self._computed and last_event_id != str(self._version):
+                self._stats['snapshots_sent'] += 1
+                yield self._snapshot_event()
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.discard(queue)
+
+    async def close(self):
+        """Stop the background task (on shutdown)"""
+        self._subscribers.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            'subscribers': len(self._subscribers),
+            'running': self._task is not None,
+            'version': self._version,
+            'flows': len(self._flows),
+            'anomalies': len(self._anomalies),
+        }
+
+# Global channel shared by every /v2/globe/stream connection
+globe_updates = GlobeUpdateChannel()
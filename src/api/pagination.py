@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Opaque cursor tokens for keyset pagination
+A token carries the sort key of the last row served plus a fingerprint of
+the filters it was issued for, so the next page starts with an index seek
+instead of an OFFSET scan and cannot be replayed against different filters.
+"""
+
+import base64
+import hashlib
+import json
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+CURSOR_VERSION = 1
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor token is malformed or was issued for other filters"""
+
+def filter_fingerprint(filters: Dict[str, Any]) -> str:
+    """Short stable hash of the filter values a cursor belongs to"""
+    canonical = json.dumps(filters, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+def encode_cursor(key: Tuple[Any, ...], filters: Dict[str, Any]) -> str:
+    """Encode a row's sort key as a URL-safe token"""
+    payload = {
+        "v": CURSOR_VERSION,
+        # Decimal (MySQL) values travel as strings to keep every digit
+        "k": [str(value) if isinstance(value, Decimal) else value for value in key],
+        "f": filter_fingerprint(filters),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def decode_cursor(token: Optional[str], filters: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+    """
+    Decode a token back into the sort key tuple (None for no token)
+
+    Raises:
+        InvalidCursorError: the token is malformed, from another version, or
+        was issued for different filters
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        version, key, fingerprint = payload["v"], payload["k"], payload["f"]
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursorError("Malformed cursor")
+
+    if version != CURSOR_VERSION or not isinstance(key, list):
+        raise InvalidCursorError("Unsupported cursor version")
+    if fingerprint != filter_fingerprint(filters):
+        raise InvalidCursorError("Cursor was issued for different filters")
+    return tuple(key)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Request budgets for upstream APIs
+A sliding window of at most `limit` request starts per `window` seconds.
+Callers reserve a start time up front, so concurrent requests spread
+themselves over the budget instead of all waking at once, and blocking
+and async callers of one client draw on the same budget.
+
+A named limiter draws on a budget shared by every worker process when
+SHARED_STATE_BACKEND is set (config/shared_state.py).
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from config.shared_state import shared_state
+
+class SlidingWindowLimiter:
+    """At most `limit` request starts in any `window` seconds (thread-safe)"""
+
+    def __init__(self, limit: int, window: float = 60.0, name: Optional[str] = None):
+        self.limit = limit
+        self.window = window
+        self.name = name
+        self._starts = deque()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Claim the next free start slot; returns seconds to wait before using it"""
+        if self.name and shared_state is not None:
+            return shared_state.reserve(self.name, self.limit, self.window)
+        with self._lock:
+            now = time.monotonic()
+            while self._starts and self._starts[0] <= now - self.window:
+                self._starts.popleft()
+            start = now
+            if len(self._starts) >= self.limit:
+                # The slot frees up `window` seconds after the start `limit` places back
+                start = max(now, self._starts[-self.limit] + self.window)
+            self._starts.append(start)
+            return start - now
+
+    def wait(self):
+        """Block until a request may start"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self):
+        """Wait without blocking the event loop until a request may start"""
+        if self.name and shared_state is not None:
+            delay = await asyncio.to_thread(self.reserve)
+        else:
+            delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
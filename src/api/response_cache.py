@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+In-process response cache for the read endpoints
+Serialized responses are kept in an LRU bounded by entry count and total
+bytes, keyed by path plus normalized query parameters. Each entry is tagged
+with the data version (config/data_version.py) it was computed at and is
+treated as a miss once an ingest has bumped the version, so nothing needs
+to be purged explicitly. A TTL backstops responses that depend on more than
+the database (e.g. errors reported in a 200 body).
+
+With SHARED_STATE_BACKEND set (config/shared_state.py), stored responses
+are also written to the shared store, and a worker whose own LRU misses
+looks there before computing, so one worker's result serves the others.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from config.shared_state import shared_state
+
+logger = logging.getLogger(__name__)
+
+# Cacheable GET paths -> query parameters that bypass the cache when set
+# (their responses depend on external APIs, not only on the database)
+CACHED_PATHS: Dict[str, FrozenSet[str]] = {
+    "/v2/series": frozenset(),
+    "/v2/stats": frozenset(),
+    "/v2/anomalies": frozenset(),
+    "/v2/globe/trade-flows": frozenset({"include_usitc"}),
+    "/v1/series": frozenset(),
+    "/v1/stats": frozenset(),
+    "/v1/anomalies": frozenset(),
+}
+
+TRUE_VALUES = frozenset({"1", "true", "yes", "on"})
+
+def cache_key(path: str, query_items: List[Tuple[str, str]]) -> Optional[str]:
+    """
+    Normalized key for a request, or None if it must not be cached
+
+    Parameter order does not matter and blank values are dropped (the
+    endpoints treat them as absent).
+    """
+    bypass = CACHED_PATHS.get(path)
+    if bypass is None:
+        return None
+    params = []
+    for name, value in query_items:
+        value = value.strip()
+        if not value:
+            continue
+        if name in bypass and value.lower() in TRUE_VALUES:
+            return None
+        params.append((name, value))
+    params.sort()
+    return path + "?" + "&".join(f"{name}={value}" for name, value in params)
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    status_code: int
+    headers: List[Tuple[str, str]]
+    version: int
+    stored_at: float  # time.time(), comparable across workers
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(name) + len(value) for name, value in self.headers)
+
+    def encode(self) -> bytes:
+        """u32 header length, JSON header, body (for the shared store)"""
+        header = json.dumps([self.status_code, self.headers, self.version, self.stored_at]).encode()
+        return struct.pack("<I", len(header)) + header + self.body
+
+    @classmethod
+    def decode(cls, data: bytes) -> "CachedResponse":
+        (length,) = struct.unpack_from("<I", data)
+        status_code, headers, version, stored_at = json.loads(data[4:4 + length])
+        return cls(body=data[4 + length:], status_code=status_code,
+                   headers=[tuple(header) for header in headers], version=version, stored_at=stored_at)
+
+class ResponseCache:
+    """Thread-safe LRU of serialized responses bounded by entries and bytes, optionally backed by the shared store"""
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        self.enabled = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+        self.max_entries = max_entries or int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '512'))
+        self.max_bytes = max_bytes or int(float(os.getenv('RESPONSE_CACHE_MAX_MB', '64')) * 1024 * 1024)
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv('RESPONSE_CACHE_TTL_SECONDS', '300')
+        )
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.shared = shared_state
+        self._stats = {'hits': 0, 'misses': 0, 'stale': 0, 'evictions': 0, 'uncacheable': 0, 'shared_hits': 0}
+        self._per_path: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, key: str, outcome: str):
+        path = key.split("?", 1)[0]
+        self._stats[outcome] += 1
+        path_stats = self._per_path.setdefault(path, {'hits': 0, 'misses': 0})
+        path_stats['hits' if outcome == 'hits' else 'misses'] += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _fresh(self, entry: CachedResponse, version: int) -> bool:
+        return entry.version == version and time.time() - entry.stored_at <= self.ttl_seconds
+
+    def get(self, key: str, version: int) -> Optional[CachedResponse]:
+        """The entry for key if it was stored at this data version and is within the TTL"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._fresh(entry, version):
+                self._entries.move_to_end(key)
+                self._count(key, 'hits')
+                return entry
+            if entry is not None:
+                self._remove(key)
+            outcome = 'misses' if entry is None else 'stale'
+
+        if self.shared is not None:
+            shared_entry = self._get_shared(key)
+            if shared_entry is not None and self._fresh(shared_entry, version):
+                self._store(key, shared_entry)
+                with self._lock:
+                    self._stats['shared_hits'] += 1
+                    self._count(key, 'hits')
+                return shared_entry
+
+        with self._lock:
+            self._count(key, outcome)
+        return None
+
+    def _get_shared(self, key: str) -> Optional[CachedResponse]:
+        try:
+            data = self.shared.get("response:" + key)
+            return CachedResponse.decode(data) if data is not None else None
+        except Exception as e:
+            # The shared tier is an optimization; compute instead
+            logger.warning(f"Shared response cache read failed: {e}")
+            return None
+
+    def put(self, key: str, entry: CachedResponse):
+        """Store an entry, evicting least recently used ones beyond the bounds"""
+        if entry.size > self.max_bytes:
+            with self._lock:
+                self._stats['uncacheable'] += 1
+            return
+        self._store(key, entry)
+        if self.shared is not None:
+            try:
+                self.shared.set("response:" + key, entry.encode(), self.ttl_seconds)
+            except Exception as e:
+                logger.warning(f"Shared response cache write failed: {e}")
+
+    async def get_async(self, key: str, version: int) -> Optional[CachedResponse]:
+        """get() without blocking the event loop on the shared store"""
+        if self.shared is None:
+            return self.get(key, version)
+        return await asyncio.to_thread(self.get, key, version)
+
+    async def put_async(self, key: str, entry: CachedResponse):
+        if self.shared is None:
+            return self.put(key, entry)
+        await asyncio.to_thread(self.put, key, entry)
+
+    def _store(self, key: str, entry: CachedResponse):
+        """Insert into this worker's LRU"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = dict.fromkeys(self._stats, 0)
+            self._per_path = {}
+
+    def stats(self) -> Dict[str, object]:
+        """Hit/miss counts and ratios, overall and per path, plus occupancy"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses'] + self._stats['stale']
+            per_path = {
+                path: {
+                    **counts,
+                    'hit_ratio': round(counts['hits'] / (counts['hits'] + counts['misses']), 4)
+                    if counts['hits'] + counts['misses'] else 0.0
+                }
+                for path, counts in sorted(self._per_path.items())
+            }
+            return {
+                'enabled': self.enabled,
+                **self._stats,
+                'hit_ratio': round(self._stats['hits'] / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'shared_state': self.shared.backend if self.shared is not None else 'local',
+                'paths': per_path
+            }
+
+# Global instance used by the API middleware
+response_cache = ResponseCache()
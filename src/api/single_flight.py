@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Single-flight coalescing for expensive endpoints
+When several dashboard tabs load at once, identical requests arrive
+together and all miss the response cache. A coalesced function runs once
+per distinct set of arguments at a time: callers that arrive while a call
+with the same (parsed, hence normalized) arguments is in flight await that
+call's result instead of starting their own.
+
+The computation runs as its own task, so a caller that disconnects does
+not cancel it for the others. Results are shared objects and must not be
+mutated by callers. Coalescing is per worker process; across workers the
+shared response cache tier (config/shared_state.py) serves repeated
+requests.
+"""
+
+import asyncio
+import functools
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    """In-flight calls by key, with per-name counts of computations and coalesced callers"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()  # stats are read from other threads
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, name: str, outcome: str):
+        with self._lock:
+            counts = self._stats.setdefault(name, {'computations': 0, 'coalesced': 0, 'errors': 0})
+            counts[outcome] += 1
+
+    def _finished(self, name: str, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so a failure nobody awaited is not logged as unhandled
+        if not task.cancelled() and task.exception() is not None:
+            self._count(name, 'errors')
+
+    async def run(self, name: str, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """compute()'s result, shared with concurrent callers passing the same key"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._finished, name, key))
+            self._count(name, 'computations')
+        else:
+            self._count(name, 'coalesced')
+        return await asyncio.shield(task)
+
+    def coalesce(self, name: str):
+        """Decorator: coalesce concurrent calls of an async function with equal keyword arguments"""
+        def decorator(func: Callable[..., Awaitable[Any]]):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                key = name + "?" + "&".join(f"{arg}={value!r}" for arg, value in sorted(kwargs.items()))
+                if args:
+                    key += "&" + "&".join(repr(arg) for arg in args)
+                return await self.run(name, key, lambda: func(*args, **kwargs))
+            return wrapper
+        return decorator
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-name computations, coalesced callers (requests served by another's computation) and ratio"""
+        with self._lock:
+            names = {
+                name: {
+                    **counts,
+                    'coalesced_ratio': round(counts['coalesced'] / (counts['computations'] + counts['coalesced']), 4)
+                    if counts['computations'] + counts['coalesced'] else 0.0
+                }
+                for name, counts in sorted(self._stats.items())
+            }
+        return {
+            'computations': sum(counts['computations'] for counts in names.values()),
+            'coalesced': sum(counts['coalesced'] for counts in names.values()),
+            'in_flight': len(self._inflight),
+            'paths': names,
+        }
+
+# Global instance used by the API endpoints
+single_flight = SingleFlight()
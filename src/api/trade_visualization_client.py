@@ -12,6 +12,8 @@ from .comtrade_client import ComtradeAPIClient
 from .usitc_client import USITCAPIClient
 from .fred_client import FREDAPIClient
 from config.database import db_config
+from config.queries import GLOBE_TRADE_FLOWS_QUERY, LATEST_PERIOD_QUERY, CENSUS_FLOWS_QUERY
+from src.analytics.anomalies import fetch_anomaly_totals, detect_anomalies, ROUTE_SEPARATOR
 
 logger = logging.getLogger(__name__)
 
@@ -50,51 +52,32 @@ class TradeVisualizationClient:
                                       min_value_usd: float = 100000000) -> Dict[str, Any]:
         """Get trade flows formatted for 3D globe visualization"""
         try:
-            # Get trade data from database
-            query = """
-            SELECT r.name as reporter_name, p.name as partner_name, 
-                   h.description as commodity_name, tf.hs6 as hs_code,
-                   tf.value_usd as trade_value_usd, 'export' as trade_flow, tf.period
-            FROM trade_flows tf
-            JOIN countries r ON tf.reporter_iso = r.iso3
-            JOIN countries p ON tf.partner_iso = p.iso3  
-            JOIN hs_codes h ON tf.hs6 = h.hs6
-            WHERE tf.value_usd >= ?
-            AND tf.period >= ?
-            ORDER BY tf.value_usd DESC
-            LIMIT 100
-            """
-            
             # Calculate date filter - use latest available data
             if period == "recent":
                 # Get the latest period available in database
-                latest_query = "SELECT MAX(period) FROM trade_flows"
-                latest_result = self.db_config.execute_query(latest_query, fetch='one')
+                latest_result = await self.db_config.execute_query_async(LATEST_PERIOD_QUERY, fetch='one')
                 date_filter = latest_result[0] if latest_result and latest_result[0] else "2023"
             else:
                 date_filter = period
             
-            results = self.db_config.execute_query(query, (min_value_usd, date_filter), fetch='all')
+            query, params = GLOBE_TRADE_FLOWS_QUERY.build(
+                self.db_config.db_type,
+                min_value_usd=min_value_usd,
+                since_period=date_filter
+            )
+            results = await self.db_config.execute_query_async(query, params, fetch='all', prepared=True)
             
             # Format data for 3D visualization
             trade_flows = []
             country_stats = {}
             
             for row in results:
-                if isinstance(row, dict):
-                    reporter = row['reporter_name']
-                    partner = row['partner_name']
-                    value = float(row['trade_value_usd'])
-                    commodity_name = row.get('commodity_name', 'Semiconductors')
-                    hs_code = row.get('hs_code', '854232')
-                    period = row.get('period', date_filter)
-                else:
-                    reporter = row[0]
-                    partner = row[1]
-                    commodity_name = row[2] if len(row) > 2 else 'Semiconductors'
-                    hs_code = row[3] if len(row) > 3 else '854232'
-                    value = float(row[4]) if len(row) > 4 else 0
-                    period = row[6] if len(row) > 6 else date_filter
+                reporter = row.reporter_name
+                partner = row.partner_name
+                value = row.trade_value_usd
+                commodity_name = row.commodity_name
+                hs_code = row.hs_code
+                period = row.period
                 
                 # Skip invalid data
                 if not reporter or not partner or reporter == partner:
@@ -155,77 +138,39 @@ class TradeVisualizationClient:
             
         except Exception as e:
             logger.error(f"Error getting trade flows: {e}")
-            return {"trade_flows": [], "country_stats": {}, "metadata": {"error": str(e)}}
+            raise
     
-    async def get_anomalies_for_globe(self) -> Dict[str, Any]:
+    async def get_anomalies_for_globe(self, threshold: float = 20.0, limit: int = 20) -> Dict[str, Any]:
         """Get anomaly data for globe visualization"""
         try:
-            # Get recent anomalies
-            query = """
-            SELECT reporter_name, partner_name, commodity_name, hs_code,
-                   current_value, previous_value, change_percent, 
-                   anomaly_type, severity, detection_period
-            FROM (
-                SELECT *, 
-                       ((current_value - previous_value) / previous_value * 100) as change_percent,
-                       CASE 
-                           WHEN ABS((current_value - previous_value) / previous_value * 100) > 50 THEN 'HIGH'
-                           WHEN ABS((current_value - previous_value) / previous_value * 100) > 25 THEN 'MEDIUM'
-                           ELSE 'LOW'
-                       END as severity,
-                       CASE
-                           WHEN current_value > previous_value THEN 'SPIKE'
-                           ELSE 'DROP'
-                       END as anomaly_type
-                FROM trade_flows 
-                WHERE previous_value > 0
-                AND ABS((current_value - previous_value) / previous_value * 100) > 20
-                ORDER BY ABS((current_value - previous_value) / previous_value * 100) DESC
-            ) anomalies
-            LIMIT 20
-            """
-            
-            results = self.db_config.execute_query(query, fetch='all')
+            # The same rollup-backed detection as /v2/anomalies, narrowed to
+            # routes between countries the globe can place
+            rows = await fetch_anomaly_totals(self.db_config)
             
             anomaly_points = []
-            for row in results:
-                if isinstance(row, dict):
-                    reporter = row['reporter_name']
-                    partner = row['partner_name']
-                    change_percent = float(row['change_percent'])
-                    severity = row['severity']
-                    anomaly_type = row['anomaly_type']
-                    commodity_name = row.get('commodity_name', 'Semiconductors')
-                    current_value = float(row['current_value'])
-                    previous_value = float(row['previous_value'])
-                else:
-                    reporter = row[0]
-                    partner = row[1]
-                    commodity_name = row[2] if len(row) > 2 else 'Semiconductors'
-                    current_value = float(row[3]) if len(row) > 3 else 0
-                    previous_value = float(row[4]) if len(row) > 4 else 0
-                    change_percent = float(row[5]) if len(row) > 5 else 0
-                    anomaly_type = row[6] if len(row) > 6 else 'SPIKE'
-                    severity = row[7] if len(row) > 7 else 'LOW'
+            for anomaly in detect_anomalies(rows, threshold, limit=None):
+                reporter, _, partner = anomaly["trade_route"].partition(ROUTE_SEPARATOR)
                 
                 # Get coordinates for both countries
                 reporter_coords = self.country_coords.get(reporter)
                 partner_coords = self.country_coords.get(partner)
                 
                 if reporter_coords and partner_coords:
-                    anomaly = {
+                    anomaly_points.append({
                         "route": {
                             "from": {"country": reporter, "coordinates": [reporter_coords["lng"], reporter_coords["lat"]]},
                             "to": {"country": partner, "coordinates": [partner_coords["lng"], partner_coords["lat"]]}
                         },
-                        "change_percent": change_percent,
-                        "severity": severity,
-                        "type": anomaly_type,
-                        "commodity": commodity_name,
-                        "current_value": current_value,
-                        "previous_value": previous_value
-                    }
-                    anomaly_points.append(anomaly)
+                        "change_percent": anomaly["change_percent"],
+                        "severity": anomaly["severity"],
+                        "type": anomaly["alert_type"],
+                        "commodity": anomaly["commodity"],
+                        "period": anomaly["period"],
+                        "current_value": anomaly["current_value"],
+                        "previous_value": anomaly["previous_value"]
+                    })
+                    if len(anomaly_points) == limit:
+                        break
             
             return {
                 "anomalies": anomaly_points,
@@ -237,7 +182,7 @@ class TradeVisualizationClient:
             
         except Exception as e:
             logger.error(f"Error getting anomalies: {e}")
-            return {"anomalies": [], "metadata": {"error": str(e)}}
+            raise
     
     async def get_economic_context_for_globe(self) -> Dict[str, Any]:
         """Get economic indicators for globe context"""
@@ -249,29 +194,31 @@ class TradeVisualizationClient:
                 ("INDPRO", "Industrial Production Index")
             ]
             
+            results, timed_out = await self.fred_client.fetch_series_concurrently(
+                [series_id for series_id, _ in indicators],
+                start_date="2023-01-01",
+                end_date=datetime.now().strftime("%Y-%m-%d"),
+                frequency="m"
+            )
+            
             market_conditions = {}
             
             for series_id, description in indicators:
-                try:
-                    result = self.fred_client.get_series_data(
-                        series_id=series_id,
-                        start_date="2023-01-01",
-                        end_date=datetime.now().strftime("%Y-%m-%d"),
-                        frequency="m"
-                    )
-                    
-                    if result.get("success") and result.get("data"):
-                        latest_point = result["data"][-1]
-                        market_conditions[series_id.lower() + "_level"] = latest_point.get("value", 0)
-                
-                except Exception as e:
-                    logger.warning(f"Failed to get {series_id}: {e}")
+                if series_id in timed_out:
+                    continue
+                result = results.get(series_id)
+                if result is None:
+                    # The request raised (e.g. no FRED_API_KEY)
                     market_conditions[series_id.lower() + "_level"] = 0
+                elif result.get("success") and result.get("data"):
+                    latest_point = result["data"][-1]
+                    market_conditions[series_id.lower() + "_level"] = latest_point.get("value", 0)
             
             # Format for globe visualization
             context = {
                 "global_indicators": {},
                 "market_conditions": market_conditions,
+                "timed_out_series": timed_out,
                 "last_updated": datetime.now().isoformat()
             }
             
@@ -291,14 +238,8 @@ class TradeVisualizationClient:
             us_flows = []
             
             # Get real US trade data from Census cache
-            query = """
-            SELECT partner_name, hs_code, commodity_description, trade_value_usd, period
-            FROM census_trade_cache 
-            WHERE trade_value_usd >= ?
-            ORDER BY trade_value_usd DESC
-            """
-            
-            results = self.db_config.execute_query(query, (min_value_usd,), fetch='all')
+            query, params = CENSUS_FLOWS_QUERY.build(self.db_config.db_type, min_value_usd=min_value_usd)
+            results = await self.db_config.execute_query_async(query, params, fetch='all', prepared=True)
             
             if results:
                 for row in results:
@@ -384,7 +325,7 @@ class TradeVisualizationClient:
             
         except Exception as e:
             logger.error(f"Error getting enhanced trade flows: {e}")
-            return {"trade_flows": [], "country_stats": {}, "metadata": {"error": str(e)}}
+            raise
 
 # Global client instance
 visualization_client = TradeVisualizationClient()
\ No newline at end of file
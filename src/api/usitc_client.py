@@ -12,6 +12,8 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
+
+from src.api.rate_limit import SlidingWindowLimiter
 from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception_type
 
 # Load environment variables
@@ -24,7 +26,7 @@ class USITCAPIClient:
         self.api_token = os.getenv('USITC_API_TOKEN')
         self.base_url = "https://datawebws.usitc.gov"
         self.rate_limit_delay = 30.0  # Very conservative: 30 seconds between requests
-        self.last_request_time = 0
+        self.limiter = SlidingWindowLimiter(1, self.rate_limit_delay, name='usitc')
         
         # Verified US HTS codes from research (10-digit)
         self.target_hts_codes = {
@@ -59,16 +61,11 @@ class USITCAPIClient:
         }
     
     def _enforce_rate_limit(self):
-        """Enforce very conservative rate limiting (5+ seconds between requests)"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        if time_since_last < self.rate_limit_delay:
-            sleep_time = self.rate_limit_delay - time_since_last
+        """Enforce very conservative rate limiting (30 seconds between requests, shared across workers)"""
+        sleep_time = self.limiter.reserve()
+        if sleep_time > 0:
             print(f"USITC rate limiting: sleeping {sleep_time:.1f}s")
             time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
     
     @retry(
         retry=retry_if_exception_type(requests.exceptions.HTTPError),
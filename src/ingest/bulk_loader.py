@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Bulk upsert loader for Comtrade and Census trade records
+Writes API records into trade_flows / census_trade_cache with chunked
+multi-row upserts that are idempotent on the natural key, one transaction
+per batch.
+
+Usage:
+    python -m src.ingest.bulk_loader --comtrade 2023 --census
+"""
+
+import argparse
+import itertools
+import math
+import sqlite3
+import time
+from functools import lru_cache
+from typing import Callable, Dict, List, Any, Iterable, Optional, Tuple
+
+from config.database import db_config, DatabaseConfig
+from config.data_version import bump_data_version, data_version
+from config.partitioning import ensure_period_partitions
+from src.ingest.rollups import read_existing_values, new_row_deltas, diff_batch, apply_rollup_deltas
+from src.analytics.columnar_mirror import ColumnarMirror, aggregate_engine, COLUMNAR_AVAILABLE
+
+TRADE_FLOW_COLUMNS = ("period", "reporter_iso", "partner_iso", "hs6", "flow",
+                      "value_usd", "quantity", "unit", "source")
+TRADE_FLOW_KEY = ("period", "reporter_iso", "partner_iso", "hs6", "flow")
+
+# trade_flows.flow is CHAR(1): exports and imports. Comtrade's breakdowns
+# (RX/RM re-exports and re-imports, DX/FM domestic exports and foreign
+# imports) are parts of the X and M totals, so folding them in would
+# overwrite those rows; records with them are skipped
+FLOW_CODES = ("X", "M")
+
+CENSUS_COLUMNS = ("period", "partner_name", "hs_code", "commodity_description", "trade_value_usd")
+CENSUS_KEY = ("period", "partner_name", "hs_code")
+
+# SQLite caps bound parameters per statement (999 before 3.32, 32766 after)
+SQLITE_MAX_PARAMS = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+MYSQL_MAX_ROWS_PER_STATEMENT = 5000
+
+def to_float(value) -> Optional[float]:
+    """Coerce API numbers (incl. numpy scalars) to float; NaN and blanks become None"""
+    if type(value) is float:
+        return None if math.isnan(value) else value
+    if value is None or value == "":
+        return None
+    number = float(value)
+    return None if math.isnan(number) else number
+
+@lru_cache(maxsize=256)
+def build_upsert_sql(db_type: str, table: str, columns: Tuple[str, ...],
+                     key: Tuple[str, ...], row_count: int, touch_updated_at: bool = True,
+                     update_existing: bool = True) -> str:
+    """
+    Multi-row INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE for `row_count` rows
+
+    With update_existing=False, rows whose key already exists are left as is.
+    """
+    placeholder = '%s' if db_type == 'mysql' else '?'
+    row_sql = "(" + ", ".join([placeholder] * len(columns)) + ")"
+    values_sql = ", ".join([row_sql] * row_count)
+    update_columns = [column for column in columns if column not in key]
+
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values_sql}"
+    if db_type == 'mysql':
+        if not update_existing:
+            return sql + f" ON DUPLICATE KEY UPDATE {key[0]} = {key[0]}"
+        assignments = [f"{column} = VALUES({column})" for column in update_columns]
+        return sql + " ON DUPLICATE KEY UPDATE " + ", ".join(assignments)
+
+    if not update_existing:
+        return sql + f" ON CONFLICT ({', '.join(key)}) DO NOTHING"
+    assignments = [f"{column} = excluded.{column}" for column in update_columns]
+    if touch_updated_at:
+        assignments.append("updated_at = CURRENT_TIMESTAMP")
+    return sql + f" ON CONFLICT ({', '.join(key)}) DO UPDATE SET " + ", ".join(assignments)
+
+class BulkLoader:
+    """Chunked, idempotent bulk upserts into the trade tables"""
+
+    def __init__(self, db: DatabaseConfig = db_config, batch_size: int = 10000,
+                 mirror: Optional[ColumnarMirror] = None):
+        self.db = db
+        self.batch_size = batch_size
+        self.logger = db.logger
+        # Columnar mirror to refresh after trade flow loads (by default only
+        # when the aggregate endpoints are configured to read it)
+        if mirror is None and aggregate_engine() == 'duckdb' and COLUMNAR_AVAILABLE:
+            mirror = ColumnarMirror(db)
+        self.mirror = mirror
+
+    def _rows_per_statement(self, column_count: int) -> int:
+        if self.db.db_type == 'mysql':
+            return MYSQL_MAX_ROWS_PER_STATEMENT
+        return max(1, SQLITE_MAX_PARAMS // column_count)
+
+    def _upsert_batch(self, cursor, table: str, columns: Tuple[str, ...], key: Tuple[str, ...],
+                      batch: List[tuple], touch_updated_at: bool = True, update_existing: bool = True):
+        """Upsert one batch using as few multi-row statements as the driver allows"""
+        per_statement = self._rows_per_statement(len(columns))
+        for start in range(0, len(batch), per_statement):
+            chunk = batch[start:start + per_statement]
+            sql = build_upsert_sql(self.db.db_type, table, columns, key, len(chunk),
+                                   touch_updated_at, update_existing)
+            cursor.execute(sql, [value for row in chunk for value in row])
+
+    def upsert(self, table: str, columns: Tuple[str, ...], key: Tuple[str, ...],
+               rows: Iterable[tuple], touch_updated_at: bool = True,
+               update_existing: bool = True,
+               write_batch: Optional[Callable[[Any, List[tuple]], int]] = None,
+               on_batch: Optional[Callable[[Any, List[tuple]], None]] = None) -> Dict[str, Any]:
+        """
+        Upsert tuples (ordered like `columns`) in batches, one transaction each
+
+        `write_batch(cursor, batch)` replaces the plain upsert and returns the
+        rows it wrote; `on_batch(cursor, batch)` runs after it.
+        """
+        started = time.perf_counter()
+        total = 0
+        batches = 0
+        unchanged = 0
+
+        def flush(batch: List[tuple]):
+            nonlocal total, batches, unchanged
+            with self.db.transaction() as cursor:
+                if write_batch is None:
+                    self._upsert_batch(cursor, table, columns, key, batch, touch_updated_at, update_existing)
+                else:
+                    unchanged += len(batch) - write_batch(cursor, batch)
+                if on_batch is not None:
+                    on_batch(cursor, batch)
+                # Committed with the batch, so caches never pair new data with an old version
+                bump_data_version(cursor, self.db.db_type)
+            data_version.expire()
+            total += len(batch)
+            batches += 1
+
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                break
+            flush(batch)
+
+        elapsed = time.perf_counter() - started
+        return {
+            "table": table,
+            "rows": total,
+            "batches": batches,
+            "unchanged": unchanged,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(total / elapsed) if elapsed > 0 else total
+        }
+
+    def upsert_countries(self, countries: Dict[str, str], update_existing: bool = False) -> Dict[str, Any]:
+        """Insert iso3 -> name pairs into countries (existing names are kept by default)"""
+        return self.upsert("countries", ("iso3", "name"), ("iso3",), sorted(countries.items()),
+                           touch_updated_at=False, update_existing=update_existing)
+
+    def upsert_hs_codes(self, hs_codes: Dict[str, str], update_existing: bool = False) -> Dict[str, Any]:
+        """Insert hs6 -> description pairs into hs_codes (existing descriptions are kept by default)"""
+        return self.upsert("hs_codes", ("hs6", "description"), ("hs6",), sorted(hs_codes.items()),
+                           touch_updated_at=False, update_existing=update_existing)
+
+    def upsert_trade_flows(self, records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Upsert normalized trade flow dicts (keys as TRADE_FLOW_COLUMNS)"""
+        rows = (
+            (
+                str(record["period"]),
+                record["reporter_iso"],
+                record["partner_iso"],
+                str(record["hs6"]),
+                record.get("flow", "X"),
+                to_float(record.get("value_usd")) or 0.0,
+                to_float(record.get("quantity")),
+                record.get("unit"),
+                record.get("source", "comtrade"),
+            )
+            for record in records
+        )
+        touched_periods = set()
+
+        def on_batch(cursor, batch: List[tuple]):
+            touched_periods.update(row[0] for row in batch)
+
+        result = self.upsert("trade_flows", TRADE_FLOW_COLUMNS, TRADE_FLOW_KEY, rows,
+                             write_batch=self._write_trade_flows, on_batch=on_batch)
+        if self.db.db_type == 'mysql' and touched_periods:
+            # DDL commits implicitly, so partitions are split after the load
+            # rather than inside a batch transaction
+            result["partitions_created"] = ensure_period_partitions(touched_periods, self.db)
+        if self.mirror is not None and touched_periods:
+            result["mirror"] = self.mirror.refresh(touched_periods)
+        return result
+
+    def _insert_new_trade_flows(self, cursor, batch: List[tuple]) -> bool:
+        """Insert a batch whose keys are all new; False as soon as one is already stored"""
+        per_statement = self._rows_per_statement(len(TRADE_FLOW_COLUMNS))
+        for start in range(0, len(batch), per_statement):
+            chunk = batch[start:start + per_statement]
+            sql = build_upsert_sql(self.db.db_type, "trade_flows", TRADE_FLOW_COLUMNS, TRADE_FLOW_KEY,
+                                   len(chunk), update_existing=False)
+            cursor.execute(sql, [value for row in chunk for value in row])
+            if cursor.rowcount != len(chunk):
+                return False
+        return True
+
+    def _write_trade_flows(self, cursor, batch: List[tuple]) -> int:
+        """
+        Upsert a trade flow batch and move the rollups by each row's difference
+
+        Returns:
+            Number of rows written (rows matching what is stored are skipped)
+        """
+        db_type = self.db.db_type
+        # A batch of new keys (a load of new periods) inserts as is, with no
+        # lookup of stored values. MySQL's connector reports found rather
+        # than inserted rows for ON DUPLICATE KEY, so there they are always read.
+        if db_type == 'sqlite':
+            if not cursor.connection.in_transaction:
+                # Outside a transaction, releasing the savepoint would commit
+                cursor.execute("BEGIN")
+            cursor.execute("SAVEPOINT new_trade_flows")
+            inserted = self._insert_new_trade_flows(cursor, batch)
+            if not inserted:
+                cursor.execute("ROLLBACK TO SAVEPOINT new_trade_flows")
+            cursor.execute("RELEASE SAVEPOINT new_trade_flows")
+            if inserted:
+                routes, stats = new_row_deltas(batch)
+                apply_rollup_deltas(cursor, db_type, routes, stats, self._rows_per_statement)
+                return len(batch)
+
+        existing = read_existing_values(cursor, db_type, batch, self._rows_per_statement)
+        changed, routes, stats = diff_batch(batch, existing)
+        apply_rollup_deltas(cursor, db_type, routes, stats, self._rows_per_statement)
+        self._upsert_batch(cursor, "trade_flows", TRADE_FLOW_COLUMNS, TRADE_FLOW_KEY, changed)
+        return len(changed)
+
+    def load_comtrade_records(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Load records from ComtradeAPIClient.get_semiconductor_trade_flows
+
+        Countries and HS codes referenced by the records are upserted first
+        so the endpoint joins find them. Records missing a key field or with
+        a flow code outside FLOW_CODES are skipped.
+        """
+        countries: Dict[str, str] = {}
+        hs_codes: Dict[str, str] = {}
+        flows = []
+        skipped = 0
+        skipped_flow_codes: Dict[str, int] = {}
+
+        for record in records:
+            reporter = record.get("reporterISO")
+            partner = record.get("partnerISO")
+            hs6 = record.get("cmdCode")
+            period = record.get("period") or record.get("refYear")
+            if not reporter or not partner or not hs6 or not period:
+                skipped += 1
+                continue
+            flow = str(record.get("flowCode") or "X").strip().upper()
+            if flow not in FLOW_CODES:
+                skipped += 1
+                skipped_flow_codes[flow] = skipped_flow_codes.get(flow, 0) + 1
+                continue
+
+            countries[reporter] = record.get("reporterDesc") or reporter
+            countries[partner] = record.get("partnerDesc") or partner
+            hs_codes[str(hs6)] = record.get("cmdDesc") or str(hs6)
+            flows.append({
+                "period": period,
+                "reporter_iso": reporter,
+                "partner_iso": partner,
+                "hs6": hs6,
+                "flow": flow,
+                "value_usd": record.get("primaryValue"),
+                "quantity": record.get("qty"),
+                "unit": record.get("qtyUnitAbbr"),
+                "source": "comtrade"
+            })
+
+        self.upsert_countries(countries)
+        self.upsert_hs_codes(hs_codes)
+        result = self.upsert_trade_flows(flows)
+        result["skipped"] = skipped
+        if skipped_flow_codes:
+            result["skipped_flow_codes"] = skipped_flow_codes
+        self.logger.info(f"Loaded {result['rows']} Comtrade rows ({skipped} skipped) "
+                         f"at {result['rows_per_second']} rows/s")
+        if skipped_flow_codes:
+            self.logger.info(f"Skipped Comtrade flow codes outside {FLOW_CODES}: {skipped_flow_codes}")
+        return result
+
+    def load_census_records(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Load records from CensusBureauAPIClient.get_2024_semiconductor_imports"""
+        rows = [
+            (
+                record["period"],
+                record["partner_name"],
+                record["hs_code"],
+                record.get("hs_description"),
+                to_float(record.get("imports_general_value")) or 0.0,
+            )
+            for record in records
+            if record.get("period") and record.get("partner_name") and record.get("hs_code")
+        ]
+        result = self.upsert("census_trade_cache", CENSUS_COLUMNS, CENSUS_KEY, rows)
+        result["skipped"] = len(records) - len(rows)
+        self.logger.info(f"Loaded {result['rows']} Census rows at {result['rows_per_second']} rows/s")
+        return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load trade data into the database")
+    parser.add_argument("--comtrade", metavar="YEAR", help="Fetch and load UN Comtrade flows for YEAR")
+    parser.add_argument("--census", action="store_true", help="Fetch and load 2024 US Census imports")
+    args = parser.parse_args()
+
+    loader = BulkLoader()
+
+    if args.comtrade:
+        from src.api.comtrade_client import ComtradeAPIClient
+        records = ComtradeAPIClient().get_semiconductor_trade_flows(year=args.comtrade)
+        print(loader.load_comtrade_records(records))
+
+    if args.census:
+        from src.api.census_client import CensusBureauAPIClient
+        records = CensusBureauAPIClient().get_2024_semiconductor_imports()
+        print(loader.load_census_records(records))
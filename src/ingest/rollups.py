@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Incrementally maintained rollups of trade_flows
+trade_flow_rollups holds totals per (period, hs6, reporter, partner) for
+/v2/anomalies; stats_rollups holds totals per (period, hs6, source) for
+/v2/stats and its per-period and per-source breakdowns. Inside each batch
+transaction the bulk loader adds each row's difference from the row it
+replaces (read by natural key before the upsert; a batch of new keys has
+nothing to read) to both rollups, so ingest cost scales with the batch
+rather than the slices it touches and the rollups never disagree with
+trade_flows.
+
+Usage:
+    python -m src.ingest.rollups --rebuild   # full rebuild after out-of-band writes
+"""
+
+import argparse
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Any, List, Tuple
+
+from config.data_version import bump_data_version, data_version
+from config.database import db_config, DatabaseConfig
+
+# Natural key (TRADE_FLOW_KEY order) -> (value_usd, quantity, unit, source) of the stored row
+ExistingValues = Dict[Tuple[str, ...], Tuple[Any, ...]]
+# Rollup key -> [value delta, record count delta]
+Deltas = Dict[Tuple[str, ...], List[float]]
+
+# SQLite plans a row-value IN list as a scan of trade_flows, but a join
+# from a VALUES list searches the natural-key index once per key. The
+# batch position identifies each match, which is cheaper to fetch than the key.
+EXISTING_VALUES_SQL = {
+    'sqlite': """
+        WITH batch_keys (position, period, reporter_iso, partner_iso, hs6, flow) AS (VALUES {rows})
+        SELECT k.position, tf.value_usd, tf.quantity, tf.unit, tf.source
+        FROM batch_keys k
+        JOIN trade_flows tf ON tf.period = k.period AND tf.hs6 = k.hs6
+             AND tf.reporter_iso = k.reporter_iso AND tf.partner_iso = k.partner_iso
+             AND tf.flow = k.flow
+    """,
+    'mysql': """
+        SELECT period, reporter_iso, partner_iso, hs6, flow, value_usd, quantity, unit, source
+        FROM trade_flows
+        WHERE (period, reporter_iso, partner_iso, hs6, flow) IN ({rows})
+    """,
+}
+
+ROUTE_ROLLUP_KEY = ("period", "hs6", "reporter_iso", "partner_iso")
+STATS_ROLLUP_KEY = ("period", "hs6", "source")
+
+REBUILD_STATEMENTS = [
+    "DELETE FROM trade_flow_rollups",
+    "DELETE FROM stats_rollups",
+    """
+    INSERT INTO trade_flow_rollups (period, hs6, reporter_iso, partner_iso, total_value, record_count)
+    SELECT period, hs6, reporter_iso, partner_iso, SUM(value_usd), COUNT(*)
+    FROM trade_flows
+    GROUP BY period, hs6, reporter_iso, partner_iso
+    """,
+    """
+    INSERT INTO stats_rollups (period, hs6, source, total_value, record_count)
+    SELECT period, hs6, source, SUM(value_usd), COUNT(*)
+    FROM trade_flows
+    GROUP BY period, hs6, source
+    """,
+]
+
+def _placeholder(db_type: str) -> str:
+    return '%s' if db_type == 'mysql' else '?'
+
+@lru_cache(maxsize=64)
+def _add_delta_sql(db_type: str, table: str, key: Tuple[str, ...], row_count: int) -> str:
+    """Multi-row insert of new groups that adds to the totals of existing ones"""
+    placeholder = _placeholder(db_type)
+    columns = key + ("total_value", "record_count")
+    row_sql = "(" + ", ".join([placeholder] * len(columns)) + ")"
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES " + ", ".join([row_sql] * row_count)
+    if db_type == 'mysql':
+        return sql + (" ON DUPLICATE KEY UPDATE total_value = total_value + VALUES(total_value), "
+                      "record_count = record_count + VALUES(record_count)")
+    return sql + (f" ON CONFLICT ({', '.join(key)}) DO UPDATE SET "
+                  "total_value = total_value + excluded.total_value, "
+                  "record_count = record_count + excluded.record_count")
+
+def _subtract_sql(db_type: str, table: str, key: Tuple[str, ...]) -> str:
+    placeholder = _placeholder(db_type)
+    where = " AND ".join(f"{column} = {placeholder}" for column in key)
+    return (f"UPDATE {table} SET total_value = total_value + {placeholder}, "
+            f"record_count = record_count - {placeholder} WHERE {where}")
+
+def read_existing_values(cursor, db_type: str, batch: List[tuple],
+                         rows_per_statement: Callable[[int], int]) -> ExistingValues:
+    """
+    Stored values of the natural keys of a trade flow batch
+
+    Must run in the batch's transaction, before its upsert. Rows are
+    ordered like TRADE_FLOW_COLUMNS, so row[:5] is the natural key.
+    """
+    keys = list(dict.fromkeys(row[:5] for row in batch))
+    existing: ExistingValues = {}
+    placeholder = _placeholder(db_type)
+
+    if db_type == 'mysql':
+        row_sql = "(" + ", ".join([placeholder] * 5) + ")"
+        per_statement = rows_per_statement(5)
+        for start in range(0, len(keys), per_statement):
+            chunk = keys[start:start + per_statement]
+            cursor.execute(EXISTING_VALUES_SQL[db_type].format(rows=", ".join([row_sql] * len(chunk))),
+                           [value for key in chunk for value in key])
+            for row in cursor.fetchall():
+                existing[tuple(row[:5])] = (float(row[5]), None if row[6] is None else float(row[6]),
+                                            row[7], row[8])
+        return existing
+
+    row_sql = "(" + ", ".join([placeholder] * 6) + ")"
+    per_statement = rows_per_statement(6)
+    for start in range(0, len(keys), per_statement):
+        chunk = keys[start:start + per_statement]
+        params = []
+        for position, key in enumerate(chunk, start):
+            params.append(position)
+            params.extend(key)
+        cursor.execute(EXISTING_VALUES_SQL[db_type].format(rows=", ".join([row_sql] * len(chunk))), params)
+        for position, value_usd, quantity, unit, source in cursor.fetchall():
+            existing[keys[position]] = (value_usd, quantity, unit, source)
+    return existing
+
+def new_row_deltas(batch: List[tuple]) -> Tuple[Deltas, Deltas]:
+    """Rollup differences of a trade flow batch whose keys were all new"""
+    routes: Deltas = {}
+    stats: Deltas = {}
+    for period, reporter, partner, hs6, _, value, _, _, source in batch:
+        route = routes.get((period, hs6, reporter, partner))
+        if route is None:
+            routes[(period, hs6, reporter, partner)] = [value, 1]
+        else:
+            route[0] += value
+            route[1] += 1
+        group = stats.get((period, hs6, source))
+        if group is None:
+            stats[(period, hs6, source)] = [value, 1]
+        else:
+            group[0] += value
+            group[1] += 1
+    return routes, stats
+
+def diff_batch(batch: List[tuple], existing: ExistingValues) -> Tuple[List[tuple], Deltas, Deltas]:
+    """
+    Rows of a trade flow batch that change trade_flows, and their rollup differences
+
+    Rows are applied in order against the stored values, so a key repeated
+    within the batch counts once with its last value, as the upsert stores
+    it. Rows identical to the stored ones are left out.
+    """
+    current = dict(existing)
+    changed = []
+    routes: Deltas = {}
+    stats: Deltas = {}
+
+    def add(deltas: Deltas, group: Tuple[str, ...], value: float, count: int):
+        delta = deltas.get(group)
+        if delta is None:
+            deltas[group] = [value, count]
+        else:
+            delta[0] += value
+            delta[1] += count
+
+    for row in batch:
+        key, values = row[:5], row[5:]
+        previous = current.get(key)
+        if previous == values:
+            continue
+        changed.append(row)
+        current[key] = values
+
+        period, reporter, partner, hs6 = key[:4]
+        if previous is None:
+            add(routes, (period, hs6, reporter, partner), values[0], 1)
+        else:
+            add(routes, (period, hs6, reporter, partner), values[0] - previous[0], 0)
+            add(stats, (period, hs6, previous[3]), -previous[0], -1)
+        add(stats, (period, hs6, values[3]), values[0], 1)
+
+    return changed, routes, stats
+
+def _apply_deltas(cursor, db_type: str, table: str, key: Tuple[str, ...], deltas: Deltas,
+                  rows_per_statement: Callable[[int], int]) -> int:
+    additions = [group + (value, count) for group, (value, count) in deltas.items()
+                 if count >= 0 and (value or count)]
+    # Groups losing rows (a re-loaded key whose source changed) always exist;
+    # an insert with a negative count would not fit MySQL's unsigned column.
+    # Emptied groups stay with a zero count, which both readers skip.
+    removals = [(value, -count) + group for group, (value, count) in deltas.items() if count < 0]
+
+    per_statement = rows_per_statement(len(key) + 2)
+    for start in range(0, len(additions), per_statement):
+        chunk = additions[start:start + per_statement]
+        cursor.execute(_add_delta_sql(db_type, table, key, len(chunk)),
+                       [value for row in chunk for value in row])
+    if removals:
+        cursor.executemany(_subtract_sql(db_type, table, key), removals)
+    return len(additions) + len(removals)
+
+def apply_rollup_deltas(cursor, db_type: str, routes: Deltas, stats: Deltas,
+                        rows_per_statement: Callable[[int], int]) -> int:
+    """
+    Add a batch's differences (new_row_deltas or diff_batch) to both rollups
+
+    Runs on the caller's cursor so it joins the caller's transaction.
+
+    Returns:
+        Number of rollup groups changed
+    """
+    return (_apply_deltas(cursor, db_type, "trade_flow_rollups", ROUTE_ROLLUP_KEY, routes, rows_per_statement)
+            + _apply_deltas(cursor, db_type, "stats_rollups", STATS_ROLLUP_KEY, stats, rows_per_statement))
+
+def rebuild_rollups(db: DatabaseConfig = db_config) -> Dict[str, Any]:
+    """Rebuild both rollup tables from trade_flows (for writes that bypass BulkLoader)"""
+    started = time.perf_counter()
+    with db.transaction() as cursor:
+        for statement in REBUILD_STATEMENTS:
+            cursor.execute(statement)
+        cursor.execute("SELECT COUNT(*) FROM trade_flow_rollups")
+        route_groups = cursor.fetchone()[0]
+        bump_data_version(cursor, db.db_type)
+    data_version.expire()
+
+    elapsed = time.perf_counter() - started
+    db.logger.info(f"Rebuilt trade rollups: {route_groups} route groups in {elapsed:.2f}s")
+    return {"route_groups": route_groups, "seconds": round(elapsed, 3)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain trade rollup tables")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild rollups from trade_flows")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        print(rebuild_rollups())
+    else:
+        parser.print_help()
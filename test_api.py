@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+API Tests
+Keyset cursors on /v2/series, ETags and 304 revalidation (also of
+compressed responses), single-flight coalescing and the /v2/export
+formats, against the API's test database (see conftest.py).
+"""
+
+import asyncio
+import base64
+import csv
+import io
+import json
+from decimal import Decimal
+
+import pytest
+
+from conftest import COUNTRIES, trade_records, load_trade_data
+from src.api.export import EXPORT_COLUMNS, ARROW_AVAILABLE, max_concurrent_exports, limit_concurrency
+from src.api.pagination import encode_cursor, decode_cursor, InvalidCursorError
+from src.api.single_flight import SingleFlight
+
+IDENTITY = {"Accept-Encoding": "identity"}
+EXPORT_FIELDS = [name for name, _ in EXPORT_COLUMNS]
+
+def token(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).rstrip(b"=").decode()
+
+# Keyset cursors
+
+def test_cursor_round_trip():
+    filters = {"commodity": "HBM", "reporter": None}
+    cursor = encode_cursor(("2023-06", Decimal("123456789012.34"), 42), filters)
+    # Decimals come back as strings with every digit
+    assert decode_cursor(cursor, dict(filters)) == ("2023-06", "123456789012.34", 42)
+    assert decode_cursor(None, filters) is None
+    assert decode_cursor("", filters) is None
+
+@pytest.mark.parametrize("cursor, message", [
+    ("not a cursor!", "Malformed cursor"),
+    (token(["2023-06", 1.0, 1]), "Malformed cursor"),
+    (token({"v": 1, "k": ["2023-06", 1.0, 1]}), "Malformed cursor"),
+    (token({"v": 99, "k": ["2023-06", 1.0, 1], "f": "0" * 16}), "Unsupported cursor version"),
+    (token({"v": 1, "k": "2023-06", "f": "0" * 16}), "Unsupported cursor version"),
+])
+def test_malformed_cursors_are_rejected(cursor, message):
+    with pytest.raises(InvalidCursorError, match=message):
+        decode_cursor(cursor, {})
+
+def test_cursor_for_other_filters_is_rejected():
+    cursor = encode_cursor(("2023-06", 1.0, 1), {"reporter": "Korea"})
+    with pytest.raises(InvalidCursorError, match="different filters"):
+        decode_cursor(cursor, {"reporter": "Taiwan"})
+
+def page_through(client, limit, **filters):
+    """Every row of /v2/series following X-Next-Cursor, and the number of pages"""
+    rows, pages, cursor = [], 0, None
+    while True:
+        params = {**filters, "limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/v2/series", params=params, headers=IDENTITY)
+        assert response.status_code == 200
+        rows += response.json()
+        pages += 1
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            return rows, pages
+
+@pytest.mark.parametrize("filters", [{}, {"reporter": "korea"}, {"start_period": "2023-02"}])
+def test_series_pages_cover_every_row_once(client, filters):
+    everything = client.get("/v2/series", params={**filters, "limit": 1000}, headers=IDENTITY).json()
+    assert everything
+    rows, pages = page_through(client, 7, **filters)
+    assert rows == everything
+    assert pages == -(-len(everything) // 7)
+
+def test_series_rejects_bad_cursors(client):
+    response = client.get("/v2/series", params={"cursor": "not a cursor!"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Malformed cursor"
+
+    first = client.get("/v2/series", params={"reporter": "korea", "limit": 5})
+    cursor = first.headers["x-next-cursor"]
+    response = client.get("/v2/series", params={"reporter": "taiwan", "limit": 5, "cursor": cursor})
+    assert response.status_code == 400
+    assert "different filters" in response.json()["detail"]
+
+# ETags and conditional GET
+
+def test_version_etag_revalidates_until_the_data_changes(client, api_db):
+    first = client.get("/v2/series", params={"limit": 5}, headers=IDENTITY)
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and etag.startswith('"v')
+    assert first.headers["cache-control"] == "no-cache"
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}'):
+        revalidated = client.get("/v2/series", params={"limit": 5},
+                                 headers={**IDENTITY, "If-None-Match": if_none_match})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+        assert revalidated.headers["cache-control"] == "no-cache"
+
+    # Same filters in another order: same normalized request, same ETag
+    assert client.get("/v2/series", params=[("limit", "5"), ("reporter", "korea")], headers=IDENTITY) \
+        .headers["etag"] == client.get("/v2/series", params=[("reporter", "korea"), ("limit", "5")],
+                                       headers=IDENTITY).headers["etag"]
+
+    # An ingest moves the data version, even when it changes no value
+    load_trade_data(api_db, trade_records())
+    after_ingest = client.get("/v2/series", params={"limit": 5}, headers={**IDENTITY, "If-None-Match": etag})
+    assert after_ingest.status_code == 200
+    assert after_ingest.headers["etag"] != etag
+    assert after_ingest.json() == first.json()
+
+def test_encoded_etag_304_keeps_vary(client):
+    gzip_headers = {"Accept-Encoding": "gzip"}
+    first = client.get("/v2/series", params={"limit": 100}, headers=gzip_headers)
+    assert first.headers["content-encoding"] == "gzip"
+    etag = first.headers["etag"]
+    assert etag.endswith('-gzip"')
+
+    revalidated = client.get("/v2/series", params={"limit": 100},
+                             headers={**gzip_headers, "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+    assert "Accept-Encoding" in revalidated.headers["vary"]
+    assert revalidated.headers["cache-control"] == first.headers["cache-control"]
+
+def test_body_etag_revalidates(client, monkeypatch):
+    from src.api.fastapi_server import visualization_client
+    from src.api.etags import body_etag
+
+    first = client.get("/v2/globe/anomalies", headers=IDENTITY)
+    assert first.status_code == 200
+    assert "error" not in first.json()["metadata"]
+    assert first.headers["etag"] == body_etag(first.content)
+
+    # The live payload carries a last_updated timestamp; pin it to see a match
+    async def fixed_anomalies():
+        return {"anomalies": [], "metadata": {"total_anomalies": 0}}
+    monkeypatch.setattr(visualization_client, "get_anomalies_for_globe", fixed_anomalies)
+    etag = client.get("/v2/globe/anomalies", headers=IDENTITY).headers["etag"]
+    revalidated = client.get("/v2/globe/anomalies", headers={**IDENTITY, "If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+class BrokenDatabase:
+    db_type = "sqlite"
+
+    async def execute_query_async(self, *args, **kwargs):
+        raise RuntimeError("database is locked")
+
+@pytest.mark.parametrize("path, params, revalidates", [
+    ("/v2/globe/trade-flows", {"min_value": 12345}, True),
+    # The body carries a last_updated timestamp, so its ETag moves anyway
+    ("/v2/globe/anomalies", {}, False),
+])
+def test_failed_globe_queries_are_neither_cached_nor_etagged(client, monkeypatch, path, params, revalidates):
+    from src.api.fastapi_server import visualization_client
+    with monkeypatch.context() as broken:
+        broken.setattr(visualization_client, "db_config", BrokenDatabase())
+        failed = client.get(path, params=params, headers=IDENTITY)
+    assert failed.status_code == 500
+    assert "etag" not in failed.headers and "x-cache" not in failed.headers
+
+    # Once the database is back the data is served, not a stored failure
+    recovered = client.get(path, params=params, headers=IDENTITY)
+    assert recovered.status_code == 200 and recovered.headers.get("x-cache") != "HIT"
+    assert "error" not in recovered.json()["metadata"]
+    conditional = client.get(path, params=params, headers={**IDENTITY, "If-None-Match": recovered.headers["etag"]})
+    assert conditional.status_code == (304 if revalidates else 200)
+
+# Single-flight coalescing
+
+def test_single_flight_shares_one_failure():
+    flight = SingleFlight()
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def burst():
+        return await asyncio.gather(*[flight.run("/v2/test", "key", failing) for _ in range(5)],
+                                    return_exceptions=True)
+
+    results = asyncio.run(burst())
+    assert calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len({id(result) for result in results}) == 1
+    stats = flight.stats()
+    assert stats["paths"]["/v2/test"] == {"computations": 1, "coalesced": 4, "errors": 1, "coalesced_ratio": 0.8}
+    assert stats["in_flight"] == 0
+
+    # The failure is not remembered: the next burst computes again
+    asyncio.run(burst())
+    assert calls == 2
+
+def test_single_flight_keys_on_arguments_and_survives_cancelled_callers():
+    flight = SingleFlight()
+    calls = []
+
+    @flight.coalesce("/v2/test")
+    async def compute(threshold: float = 20.0):
+        calls.append(threshold)
+        await asyncio.sleep(0.02)
+        return {"threshold": threshold}
+
+    async def scenario():
+        abandoned = asyncio.ensure_future(compute(threshold=20.0))
+        waiting = [compute(threshold=20.0), compute(threshold=50.0)]
+        await asyncio.sleep(0)
+        abandoned.cancel()  # a client disconnecting
+        return await asyncio.gather(*waiting)
+
+    same, other = asyncio.run(scenario())
+    assert same == {"threshold": 20.0} and other == {"threshold": 50.0}
+    assert sorted(calls) == [20.0, 50.0]
+
+# /v2/export
+
+def export(client, format, **filters):
+    response = client.get("/v2/export", params={"format": format, **filters})
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].endswith(f'trade_flows.{format}"')
+    return response
+
+def test_export_ndjson(client):
+    rows = [json.loads(line) for line in export(client, "ndjson").text.splitlines()]
+    assert len(rows) == len(trade_records())
+    assert all(list(row) == EXPORT_FIELDS for row in rows)
+    korea = [json.loads(line) for line in export(client, "ndjson", reporter="korea").text.splitlines()]
+    assert len(korea) == len(trade_records()) // len(COUNTRIES)
+    assert {row["reporter_iso"] for row in korea} == {"KOR"}
+
+def test_export_csv(client):
+    rows = list(csv.reader(io.StringIO(export(client, "csv").text)))
+    assert rows[0] == EXPORT_FIELDS
+    assert len(rows) - 1 == len(trade_records())
+    assert {row[EXPORT_FIELDS.index("flow")] for row in rows[1:]} == {"X", "M"}
+
+@pytest.mark.skipif(not ARROW_AVAILABLE, reason="needs the optional pyarrow package")
+def test_export_arrow(client):
+    import pyarrow as pa
+    table = pa.ipc.open_stream(export(client, "arrow").content).read_all()
+    assert table.schema.names == EXPORT_FIELDS
+    assert table.num_rows == len(trade_records())
+    assert table.schema.field("value_usd").type == pa.float64()
+
+def test_export_matching_nothing_keeps_headers(client):
+    assert export(client, "ndjson", commodity="no such commodity").content == b""
+    assert export(client, "csv", commodity="no such commodity").text.splitlines() == [",".join(EXPORT_FIELDS)]
+    if ARROW_AVAILABLE:
+        import pyarrow as pa
+        table = pa.ipc.open_stream(export(client, "arrow", commodity="no such commodity").content).read_all()
+        assert table.num_rows == 0 and table.schema.names == EXPORT_FIELDS
+
+def test_export_rejects_unknown_formats(client):
+    assert client.get("/v2/export", params={"format": "xml"}).status_code == 422
+
+def test_export_concurrency_stays_below_the_pool(monkeypatch):
+    assert max_concurrent_exports(8) == 2
+    assert max_concurrent_exports(2) == 1
+    monkeypatch.setenv("EXPORT_MAX_CONCURRENT", "20")
+    assert max_concurrent_exports(8) == 7
+
+def test_exports_beyond_the_limit_wait_without_a_connection():
+    events = []
+
+    async def batches(name):
+        events.append(f"{name} checked out")
+        try:
+            for value in range(2):
+                await asyncio.sleep(0.01)
+                yield [value]
+        finally:
+            events.append(f"{name} returned")
+
+    async def scenario():
+        slots = asyncio.Semaphore(1)
+
+        async def read(name):
+            return [rows async for rows in limit_concurrency(batches(name), slots)]
+
+        results = await asyncio.gather(read("a"), read("b"))
+        # A client going away mid-export gives its slot back
+        abandoned = limit_concurrency(batches("c"), slots)
+        await abandoned.__anext__()
+        await abandoned.aclose()
+        return results, slots.locked()
+
+    results, locked = asyncio.run(scenario())
+    assert results == [[[0], [1]], [[0], [1]]]
+    assert not locked
+    assert events == ["a checked out", "a returned", "b checked out", "b returned",
+                      "c checked out", "c returned"]
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+Database Configuration Tests
+Settings DatabaseConfig derives from the environment.
+"""
+
+import pytest
+
+from config.database import DatabaseConfig
+
+@pytest.mark.parametrize("db_type, pool_size", [("sqlite", 3), ("mysql", 10)])
+def test_async_workers_default_to_the_active_pool_size(monkeypatch, db_type, pool_size):
+    monkeypatch.setenv("DB_TYPE", db_type)
+    monkeypatch.setenv("SQLITE_POOL_SIZE", "3")
+    monkeypatch.delenv("DB_ASYNC_WORKERS", raising=False)
+    db = DatabaseConfig()
+    assert db.pool_size == pool_size
+    assert db.async_workers == pool_size
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Globe Stream Test
+Ingests trade flows into a temporary SQLite database through BulkLoader and
+checks that the delta the globe stream publishes for the new data version
+carries the anomaly the ingest created.
+"""
+
+import asyncio
+import json
+
+from config.data_version import DataVersion
+from src.api.globe_stream import GlobeUpdateChannel
+from src.api.trade_visualization_client import TradeVisualizationClient
+from src.ingest.bulk_loader import BulkLoader
+
+MEMORY = "Electronic integrated circuits: Memory (DRAM, flash, HBM)"
+
+def flow(period, value):
+    return {"period": period, "reporter_iso": "KOR", "partner_iso": "TWN", "hs6": "854232",
+            "flow": "X", "value_usd": value, "source": "comtrade"}
+
+def parse_event(message: bytes):
+    lines = message.decode().strip().split("\n")
+    fields = dict(line.split(": ", 1) for line in lines)
+    return fields["event"], json.loads(fields["data"])
+
+def test_delta_after_ingest_contains_changed_anomaly(sqlite_db):
+    loader = BulkLoader(sqlite_db)
+    loader.upsert_countries({"KOR": "South Korea", "TWN": "Taiwan"})
+    loader.upsert_hs_codes({"854232": MEMORY})
+    loader.upsert_trade_flows([flow("2023-01", 100e6), flow("2023-02", 105e6)])
+
+    client = TradeVisualizationClient()
+    client.db_config = sqlite_db
+    channel = GlobeUpdateChannel(client, DataVersion(sqlite_db, check_seconds=0), min_value=0)
+    queue = asyncio.Queue()
+    channel._subscribers.add(queue)
+
+    async def publish():
+        await channel._refresh(await channel.version.current_async())
+        return parse_event(queue.get_nowait())
+
+    event, snapshot = asyncio.run(publish())
+    assert event == "snapshot"
+    assert snapshot["anomalies"] == []  # +5% is below the threshold
+
+    # +90% on the latest period: a HIGH spike
+    loader.upsert_trade_flows([flow("2023-03", 199.5e6)])
+    event, delta = asyncio.run(publish())
+    assert event == "delta"
+    assert delta["version"] != snapshot["version"]
+    key = f"South Korea|Taiwan|{MEMORY}|2023-03"
+    upserts = {anomaly["key"]: anomaly for anomaly in delta["anomalies"]["upsert"]}
+    assert set(upserts) == {key}
+    assert upserts[key]["type"] == "SPIKE"
+    assert upserts[key]["severity"] == "HIGH"
+    assert upserts[key]["change_percent"] == 90.0
+
+    # Re-loading the same rows changes nothing, so nothing is published
+    loader.upsert_trade_flows([flow("2023-03", 199.5e6)])
+    asyncio.run(channel._refresh(asyncio.run(channel.version.current_async())))
+    assert queue.empty()
+
+    # Correcting the spike away removes the anomaly
+    loader.upsert_trade_flows([flow("2023-03", 110e6)])
+    event, delta = asyncio.run(publish())
+    assert delta["anomalies"] == {"upsert": [], "remove": [key]}
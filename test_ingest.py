@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Ingest Tests
+BulkLoader upserts (idempotent on the natural key, and the migration that
+enforces it), the rollups it keeps in step with trade_flows, Comtrade flow
+codes, and the filter name index following ingests.
+"""
+
+import asyncio
+
+from conftest import COUNTRIES, HS_CODES, trade_records, load_trade_data
+from config.data_version import DataVersion
+from src.api.filter_index import NameIndex
+from src.ingest.bulk_loader import BulkLoader
+from src.ingest.rollups import rebuild_rollups
+
+ROUTE_TOTALS = """
+    SELECT period, hs6, reporter_iso, partner_iso, SUM(value_usd), COUNT(*)
+    FROM trade_flows GROUP BY period, hs6, reporter_iso, partner_iso
+"""
+STATS_TOTALS = """
+    SELECT period, hs6, source, SUM(value_usd), COUNT(*)
+    FROM trade_flows GROUP BY period, hs6, source
+"""
+
+def totals(db, sql):
+    """{group key: (rounded total, count)} for rows with a count"""
+    return {
+        tuple(row[:-2]): (round(row[-2], 2), row[-1])
+        for row in db.execute_query(sql, fetch='all') if row[-1]
+    }
+
+def assert_rollups_consistent(db):
+    """Rollups match a GROUP BY over trade_flows"""
+    routes = totals(db, "SELECT period, hs6, reporter_iso, partner_iso, total_value, record_count "
+                        "FROM trade_flow_rollups")
+    stats = totals(db, "SELECT period, hs6, source, total_value, record_count FROM stats_rollups")
+    assert routes == totals(db, ROUTE_TOTALS)
+    assert stats == totals(db, STATS_TOTALS)
+
+def count_rows(db, table="trade_flows"):
+    return db.execute_query(f"SELECT COUNT(*) FROM {table}", fetch='one')[0]
+
+def test_reload_is_idempotent(sqlite_db):
+    records = trade_records()
+    first = load_trade_data(sqlite_db, records)
+    assert first["rows"] == len(records) and first["unchanged"] == 0
+
+    rollups_before = totals(sqlite_db, "SELECT * FROM trade_flow_rollups")
+    second = load_trade_data(sqlite_db, records)
+    assert second["rows"] == len(records)
+    assert second["unchanged"] == len(records)
+    assert count_rows(sqlite_db) == len(records)
+    assert totals(sqlite_db, "SELECT * FROM trade_flow_rollups") == rollups_before
+    assert_rollups_consistent(sqlite_db)
+
+def test_natural_key_migration_quarantines_duplicates(tmp_path, monkeypatch):
+    from config.database import DatabaseConfig
+    from config.migrations import apply_migrations
+    monkeypatch.setenv("SQLITE_DATABASE", str(tmp_path / "legacy.db"))
+    db = DatabaseConfig()
+    # A database from before the migrations, whose route columns allow NULL
+    db.execute_query(
+        "CREATE TABLE trade_flows (id INTEGER PRIMARY KEY AUTOINCREMENT, period TEXT, "
+        "reporter_iso TEXT, partner_iso TEXT, hs6 TEXT, flow TEXT, value_usd REAL, "
+        "quantity REAL, unit TEXT, source TEXT, updated_at TEXT)",
+        fetch='none'
+    )
+    db.execute_many(
+        "INSERT INTO trade_flows (id, period, reporter_iso, partner_iso, hs6, flow, value_usd) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(1, "2023-01", "KOR", "TWN", "854232", "X", 1.0),
+         (2, "2023-01", "KOR", "TWN", "854232", "X", 2.0),
+         (3, "2023-01", "KOR", "TWN", "854232", "X", 3.0),
+         (4, "2023-01", None, "TWN", "854232", "X", 4.0),
+         (5, "2023-01", None, "TWN", "854232", "X", 5.0)]
+    )
+    apply_migrations(db, target=3)
+
+    def ids(table):
+        return [row[0] for row in db.execute_query(f"SELECT id FROM {table} ORDER BY id")]
+    assert ids("trade_flows") == [3, 4, 5]
+    assert ids("trade_flows_duplicates") == [1, 2]
+    assert ids("census_trade_cache_duplicates") == []
+
+def test_rollups_follow_changed_and_new_rows(sqlite_db):
+    records = trade_records()
+    load_trade_data(sqlite_db, records)
+    assert_rollups_consistent(sqlite_db)
+
+    # Changed values, a changed source (moves between stats groups),
+    # duplicates within one batch (the last wins) and new keys
+    changed = [dict(record, value_usd=record["value_usd"] * 2) for record in records[::3]]
+    resourced = [dict(record, source="census") for record in records[1::5]]
+    duplicates = [dict(records[0], value_usd=1.0), dict(records[0], value_usd=7.0)]
+    new = [dict(record, period="2023-04") for record in records[:10]]
+    result = load_trade_data(sqlite_db, changed + resourced + duplicates + new)
+    assert result["rows"] == len(changed) + len(resourced) + len(duplicates) + len(new)
+
+    assert count_rows(sqlite_db) == len(records) + len(new)
+    assert sqlite_db.execute_query(
+        "SELECT value_usd FROM trade_flows WHERE period = ? AND reporter_iso = ? AND partner_iso = ? "
+        "AND hs6 = ? AND flow = ?",
+        tuple(records[0][column] for column in ("period", "reporter_iso", "partner_iso", "hs6", "flow")),
+        fetch='one'
+    )[0] == 7.0
+    assert_rollups_consistent(sqlite_db)
+
+    # An incremental result equals a rebuild from scratch
+    incremental = totals(sqlite_db, "SELECT * FROM trade_flow_rollups")
+    rebuild_rollups(sqlite_db)
+    assert totals(sqlite_db, "SELECT * FROM trade_flow_rollups") == incremental
+
+def test_comtrade_flow_codes_are_checked_per_row(sqlite_db):
+    record = {"reporterISO": "KOR", "partnerISO": "TWN", "cmdCode": "854232", "period": "2023",
+              "primaryValue": 5e8, "reporterDesc": "South Korea", "partnerDesc": "Taiwan"}
+    records = [dict(record, flowCode=code) for code in ("X", " m ", "RX", "RM", None)]
+    records.append(dict(record, flowCode="X", partnerISO=None))
+
+    result = BulkLoader(sqlite_db).load_comtrade_records(records)
+    assert result["skipped"] == 3
+    assert result["skipped_flow_codes"] == {"RX": 1, "RM": 1}
+    flows = sqlite_db.execute_query("SELECT flow FROM trade_flows ORDER BY flow", fetch='all')
+    assert [row.flow for row in flows] == ["M", "X"]
+
+def test_filter_index_sees_ingested_names(sqlite_db):
+    index = NameIndex(sqlite_db, DataVersion(sqlite_db, check_seconds=0))
+    load_trade_data(sqlite_db, trade_records()[:1])
+    assert asyncio.run(index.match_countries("korea")) == ["KOR"]
+    assert asyncio.run(index.match_countries("vietnam")) == []
+
+    # Well inside the TTL: the data version move alone triggers the reload
+    loader = BulkLoader(sqlite_db)
+    loader.upsert_countries({"VNM": "Vietnam"})
+    loader.upsert_hs_codes({"854239": "Electronic integrated circuits: Other"})
+    assert asyncio.run(index.match_countries("vietnam")) == ["VNM"]
+    assert asyncio.run(index.match_commodities("other")) == ["854239"]
+    assert index.status()["countries"] == len(COUNTRIES) + 1
+    assert index.status()["commodities"] == len(HS_CODES) + 1
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Query Plan Tests
+The EXPLAIN checks behind `python -m config.migrations --explain` and
+`python -m config.partitioning --check`: hot queries reach trade_flows
+through an index, rollup reads need no sort, and period-filtered queries
+prune trade_flows partitions on MySQL. The MySQL checks run with
+TEST_MYSQL=1 against the database named by the MYSQL_* variables, and
+partition its trade_flows table.
+"""
+
+import re
+
+import pytest
+
+from conftest import MYSQL_TESTS, trade_records, load_trade_data
+from config.migrations import explain_query, explain_hot_queries, hot_queries
+from config.partitioning import (
+    pruning_queries, check_partition_pruning, ensure_period_partitions, enable_partitioning
+)
+
+def test_hot_queries_use_indexes(sqlite_db):
+    load_trade_data(sqlite_db, trade_records())
+    report = explain_hot_queries(sqlite_db)
+    assert set(report) == set(hot_queries("sqlite"))
+    assert {name: result for name, result in report.items() if not result["uses_index"]} == {}
+    assert any(step.startswith("SCAN r") for step in report["/v2/anomalies"]["plan"])
+
+def test_explain_flags_scans_sorts_and_missed_rollups(sqlite_db):
+    with sqlite_db.get_connection() as connection:
+        scan = explain_query(connection, "sqlite", "SELECT * FROM trade_flows tf WHERE tf.unit = 'u'",
+                             (), ("tf",))
+        grouped = explain_query(connection, "sqlite",
+                                "SELECT hs6, SUM(total_value) FROM trade_flow_rollups r GROUP BY hs6",
+                                (), (), ("r", "trade_flow_rollups"))
+        elsewhere = explain_query(connection, "sqlite", "SELECT period FROM trade_flows", (),
+                                  (), ("r", "trade_flow_rollups"))
+    assert scan["full_scans"] == ["tf"] and not scan["uses_index"]
+    assert grouped["sorts"] and not grouped["uses_index"]
+    assert elsewhere["missing_rollups"] == ["r"] and not elsewhere["uses_index"]
+
+@pytest.mark.parametrize("db_type", ["sqlite", "mysql"])
+def test_pruning_queries_filter_period_directly(db_type):
+    # MySQL prunes only on plain comparisons of the partitioning column
+    for name, (sql, params) in pruning_queries(db_type).items():
+        assert re.search(r"\btf\.period\s*(=|<=?|>=?|BETWEEN|IN)\s", sql), name
+        assert not re.search(r"\w\(\s*tf\.period", sql), name
+
+def test_partitioning_is_a_no_op_on_sqlite(sqlite_db):
+    assert enable_partitioning(sqlite_db) == []
+    assert ensure_period_partitions(["2031-01"], sqlite_db) == []
+
+@pytest.mark.skipif(not MYSQL_TESTS, reason="set TEST_MYSQL=1 to run against MySQL")
+def test_mysql_queries_prune_partitions(monkeypatch):
+    from config.database import DatabaseConfig
+    from config.migrations import apply_migrations
+    monkeypatch.setenv("DB_TYPE", "mysql")
+    db = DatabaseConfig()
+    apply_migrations(db)
+    enable_partitioning(db)
+
+    report = check_partition_pruning(db)
+    assert set(report) == set(pruning_queries("mysql"))
+    assert {name: result for name, result in report.items() if not result["pruned"]} == {}
+
+@pytest.mark.skipif(not MYSQL_TESTS, reason="set TEST_MYSQL=1 to run against MySQL")
+def test_mysql_hot_queries_use_indexes(monkeypatch):
+    from config.database import DatabaseConfig
+    from config.migrations import apply_migrations
+    monkeypatch.setenv("DB_TYPE", "mysql")
+    db = DatabaseConfig()
+    apply_migrations(db)
+    assert {name: result for name, result in explain_hot_queries(db).items() if not result["uses_index"]} == {}
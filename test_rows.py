@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Row Decoding Tests
+The GC pause around large decodes: overlapping decodes on several threads
+re-enable the GC only once the last one finishes, and never re-enable a GC
+that was already disabled.
+"""
+
+import gc
+import threading
+
+from config.rows import gc_paused
+
+def test_overlapping_gc_pauses_restore_the_gc_once():
+    assert gc.isenabled()
+    first_in, second_out = threading.Event(), threading.Event()
+    enabled_in_first = []
+
+    def first():
+        with gc_paused():
+            first_in.set()
+            second_out.wait(5)
+            # The second pause has ended, this one still runs
+            enabled_in_first.append(gc.isenabled())
+
+    thread = threading.Thread(target=first)
+    thread.start()
+    first_in.wait(5)
+    with gc_paused():
+        assert not gc.isenabled()
+    second_out.set()
+    thread.join()
+    assert enabled_in_first == [False]
+    assert gc.isenabled()
+
+def test_gc_disabled_by_the_operator_stays_disabled():
+    gc.disable()
+    try:
+        with gc_paused():
+            pass
+        assert not gc.isenabled()
+    finally:
+        gc.enable()